@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Alert Load Test
+Measures alert throughput against the local SMTP sink.
+
+Every host of a synthetic fleet fails its probe, so one monitoring cycle
+sends one alert per host through the real smtplib code path. Each
+scenario injects a different fault into the sink; the report gives per
+scenario:
+
+- alerts per second and failed alerts
+- time from detection (the failed probe) to the sink accepting the message
+- how many connections were dropped or logins refused
+
+Usage:
+    python alert_loadtest.py
+    python alert_loadtest.py --alerts 500 --scenarios baseline,slow-relay
+    python alert_loadtest.py --relay-delay 0.5 --scenarios slow-relay -o slow.json
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict
+
+from benchmark import FakeProber, synthetic_fleet
+from monitor_engine import MonitorEngine, without_monitor_env
+from self_metrics import percentile
+from smtp_sink import SMTPSink
+
+DEFAULT_ALERTS = 200
+
+# Sink options per scenario; --relay-delay changes the slow-relay delay
+SCENARIOS = {
+    'baseline': {},
+    'reply-latency': {'latency': 0.005},
+    'slow-relay': {'relay_delay': 0.1},
+    'refused-logins': {'refuse_login': 0.2},
+    'dropped-connections': {'drop': 0.1},
+}
+
+
+class _LoadTestEngine(MonitorEngine):
+    """Engine that counts failed alerts instead of presenting them."""
+
+    def __init__(self, prober):
+        super().__init__(config_file=os.devnull, prober=prober)
+        self.alert_errors: Dict[str, int] = {}
+
+    def on_alert_failed(self, server: str, error: Exception):
+        name = type(error).__name__
+        self.alert_errors[name] = self.alert_errors.get(name, 0) + 1
+
+
+def run_scenario(name: str, alerts: int, sink_options: Dict) -> Dict[str, object]:
+    """Send one alert per host of a failing fleet through a sink with the given faults."""
+    sink = SMTPSink(port=0, **sink_options)
+    sink.start()
+
+    try:
+        with without_monitor_env():
+            engine = _LoadTestEngine(FakeProber(loss=0.0, dead=1.0))
+        engine.max_failures = 1
+        engine.smtp_config.update(
+            smtp_server=sink.host, smtp_port=sink.port, smtp_use_tls=False, smtp_timeout=10,
+            smtp_username='monitor', smtp_password='secret',
+            smtp_from='monitor@localhost', smtp_to='ops@localhost')
+        for server in synthetic_fleet(alerts):
+            engine.add_server_entry(server)
+
+        started = time.perf_counter()
+        engine.run_cycle()
+        elapsed = time.perf_counter() - started
+    finally:
+        sink.stop()
+
+    # Detection is the failed probe that crossed max_failures
+    detected = {server: data['last_check'].timestamp() for server, data in engine.servers.items()}
+    latencies = []
+    for message in sink.messages:
+        server = message.subject[len("Server Alert: "):].rsplit(" is unreachable", 1)[0]
+        if server in detected:
+            latencies.append(message.accepted_at - detected[server])
+
+    alert_stat = engine.instrumentation.alert
+    return {
+        'scenario': name,
+        'sink': sink_options,
+        'alerts': alerts,
+        'accepted': len(latencies),
+        'failed': sum(engine.alert_errors.values()),
+        'errors': engine.alert_errors,
+        'elapsed_seconds': elapsed,
+        'alerts_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'send_seconds_avg': alert_stat.as_dict()['avg'],
+        'send_seconds_max': alert_stat.max,
+        'detection_to_accept_seconds': {
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies, default=0.0)
+        },
+        'sink_stats': dict(sink.stats)
+    }
+
+
+def _format_result(result: Dict) -> str:
+    latency = result['detection_to_accept_seconds']
+    return (f"{result['scenario']:<20} | {result['alerts_per_second']:7.1f} alerts/s | "
+            f"accepted {result['accepted']}/{result['alerts']}, failed {result['failed']} | "
+            f"detect->accept p50 {latency['p50'] * 1000:.1f}ms p95 {latency['p95'] * 1000:.1f}ms "
+            f"max {latency['max'] * 1000:.1f}ms")
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Measure alert throughput against the local SMTP sink")
+    parser.add_argument('--alerts', type=int, default=DEFAULT_ALERTS,
+                        help="Alerts per scenario (default: %(default)s)")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help="Comma-separated scenarios (default: %(default)s)")
+    parser.add_argument('--relay-delay', type=float,
+                        help="Seconds the slow-relay scenario waits before accepting a message")
+    parser.add_argument('--output', '-o', help="Result file (default: benchmarks/alerts-<time>.json)")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+    if args.alerts < 1:
+        parser.error("--alerts must be at least 1")
+
+    # Failed sends are expected in the fault scenarios; keep the terminal readable
+    logging.basicConfig(level=logging.CRITICAL)
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'alerts': args.alerts,
+        'scenarios': []
+    }
+    for name in names:
+        sink_options = dict(SCENARIOS[name])
+        if name == 'slow-relay' and args.relay_delay is not None:
+            sink_options['relay_delay'] = args.relay_delay
+        result = run_scenario(name, args.alerts, sink_options)
+        results['scenarios'].append(result)
+        print(_format_result(result), file=sys.stderr)
+
+    output = args.output or os.path.join('benchmarks', f"alerts-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
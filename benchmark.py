@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Benchmark
+Reproducible performance benchmark of the monitoring engine.
+
+Runs monitoring cycles against synthetic fleets (100, 1k, 10k and 100k
+hosts by default) probed by a fake prober with configurable latency and
+loss, and reports per fleet:
+
+- cycle wall time (min, median, max)
+- CPU seconds per 1k probes
+- peak resident memory
+- console update cost (front-end hooks and dashboard frames)
+- alert throughput, with the SMTP transport replaced by a counter
+
+It also times cold starts: a fresh interpreter importing the engine and
+a one-shot `server_monitor_daemon.py probe`, the cost paid by status
+checks and cron jobs.
+
+Each fleet runs in a fresh process so peak RSS is not inherited from the
+previous size. Results are written as JSON; pass a previous result file
+with --baseline to flag regressions, e.g. after changing ping_server,
+monitor_loop or the state store.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --sizes 100,1000 --cycles 10 --state-store
+    python benchmark.py --loss 0.05 --latency-dist lognormal --latency-ms 40
+    python benchmark.py --output new.json --baseline benchmarks/old.json
+    python benchmark.py --cold-start-only --cold-start-runs 30
+
+Latencies are simulated, not slept, unless --sleep-scale is set: probing
+100k hosts at 20ms each would otherwise take over half an hour per cycle.
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+import statistics
+import multiprocessing
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from monitor_engine import MONITOR_ENV_VARS, without_monitor_env
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+DEFAULT_CYCLES = 5
+DEFAULT_THRESHOLD = 0.2
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+# Metrics compared against a baseline; all of them are "lower is better"
+COMPARED_METRICS = ('cycle_seconds_median', 'cpu_seconds_per_1k_probes', 'peak_rss_bytes',
+                    'ui_seconds_per_cycle', 'dashboard_frame_seconds', 'alert_seconds_avg')
+
+DEFAULT_COLD_START_RUNS = 10
+
+# Commands timed from process start to exit; 'python' is the bare
+# interpreter the others are compared to. Port 1 on loopback refuses
+# connections at once, so the probe measures startup rather than network.
+COLD_START_COMMANDS = {
+    'python': ['-c', 'pass'],
+    'import_engine': ['-c', 'import monitor_engine'],
+    'probe': ['server_monitor_daemon.py', 'probe', '--env-file', os.devnull, '127.0.0.1:1'],
+}
+
+
+class FakeProber:
+    """
+    Prober returning synthetic (is_reachable, response_time_ms) results.
+
+    Args:
+        latency_dist: One of LATENCY_DISTRIBUTIONS
+        latency_ms: Mean (median for lognormal) response time
+        spread: Standard deviation in ms for normal, sigma for lognormal,
+            half-width in ms for uniform; ignored otherwise
+        loss: Probability that a probe of a healthy host fails
+        dead: Fraction of hosts that never answer
+        sleep_scale: Sleep for this fraction of the simulated latency
+        seed: Random seed, so runs are reproducible
+    """
+
+    def __init__(self, latency_dist: str = 'lognormal', latency_ms: float = 20.0,
+                 spread: float = 0.5, loss: float = 0.01, dead: float = 0.01,
+                 sleep_scale: float = 0.0, seed: int = 42):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"unknown latency distribution: {latency_dist}")
+
+        self.latency_dist = latency_dist
+        self.latency_ms = latency_ms
+        self.spread = spread
+        self.loss = loss
+        self.dead = dead
+        self.sleep_scale = sleep_scale
+        self.rng = random.Random(seed)
+        self._dead_hosts: Dict[str, bool] = {}
+        self.probes = 0
+
+    def latency(self) -> float:
+        """Draw one response time in milliseconds."""
+        rng = self.rng
+        if self.latency_dist == 'uniform':
+            value = rng.uniform(self.latency_ms - self.spread, self.latency_ms + self.spread)
+        elif self.latency_dist == 'normal':
+            value = rng.gauss(self.latency_ms, self.spread)
+        elif self.latency_dist == 'lognormal':
+            value = self.latency_ms * rng.lognormvariate(0.0, self.spread)
+        elif self.latency_dist == 'exponential':
+            value = rng.expovariate(1.0 / self.latency_ms)
+        else:
+            value = self.latency_ms
+        return max(0.0, value)
+
+    def is_dead(self, server: str) -> bool:
+        """Whether a host was picked as permanently down."""
+        dead = self._dead_hosts.get(server)
+        if dead is None:
+            dead = self._dead_hosts[server] = self.rng.random() < self.dead
+        return dead
+
+    def __call__(self, server: str) -> Tuple[bool, int]:
+        self.probes += 1
+        if self.is_dead(server) or self.rng.random() < self.loss:
+            return False, 0
+
+        latency = self.latency()
+        if self.sleep_scale:
+            time.sleep(latency * self.sleep_scale / 1000.0)
+        return True, int(latency)
+
+
+def synthetic_fleet(size: int) -> List[str]:
+    """Return `size` distinct private addresses."""
+    return [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(size)]
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size of this process."""
+    if resource is None:
+        from self_metrics import process_rss_bytes
+        return process_rss_bytes()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes elsewhere
+    return peak if platform.system() == 'Darwin' else peak * 1024
+
+
+def _build_monitor(prober: FakeProber, alert_latency: float):
+    """Create a console monitor that times its front-end hooks and counts alerts."""
+    from server_monitor_console import ConsoleServerMonitor
+
+    class BenchmarkMonitor(ConsoleServerMonitor):
+        """Console monitor with timed hooks and a counting SMTP transport."""
+
+        def __init__(self):
+            super().__init__()
+            self.prober = prober
+            self.ui_seconds = 0.0
+            self.alerts = 0
+            self.smtp_config.update(smtp_username='bench', smtp_password='bench',
+                                    smtp_from='bench@localhost', smtp_to='ops@localhost')
+
+        def _timed(self, hook, *args):
+            started = time.perf_counter()
+            hook(*args)
+            self.ui_seconds += time.perf_counter() - started
+
+        def on_cycle_start(self):
+            self._timed(super().on_cycle_start)
+
+        def on_status_update(self, server, prev_status):
+            self._timed(super().on_status_update, server, prev_status)
+
+        def on_transition(self, server, is_reachable):
+            self._timed(super().on_transition, server, is_reachable)
+
+        def on_alert_sent(self, server):
+            self._timed(super().on_alert_sent, server)
+
+        def on_cycle_complete(self, cycle_records):
+            self._timed(super().on_cycle_complete, cycle_records)
+
+        def _send_email(self, subject, body):
+            if alert_latency:
+                time.sleep(alert_latency)
+            self.alerts += 1
+
+    return BenchmarkMonitor()
+
+
+def run_fleet(size: int, cycles: int = DEFAULT_CYCLES, prober_options: Optional[Dict] = None,
+              max_failures: int = 3, output_mode: str = 'summary', state_store: bool = False,
+              exporters: bool = False, alert_latency: float = 0.0, workers: int = 0) -> Dict[str, object]:
+    """
+    Run `cycles` monitoring cycles against a synthetic fleet of `size` hosts.
+
+    Returns:
+        Measurements of this fleet as a JSON-serialisable dict
+    """
+    workdir = tempfile.TemporaryDirectory(prefix='server-monitor-bench-')
+    sink = io.StringIO()
+
+    try:
+        rss_before = peak_rss_bytes()
+        prober = FakeProber(**(prober_options or {}))
+        with redirect_stdout(sink), without_monitor_env():
+            monitor = _build_monitor(prober, alert_latency)
+        monitor.config_file = os.path.join(workdir.name, 'servers.json')
+        monitor.max_failures = max_failures
+        monitor.output_mode = output_mode
+
+        if state_store:
+            from state_store import SQLiteStateStore
+            monitor.state_store = SQLiteStateStore(os.path.join(workdir.name, 'monitor.db'))
+        if exporters:
+            from metrics_exporter import PrometheusExporter
+            from status_api import StatusAPI
+            monitor.metrics = PrometheusExporter('127.0.0.1', 0)
+            monitor.metrics.start()
+            monitor.status_api = StatusAPI('127.0.0.1', 0)
+            monitor.status_api.start()
+        if workers:
+            from shard_pool import ShardPool
+            monitor.shard_pool = ShardPool(prober, workers,
+                                           observe_probes=monitor.instrumentation.observe_probes)
+            monitor.shard_pool.start()
+
+        setup_started = time.perf_counter()
+        for server in synthetic_fleet(size):
+            monitor.add_server_entry(server)
+        setup_seconds = time.perf_counter() - setup_started
+
+        cycle_seconds = []
+        cpu_started = time.process_time()
+        monitor.monitoring = True
+        with redirect_stdout(sink):
+            for _ in range(cycles):
+                started = time.perf_counter()
+                monitor.run_cycle()
+                cycle_seconds.append(time.perf_counter() - started)
+        cpu_finished = time.process_time()
+        monitor.monitoring = False
+
+        # Dashboard frames are drawn outside the monitor thread; time a full
+        # redraw of the first page into an in-memory terminal
+        from server_monitor_console import DashboardRenderer
+        renderer = DashboardRenderer(io.StringIO())
+        frames = 20
+        frame_started = time.perf_counter()
+        for _ in range(frames):
+            renderer.previous = []
+            renderer.render(monitor.dashboard_lines(50))
+        dashboard_frame_seconds = (time.perf_counter() - frame_started) / frames
+
+        cpu_seconds = cpu_finished - cpu_started
+        probes = size * cycles
+        alert_stat = monitor.instrumentation.alert
+
+        result = {
+            'hosts': size,
+            'cycles': cycles,
+            'probes': probes,
+            'setup_seconds': setup_seconds,
+            'cycle_seconds_min': min(cycle_seconds),
+            'cycle_seconds_median': statistics.median(cycle_seconds),
+            'cycle_seconds_max': max(cycle_seconds),
+            'probes_per_second': probes / sum(cycle_seconds),
+            'cpu_seconds': cpu_seconds,
+            'cpu_seconds_per_1k_probes': cpu_seconds * 1000.0 / probes,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'peak_rss_before_bytes': rss_before,
+            'probe_overhead_seconds_avg': monitor.instrumentation.probe_overhead.as_dict()['avg'],
+            'ui_seconds_per_cycle': monitor.ui_seconds / cycles,
+            'ui_seconds_per_probe': monitor.ui_seconds / probes,
+            'dashboard_frame_seconds': dashboard_frame_seconds,
+            'console_output_bytes': len(sink.getvalue()),
+            'alerts': monitor.alerts,
+            'alert_seconds_avg': alert_stat.as_dict()['avg'],
+            'alerts_per_second': alert_stat.count / alert_stat.total if alert_stat.total else 0.0,
+            'offline': monitor.aggregates.counts()['offline'],
+            'workers': workers
+        }
+
+        monitor.close_metrics_exporter()
+        monitor.close_status_api()
+        monitor.close_state_store()
+        monitor.close_shard_pool()
+        return result
+    finally:
+        workdir.cleanup()
+
+
+def _run_fleet_child(conn, size: int, options: Dict):
+    try:
+        conn.send(run_fleet(size, **options))
+    finally:
+        conn.close()
+
+
+def run_isolated(size: int, **options) -> Dict[str, object]:
+    """Run one fleet in a fresh interpreter so peak RSS belongs to this fleet alone."""
+    # A plain process rather than a Pool: pool processes are daemonic and
+    # could not start shard workers
+    context = multiprocessing.get_context('spawn')
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_run_fleet_child, args=(child_conn, size, options))
+    process.start()
+    child_conn.close()
+    try:
+        return parent_conn.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(f"benchmark of {size} hosts failed (exit code {process.exitcode})") from None
+    finally:
+        parent_conn.close()
+        process.join()
+
+
+def cold_start(runs: int = DEFAULT_COLD_START_RUNS) -> Dict[str, Dict[str, float]]:
+    """
+    Time COLD_START_COMMANDS in fresh interpreters.
+
+    Returns:
+        Per command the min and median wall time, and the median overhead
+        over the bare interpreter
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = {name: value for name, value in os.environ.items() if name not in MONITOR_ENV_VARS}
+
+    timings: Dict[str, List[float]] = {name: [] for name in COLD_START_COMMANDS}
+    # Interleave the commands so drift in machine load affects all alike
+    for _ in range(runs):
+        for name, command in COLD_START_COMMANDS.items():
+            started = time.perf_counter()
+            subprocess.run([sys.executable, *command], cwd=root, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings[name].append(time.perf_counter() - started)
+
+    interpreter = statistics.median(timings['python'])
+    return {
+        name: {
+            'seconds_min': min(values),
+            'seconds_median': statistics.median(values),
+            'overhead_seconds': statistics.median(values) - interpreter
+        } for name, values in timings.items()
+    }
+
+
+def compare_results(current: Dict, baseline: Dict,
+                    threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Compare two result files fleet by fleet.
+
+    Returns:
+        One line per metric that got worse by more than `threshold` (0.2 = 20%)
+    """
+    previous = {fleet['hosts']: fleet for fleet in baseline.get('fleets', [])}
+    regressions = []
+
+    for fleet in current.get('fleets', []):
+        old = previous.get(fleet['hosts'])
+        if old is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = old.get(metric), fleet.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if change > threshold:
+                regressions.append(f"{fleet['hosts']} hosts: {metric} {before:.6g} -> {after:.6g} "
+                                   f"(+{change * 100:.0f}%)")
+
+    previous_starts = baseline.get('cold_start', {})
+    for name, timing in current.get('cold_start', {}).items():
+        before = previous_starts.get(name, {}).get('seconds_median')
+        after = timing['seconds_median']
+        if not before:
+            continue
+        change = (after - before) / before
+        if change > threshold:
+            regressions.append(f"cold start {name}: {before:.6g} -> {after:.6g} (+{change * 100:.0f}%)")
+    return regressions
+
+
+def _format_fleet(fleet: Dict) -> str:
+    return (f"{fleet['hosts']:>7} hosts | cycle {fleet['cycle_seconds_median']:.3f}s | "
+            f"CPU {fleet['cpu_seconds_per_1k_probes']:.3f}s/1k probes | "
+            f"RSS {fleet['peak_rss_bytes'] / 1048576:.1f}MB | "
+            f"UI {fleet['ui_seconds_per_cycle'] * 1000:.1f}ms/cycle, "
+            f"frame {fleet['dashboard_frame_seconds'] * 1000:.2f}ms | "
+            f"alerts {fleet['alerts']} ({fleet['alerts_per_second']:.0f}/s)")
+
+
+def _format_cold_start(name: str, timing: Dict) -> str:
+    return (f"cold start {name:<14} | median {timing['seconds_median'] * 1000:.1f}ms | "
+            f"min {timing['seconds_min'] * 1000:.1f}ms | "
+            f"over interpreter {timing['overhead_seconds'] * 1000:.1f}ms")
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the monitoring engine on synthetic fleets")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated fleet sizes (default: %(default)s)")
+    parser.add_argument('--cycles', type=int, default=DEFAULT_CYCLES,
+                        help="Monitoring cycles per fleet (default: %(default)s)")
+    parser.add_argument('--latency-dist', choices=LATENCY_DISTRIBUTIONS, default='lognormal',
+                        help="Response time distribution (default: %(default)s)")
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                        help="Mean response time, median for lognormal (default: %(default)s)")
+    parser.add_argument('--latency-spread', type=float, default=0.5,
+                        help="Std dev in ms (normal), sigma (lognormal) or half-width in ms (uniform)")
+    parser.add_argument('--loss', type=float, default=0.01,
+                        help="Probability that a probe of a healthy host fails (default: %(default)s)")
+    parser.add_argument('--dead', type=float, default=0.01,
+                        help="Fraction of hosts that never answer (default: %(default)s)")
+    parser.add_argument('--sleep-scale', type=float, default=0.0,
+                        help="Actually sleep this fraction of each simulated latency (default: 0)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed (default: %(default)s)")
+    parser.add_argument('--max-failures', type=int, default=3,
+                        help="Consecutive failures before an alert (default: %(default)s)")
+    parser.add_argument('--alert-latency-ms', type=float, default=0.0,
+                        help="Simulated SMTP send time per alert (default: 0)")
+    parser.add_argument('--output-mode', choices=['summary', 'verbose'], default='summary',
+                        help="Console output mode to measure (default: %(default)s)")
+    parser.add_argument('--state-store', action='store_true',
+                        help="Record every cycle in a temporary SQLite state store")
+    parser.add_argument('--exporters', action='store_true',
+                        help="Publish to the metrics exporter and status API every cycle")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Probe in this many shard worker processes (default: 0, in the monitor process)")
+    parser.add_argument('--in-process', action='store_true',
+                        help="Run all fleets in this process (peak RSS is then cumulative)")
+    parser.add_argument('--cold-start-runs', type=int, default=DEFAULT_COLD_START_RUNS,
+                        help="Fresh interpreters per cold start command, 0 to skip (default: %(default)s)")
+    parser.add_argument('--cold-start-only', action='store_true',
+                        help="Only time cold starts, no fleets")
+    parser.add_argument('--output', '-o', help="Result file (default: benchmarks/benchmark-<time>.json)")
+    parser.add_argument('--baseline', help="Earlier result file to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown reported as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    except ValueError:
+        parser.error(f"invalid --sizes: {args.sizes}")
+    if args.cycles < 1:
+        parser.error("--cycles must be at least 1")
+    if args.cold_start_only:
+        sizes = []
+        if args.cold_start_runs < 1:
+            parser.error("--cold-start-only needs --cold-start-runs of at least 1")
+
+    prober_options = {
+        'latency_dist': args.latency_dist,
+        'latency_ms': args.latency_ms,
+        'spread': args.latency_spread,
+        'loss': args.loss,
+        'dead': args.dead,
+        'sleep_scale': args.sleep_scale,
+        'seed': args.seed
+    }
+    options = {
+        'cycles': args.cycles,
+        'prober_options': prober_options,
+        'max_failures': args.max_failures,
+        'output_mode': args.output_mode,
+        'state_store': args.state_store,
+        'exporters': args.exporters,
+        'alert_latency': args.alert_latency_ms / 1000.0,
+        'workers': args.workers
+    }
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'options': {**options, 'isolated': not args.in_process},
+        'fleets': []
+    }
+
+    for size in sizes:
+        runner = run_fleet if args.in_process else run_isolated
+        fleet = runner(size, **options)
+        results['fleets'].append(fleet)
+        print(_format_fleet(fleet), file=sys.stderr)
+
+    if args.cold_start_runs > 0:
+        results['cold_start'] = cold_start(args.cold_start_runs)
+        for name, timing in results['cold_start'].items():
+            print(_format_cold_start(name, timing), file=sys.stderr)
+
+    output = args.output or os.path.join('benchmarks', f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions against {args.baseline}:", file=sys.stderr)
+            for line in regressions:
+                print(f"   {line}", file=sys.stderr)
+            return 1
+        print(f"✅ No regressions against {args.baseline}", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -43,13 +43,7 @@ def demo_basic_usage():
         
         print("\n📡 Adding demo servers:")
         for server in demo_servers:
-            monitor.servers[server] = {
-                'status': None,
-                'last_check': None,
-                'response_time': 0,
-                'failures': 0,
-                'last_failure_email': None
-            }
+            monitor.add_server_entry(server)
             print(f"   • {server}")
         
         # Test ping functionality
@@ -124,7 +118,7 @@ def test_smtp_connection():
         }
         
         # Create test message
-        msg = MimeMultipart()
+        msg = MIMEMultipart()
         msg['From'] = config['from_email']
         msg['To'] = config['to_email']
         msg['Subject'] = "Server Monitor - Demo Test Email"
@@ -140,9 +134,9 @@ Configuration Test Results:
 - Test Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 If you received this email, your SMTP configuration is working correctly!
-                 """.strip()
-         
-         msg.attach(MIMEText(body, 'plain'))
+        """.strip()
+        
+        msg.attach(MIMEText(body, 'plain'))
         
         # Send test email
         server = smtplib.SMTP(config['server'], config['port'])
@@ -188,18 +182,11 @@ def demo_monitoring_simulation():
         
         print("Adding demo servers to monitor:")
         for server in demo_servers:
-            monitor.servers[server] = {
-                'status': None,
-                'last_check': None,
-                'response_time': 0,
-                'failures': 0,
-                'last_failure_email': None
-            }
+            monitor.add_server_entry(server)
             
             # Add to GUI
-            monitor.tree.insert('', tk.END, iid=server, values=(
-                server, 'Unknown', 'Never', '-', '0'
-            ))
+            monitor.index.add(server)
+            monitor.table.render()
             print(f"   • {server}")
         
         monitor.log_message("Demo servers added - ready for monitoring")
@@ -229,14 +216,10 @@ def demo_command_line_monitoring():
     print("=" * 40)
     
     try:
-        import tkinter as tk
-        from server_monitor import ServerMonitor
-        
-        # Create hidden root window for backend functionality
-        root = tk.Tk()
-        root.withdraw()
+        from monitor_engine import MonitorEngine
         
-        monitor = ServerMonitor(root)
+        # The engine has no GUI dependencies
+        monitor = MonitorEngine()
         
         # Test servers
         test_servers = ["8.8.8.8", "1.1.1.1", "127.0.0.1"]
@@ -250,16 +233,18 @@ def demo_command_line_monitoring():
         
         # Simulate monitoring loop
         print("\n🔄 Simulating monitoring loop (10 seconds)...")
+        for server in test_servers:
+            monitor.add_server_entry(server)
+        
         for i in range(3):
             print(f"   Check {i+1}/3:")
-            for server in test_servers:
-                is_reachable, response_time = monitor.ping_server(server)
-                status = "UP" if is_reachable else "DOWN"
+            monitor.run_cycle()
+            for server, data in monitor.servers.items():
+                status = "UP" if data['status'] else "DOWN"
                 print(f"     {server}: {status}")
             time.sleep(3)
         
         print("✅ Command-line monitoring demo completed!")
-        root.destroy()
         
     except Exception as e:
         print(f"❌ Error during command-line demo: {e}")
@@ -302,7 +287,7 @@ def show_system_info():
     # Check email libraries
     try:
         import smtplib
-        from email.mime.text import MimeText
+        from email.mime.text import MIMEText
         print("✅ Email libraries available")
     except ImportError:
         print("❌ Email libraries not available - notifications disabled")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Fleet Aggregates
+Incrementally maintained counters and RTT statistics for the whole fleet.
+
+Every status update adjusts at most four buckets (state totals and the
+server's group), so summaries, dashboards and exporters can read fleet-wide
+numbers in O(1) instead of scanning every server.
+
+Example:
+    aggregates = FleetAggregates()
+    aggregates.add("10.0.1.10", group="web")
+    aggregates.update("10.0.1.10", True, 12)
+    aggregates.counts()             # {'online': 1, 'offline': 0, 'unknown': 0}
+    aggregates.rtt_stats('online')  # {'count': 1, 'mean': 12.0, 'stdev': 0.0}
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+STATES = ('online', 'offline', 'unknown')
+
+
+def state_name(status: Optional[bool]) -> str:
+    """Map a server status (True/False/None) to its state name."""
+    if status is None:
+        return 'unknown'
+    return 'online' if status else 'offline'
+
+
+class _Bucket:
+    """Server count plus RTT sum and sum of squares for one state."""
+
+    __slots__ = ('count', 'rtt_count', 'rtt_sum', 'rtt_sq_sum')
+
+    def __init__(self):
+        self.count = 0
+        # Response times are integer milliseconds, so the sums stay exact
+        # no matter how many values are added and removed
+        self.rtt_count = 0
+        self.rtt_sum = 0
+        self.rtt_sq_sum = 0
+
+    def add(self, rtt: int, sign: int = 1):
+        self.count += sign
+        if rtt > 0:
+            self.rtt_count += sign
+            self.rtt_sum += sign * rtt
+            self.rtt_sq_sum += sign * rtt * rtt
+
+    def stats(self) -> Dict[str, float]:
+        if not self.rtt_count:
+            return {'count': 0, 'mean': 0.0, 'stdev': 0.0}
+        mean = self.rtt_sum / self.rtt_count
+        variance = max(0.0, self.rtt_sq_sum / self.rtt_count - mean * mean)
+        return {'count': self.rtt_count, 'mean': mean, 'stdev': math.sqrt(variance)}
+
+
+class FleetAggregates:
+    """Per-state and per-group server counts and RTT statistics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # server -> (group, state, rtt) as currently counted
+        self._servers: Dict[str, Tuple[Optional[str], str, int]] = {}
+        self._totals = {state: _Bucket() for state in STATES}
+        self._groups: Dict[str, Dict[str, _Bucket]] = {}
+
+    def _buckets(self, group: Optional[str], state: str) -> List[_Bucket]:
+        buckets = [self._totals[state]]
+        if group is not None:
+            if group not in self._groups:
+                self._groups[group] = {name: _Bucket() for name in STATES}
+            buckets.append(self._groups[group][state])
+        return buckets
+
+    def _count(self, server: str, group: Optional[str], state: str, rtt: int):
+        for bucket in self._buckets(group, state):
+            bucket.add(rtt)
+        self._servers[server] = (group, state, rtt)
+
+    def _uncount(self, server: str) -> Optional[Tuple[Optional[str], str, int]]:
+        entry = self._servers.pop(server, None)
+        if entry is not None:
+            group, state, rtt = entry
+            for bucket in self._buckets(group, state):
+                bucket.add(rtt, -1)
+        return entry
+
+    def add(self, server: str, status: Optional[bool] = None, response_time: int = 0,
+            group: Optional[str] = None):
+        """Start counting a server, replacing any previous entry."""
+        with self._lock:
+            self._uncount(server)
+            self._count(server, group, state_name(status), response_time)
+
+    def remove(self, server: str):
+        """Stop counting a server."""
+        with self._lock:
+            self._uncount(server)
+
+    def clear(self):
+        """Forget all servers and groups."""
+        with self._lock:
+            self._servers.clear()
+            self._totals = {state: _Bucket() for state in STATES}
+            self._groups.clear()
+
+    def update(self, server: str, status: Optional[bool], response_time: int):
+        """Move a server to its new state and RTT after a probe; ignores servers not counted."""
+        with self._lock:
+            entry = self._uncount(server)
+            if entry is not None:
+                self._count(server, entry[0], state_name(status), response_time)
+
+    def set_groups(self, groups: Dict[str, Iterable[str]]):
+        """Replace all group assignments from a {group: [servers]} mapping."""
+        membership = {server: group for group, servers in groups.items() for server in servers}
+        with self._lock:
+            for server, (group, state, rtt) in list(self._servers.items()):
+                if membership.get(server) != group:
+                    self._uncount(server)
+                    self._count(server, membership.get(server), state, rtt)
+            self._groups = {name: buckets for name, buckets in self._groups.items()
+                            if any(bucket.count for bucket in buckets.values())}
+
+    def counts(self, group: Optional[str] = None) -> Dict[str, int]:
+        """Return {'online', 'offline', 'unknown'} counts for the fleet or one group."""
+        with self._lock:
+            buckets = self._totals if group is None else self._groups.get(group)
+            if buckets is None:
+                return {state: 0 for state in STATES}
+            return {state: buckets[state].count for state in STATES}
+
+    def rtt_stats(self, state: str = 'online', group: Optional[str] = None) -> Dict[str, float]:
+        """Return count, mean and standard deviation of current RTTs in a state."""
+        with self._lock:
+            buckets = self._totals if group is None else self._groups.get(group)
+            if buckets is None:
+                return _Bucket().stats()
+            return buckets[state].stats()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return all counts and RTT statistics as plain dictionaries."""
+        with self._lock:
+            def describe(buckets: Dict[str, _Bucket]) -> Dict[str, object]:
+                return {state: {'servers': buckets[state].count, 'rtt': buckets[state].stats()}
+                        for state in STATES}
+
+            return {
+                'total': len(self._servers),
+                'states': describe(self._totals),
+                'groups': {name: describe(buckets) for name, buckets in sorted(self._groups.items())
+                           if any(bucket.count for bucket in buckets.values())}
+            }
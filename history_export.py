@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Server Monitor History Export
+Streams probe history from the SQLite state store to CSV or Parquet.
+
+History is read and written in chunks, so memory use stays bounded no
+matter how long the time range or how large the fleet is. Parquet output
+needs the optional pyarrow package; each chunk becomes one row group.
+
+Usage:
+    python history_export.py --db monitor.db --since 2024-01-01 --until 2024-02-01 \\
+        --output january.csv
+    python history_export.py --since 7d --servers 10.0.1.10,10.0.1.11 \\
+        --format parquet --output last-week.parquet
+    python history_export.py --since 24h --output - | gzip > last-day.csv.gz
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import re
+import sys
+import csv
+import time
+import sqlite3
+import argparse
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from state_store import iter_history
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 50000
+
+CSV_HEADER = ['timestamp', 'time_utc', 'host', 'reachable', 'response_time_ms']
+
+RELATIVE_TIME = re.compile(r'^(\d+)([smhd])$')
+RELATIVE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_time(value: str, now: Optional[float] = None) -> float:
+    """
+    Parse a Unix timestamp, an ISO date/time or a relative age such as '24h' or '7d'.
+
+    ISO values without a timezone are interpreted as local time.
+    """
+    value = value.strip()
+    match = RELATIVE_TIME.match(value)
+    if match:
+        amount, unit = match.groups()
+        return (now if now is not None else time.time()) - int(amount) * RELATIVE_UNITS[unit]
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _utc(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec='milliseconds')
+
+
+def export_csv(db_path: str, output, hosts: Optional[Iterable[str]] = None,
+               since: Optional[float] = None, until: Optional[float] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Write history rows to an open text file; returns the number of rows."""
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+
+    count = 0
+    for chunk in iter_history(db_path, hosts, since, until, chunk_size):
+        writer.writerows((ts, _utc(ts), host, reachable, response_time)
+                         for ts, host, reachable, response_time in chunk)
+        count += len(chunk)
+    return count
+
+
+def export_parquet(db_path: str, path: str, hosts: Optional[Iterable[str]] = None,
+                   since: Optional[float] = None, until: Optional[float] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Write history rows to a Parquet file, one row group per chunk; returns the number of rows."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ('timestamp', pa.timestamp('ms', tz='UTC')),
+        ('host', pa.string()),
+        ('reachable', pa.bool_()),
+        ('response_time_ms', pa.int32()),
+    ])
+
+    count = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for chunk in iter_history(db_path, hosts, since, until, chunk_size):
+            timestamps, names, reachable, response_times = zip(*chunk)
+            table = pa.Table.from_arrays([
+                pa.array([int(ts * 1000) for ts in timestamps], pa.timestamp('ms', tz='UTC')),
+                pa.array(names, pa.string()),
+                pa.array([bool(value) for value in reachable], pa.bool_()),
+                pa.array(response_times, pa.int32()),
+            ], schema=schema)
+            writer.write_table(table)
+            count += len(chunk)
+    return count
+
+
+def export_history(db_path: str, output: str, fmt: str = 'csv',
+                   hosts: Optional[Iterable[str]] = None, since: Optional[float] = None,
+                   until: Optional[float] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Export probe history from a state store database to a file ('-' for stdout with CSV).
+
+    Returns:
+        Number of rows written
+    """
+    if fmt == 'parquet':
+        if output == '-':
+            raise ValueError("Parquet output needs a file name")
+        return export_parquet(db_path, output, hosts, since, until, chunk_size)
+
+    if output == '-':
+        return export_csv(db_path, sys.stdout, hosts, since, until, chunk_size)
+
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        return export_csv(db_path, f, hosts, since, until, chunk_size)
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Export probe history from the state store")
+    parser.add_argument('--db', default=os.getenv('SERVER_MONITOR_DB', ''),
+                        help="State store database (default: SERVER_MONITOR_DB)")
+    parser.add_argument('--output', '-o', required=True, help="Output file, or '-' for CSV on stdout")
+    parser.add_argument('--format', choices=['csv', 'parquet'],
+                        help="Output format (default: from the output file extension, else csv)")
+    parser.add_argument('--since', help="Start time: Unix time, ISO date/time or age like 24h, 7d")
+    parser.add_argument('--until', help="End time (exclusive), same formats as --since")
+    parser.add_argument('--servers', help="Comma-separated servers to export (default: all)")
+    parser.add_argument('--servers-file', help="File with one server per line to export")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows held in memory at a time (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if not args.db:
+        parser.error("no database given; use --db or set SERVER_MONITOR_DB")
+    if not os.path.exists(args.db):
+        parser.error(f"database not found: {args.db}")
+
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+
+    try:
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+    except ValueError as e:
+        parser.error(f"invalid time: {e}")
+
+    hosts = None
+    if args.servers or args.servers_file:
+        hosts = {server.strip() for server in (args.servers or '').split(',') if server.strip()}
+        if args.servers_file:
+            with open(args.servers_file, 'r') as f:
+                hosts.update(line.strip() for line in f if line.strip() and not line.startswith('#'))
+
+    started = time.monotonic()
+    try:
+        count = export_history(args.db, args.output, fmt, hosts, since, until, args.chunk_size)
+    except (RuntimeError, ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    print(f"✅ Exported {count} rows to {args.output} in {time.monotonic() - started:.1f}s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
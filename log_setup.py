@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Logging Setup
+Non-blocking, structured logging shared by all front-ends.
+
+Loggers only put records on an in-memory queue; a background listener
+thread does the file and terminal I/O. The log file gets one JSON object
+per line and is rotated by size. Identical warnings (for example the same
+"Ping failed" for a dead host every cycle) are logged once per interval,
+and the next occurrence after the interval reports how many were dropped.
+
+Example:
+    from log_setup import configure_logging
+
+    configure_logging('server_monitor.log')
+
+    $ tail -1 server_monitor.log
+    {"ts": "2024-01-01T12:00:00.123", "level": "WARNING", "logger": "monitor_engine",
+     "thread": "Thread-1", "message": "Ping failed for 10.0.1.10: timed out"}
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_REPEAT_INTERVAL = 300.0
+
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        repeated = getattr(record, 'repeated', 0)
+        if repeated:
+            entry['repeated'] = repeated
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry)
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Drops repeats of identical warnings within an interval.
+
+    Records are identical when logger, level and formatted message match.
+    The first occurrence after the interval is let through with the number
+    of dropped repeats in record.repeated.
+    """
+
+    def __init__(self, interval: float = DEFAULT_REPEAT_INTERVAL,
+                 min_level: int = logging.WARNING, max_keys: int = 10000):
+        super().__init__()
+        self.interval = interval
+        self.min_level = min_level
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._seen: 'OrderedDict[tuple, list]' = OrderedDict()  # key -> [last logged, dropped]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level:
+            return True
+
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.interval:
+                entry[1] += 1
+                return False
+
+            dropped = entry[1] if entry is not None else 0
+            self._seen[key] = [now, 0]
+            self._seen.move_to_end(key)
+            while len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+
+        if dropped:
+            record.repeated = dropped
+            record.msg = f"{record.getMessage()} (repeated {dropped} times)"
+            record.args = None
+        return True
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """QueueHandler that keeps message and traceback separate for the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(log_file: Optional[str] = None, level: int = logging.INFO,
+                      console: bool = True, stream=None,
+                      max_bytes: int = DEFAULT_MAX_BYTES,
+                      backup_count: int = DEFAULT_BACKUP_COUNT,
+                      repeat_interval: float = DEFAULT_REPEAT_INTERVAL) -> QueueListener:
+    """
+    Route all logging through a queue to a background listener.
+
+    Args:
+        log_file: JSON lines log file, rotated at max_bytes (None for no file)
+        level: Root log level
+        console: Also write human readable lines to stream (default stderr)
+        repeat_interval: Seconds during which identical warnings are dropped
+
+    Returns:
+        The running listener; calling again returns the existing one
+    """
+    global _listener
+
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        handlers = []
+        if log_file:
+            file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                               backupCount=backup_count, encoding='utf-8')
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler(stream or sys.stderr)
+            console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            handlers.append(console_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _StructuredQueueHandler(log_queue)
+        queue_handler.addFilter(RepeatFilter(repeat_interval))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
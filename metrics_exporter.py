@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Metrics Exporter
+Serves monitoring results in the Prometheus text exposition format.
+
+The exposition text is rendered once at the end of every probe cycle and
+kept as a ready-to-send bytes buffer, so scrapes never touch monitor state
+and cost the same no matter how often they happen.
+
+Enable it by setting SERVER_MONITOR_METRICS to a port or host:port:
+
+    export SERVER_MONITOR_METRICS=127.0.0.1:9105
+    curl http://127.0.0.1:9105/metrics
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import time
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the response time histogram buckets, in milliseconds
+RTT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _ServerSeries:
+    """Cumulative per-server counters and RTT histogram."""
+
+    __slots__ = ('buckets', 'rtt_sum', 'rtt_count', 'probes_ok', 'probes_failed',
+                 'alerts_sent', 'alerts_failed')
+
+    def __init__(self):
+        self.buckets = [0] * (len(RTT_BUCKETS_MS) + 1)  # last slot is +Inf
+        self.rtt_sum = 0
+        self.rtt_count = 0
+        self.probes_ok = 0
+        self.probes_failed = 0
+        self.alerts_sent = 0
+        self.alerts_failed = 0
+
+    def observe(self, is_reachable: bool, response_time: int):
+        if not is_reachable:
+            self.probes_failed += 1
+            return
+
+        self.probes_ok += 1
+        self.rtt_sum += response_time
+        self.rtt_count += 1
+        for i, bound in enumerate(RTT_BUCKETS_MS):
+            if response_time <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the exporter's cached exposition buffer."""
+
+    exporter: 'PrometheusExporter' = None
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+
+        payload = self.exporter.payload
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics request from {self.address_string()}: {format % args}")
+
+
+class PrometheusExporter:
+    """Collects probe results and serves them on /metrics."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9105):
+        self.host = host
+        self.port = port
+        self.series: Dict[str, _ServerSeries] = {}
+        self.cycles = 0
+        self.payload = b''
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Collection (monitor thread)
+    # ------------------------------------------------------------------
+
+    def _series(self, server: str) -> _ServerSeries:
+        series = self.series.get(server)
+        if series is None:
+            series = self.series[server] = _ServerSeries()
+        return series
+
+    def alert_sent(self, server: str):
+        """Count a sent failure alert."""
+        self._series(server).alerts_sent += 1
+
+    def alert_failed(self, server: str):
+        """Count a failure alert that could not be sent."""
+        self._series(server).alerts_failed += 1
+
+    def publish(self, engine, cycle_records: List[tuple]):
+        """Fold one cycle's results into the counters and re-render the buffer."""
+        for server, ts, is_reachable, response_time, failures, last_email in cycle_records:
+            self._series(server).observe(is_reachable, response_time)
+
+        # Drop series of servers that are no longer monitored
+        for server in [server for server in self.series if server not in engine.servers]:
+            del self.series[server]
+
+        self.cycles += 1
+        self.payload = self.render(engine).encode('utf-8')
+
+    def render(self, engine) -> str:
+        """Build the exposition text for the current state."""
+        lines = []
+
+        def header(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        # One snapshot for every section: the GUI thread may add or remove
+        # servers while the monitor thread renders
+        servers = list(engine.servers.items())
+        labels: Dict[str, str] = {}
+        for server, _ in servers:
+            group = engine.server_groups.get(server)
+            label = f'server="{escape_label(server)}"'
+            if group is not None:
+                label += f',group="{escape_label(group)}"'
+            labels[server] = label
+
+        header('server_monitor_up', 'gauge', "Whether the last probe succeeded (1) or failed (0).")
+        for server, data in servers:
+            if data['status'] is not None:
+                lines.append(f"server_monitor_up{{{labels[server]}}} {int(data['status'])}")
+
+        header('server_monitor_consecutive_failures', 'gauge', "Current streak of failed probes.")
+        for server, data in servers:
+            lines.append(f"server_monitor_consecutive_failures{{{labels[server]}}} {data['failures']}")
+
+        header('server_monitor_last_check_timestamp_seconds', 'gauge', "Time of the last probe.")
+        for server, data in servers:
+            if data['last_check'] is not None:
+                lines.append(f"server_monitor_last_check_timestamp_seconds{{{labels[server]}}} "
+                             f"{data['last_check'].timestamp():.3f}")
+
+        # Counters of servers added or removed since the snapshot are left out
+        series_items = [(server, series) for server, series in list(self.series.items()) if server in labels]
+
+        header('server_monitor_probes_total', 'counter', "Probes by result.")
+        for server, series in series_items:
+            lines.append(f'server_monitor_probes_total{{{labels[server]},result="success"}} {series.probes_ok}')
+            lines.append(f'server_monitor_probes_total{{{labels[server]},result="failure"}} {series.probes_failed}')
+
+        header('server_monitor_response_time_ms', 'histogram', "Response time of successful probes in milliseconds.")
+        for server, series in series_items:
+            cumulative = 0
+            for bound, count in zip(RTT_BUCKETS_MS, series.buckets):
+                cumulative += count
+                lines.append(f'server_monitor_response_time_ms_bucket{{{labels[server]},le="{bound}"}} {cumulative}')
+            lines.append(f'server_monitor_response_time_ms_bucket{{{labels[server]},le="+Inf"}} {series.rtt_count}')
+            lines.append(f"server_monitor_response_time_ms_sum{{{labels[server]}}} {series.rtt_sum}")
+            lines.append(f"server_monitor_response_time_ms_count{{{labels[server]}}} {series.rtt_count}")
+
+        header('server_monitor_alerts_total', 'counter', "Failure alert emails by result.")
+        for server, series in series_items:
+            if series.alerts_sent or series.alerts_failed:
+                lines.append(f'server_monitor_alerts_total{{{labels[server]},result="sent"}} {series.alerts_sent}')
+                lines.append(f'server_monitor_alerts_total{{{labels[server]},result="failed"}} {series.alerts_failed}')
+
+        header('server_monitor_servers', 'gauge', "Monitored servers by state.")
+        for state, count in engine.aggregates.counts().items():
+            lines.append(f'server_monitor_servers{{state="{state}"}} {count}')
+
+        self._render_self_metrics(engine.instrumentation_snapshot(), header, lines)
+        if engine.aggregator:
+            self._render_agent_metrics(engine.aggregator.status(), header, lines)
+
+        header('server_monitor_cycles_total', 'counter', "Completed probe cycles.")
+        lines.append(f"server_monitor_cycles_total {self.cycles}")
+
+        header('server_monitor_last_cycle_timestamp_seconds', 'gauge', "Time the last probe cycle completed.")
+        lines.append(f"server_monitor_last_cycle_timestamp_seconds {time.time():.3f}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_self_metrics(snapshot: Dict[str, object], header, lines: List[str]):
+        """Add the monitor's own timings, resource usage and queue depths."""
+        durations = (
+            ('cycle_seconds', "Wall time of probe cycles."),
+            ('scheduler_lag_seconds', "How late cycles started compared to their scheduled wake time."),
+            ('probe_seconds', "Time spent inside the prober per probe."),
+            ('probe_overhead_seconds', "Monitor overhead per probe outside the prober and alerts."),
+            ('alert_seconds', "Time taken to send an alert email."),
+        )
+        for key, help_text in durations:
+            stat = snapshot[key]
+            name = f"server_monitor_self_{key}"
+            header(name, 'gauge', f"{help_text} (last, avg and max)")
+            for kind in ('last', 'avg', 'max'):
+                lines.append(f'{name}{{stat="{kind}"}} {stat[kind]:.6f}')
+
+        header('server_monitor_self_cpu_percent', 'gauge', "CPU usage of the monitor process during the last cycle.")
+        lines.append(f"server_monitor_self_cpu_percent {snapshot['cpu_percent']:.2f}")
+
+        header('server_monitor_self_resident_memory_bytes', 'gauge', "Resident memory of the monitor process.")
+        lines.append(f"server_monitor_self_resident_memory_bytes {snapshot['rss_bytes']}")
+
+        header('server_monitor_self_queue_depth', 'gauge', "Items waiting in front-end queues.")
+        for queue, depth in snapshot['queues'].items():
+            lines.append(f'server_monitor_self_queue_depth{{queue="{escape_label(queue)}"}} {depth}')
+
+    @staticmethod
+    def _render_agent_metrics(status: Dict[str, object], header, lines: List[str]):
+        """Add probe agent counts, the quorum and verdict counters in agent mode."""
+        header('server_monitor_agents', 'gauge', "Probe agents by state.")
+        lines.append(f'server_monitor_agents{{state="connected"}} {len(status["connected"])}')
+        lines.append(f'server_monitor_agents{{state="voting"}} {len(status["voting"])}')
+        lines.append(f'server_monitor_agents{{state="known"}} {status["known"]}')
+
+        header('server_monitor_agent_quorum', 'gauge', "Failed votes needed to declare a server down.")
+        lines.append(f"server_monitor_agent_quorum {status['quorum']}")
+
+        header('server_monitor_agent_quorum_reachable', 'gauge',
+               "Whether enough agents are voting to reach the quorum (1) or not (0).")
+        lines.append(f"server_monitor_agent_quorum_reachable {int(status['quorum_reachable'])}")
+
+        header('server_monitor_agent_verdicts_total', 'counter', "Verdicts that needed agents to agree, by outcome.")
+        lines.append(f'server_monitor_agent_verdicts_total{{outcome="split"}} {status["split_verdicts"]}')
+        lines.append(f'server_monitor_agent_verdicts_total{{outcome="no_quorum"}} {status["no_quorum"]}')
+
+    # ------------------------------------------------------------------
+    # HTTP endpoint
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start serving /metrics in a background thread."""
+        handler = type('MetricsHandler', (_MetricsHandler,), {'exporter': self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics exporter listening on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        """Stop the HTTP endpoint."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def parse_address(value: str, default_host: str = '127.0.0.1') -> Tuple[str, int]:
+    """Parse 'port' or 'host:port' into (host, port)."""
+    host, _, port = value.rpartition(':')
+    return host or default_host, int(port)
+
+
+def open_metrics_exporter(address: Optional[str] = None) -> Optional[PrometheusExporter]:
+    """Start the exporter configured by SERVER_MONITOR_METRICS, or return None."""
+    address = (address or os.getenv('SERVER_MONITOR_METRICS', '')).strip()
+    if not address:
+        return None
+
+    try:
+        host, port = parse_address(address)
+        exporter = PrometheusExporter(host, port)
+        exporter.start()
+        return exporter
+    except (ValueError, OSError) as e:
+        logger.error(f"Failed to start metrics exporter on {address}: {e}")
+        return None
@@ -0,0 +1,884 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Engine
+UI-free monitoring core shared by the GUI, the console version, the demo
+script and daemons.
+
+This module must not import tkinter, so it can run on minimal server images.
+Front-ends subclass MonitorEngine and override the on_* hooks to present
+status changes, alerts and cycle summaries.
+
+Example:
+    from monitor_engine import MonitorEngine, load_env_file
+
+    load_env_file()
+    engine = MonitorEngine()
+    engine.add_server_entry("10.0.1.10")
+    engine.run_cycle()
+    print(engine.servers["10.0.1.10"])
+
+Modules only needed for some probes, for alerts or for optional
+components (smtplib, email, subprocess, socket, http, sqlite3) are
+imported on first use, so short-lived commands start quickly.
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+import logging
+import json
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from fleet_stats import FleetAggregates
+from self_metrics import MonitorInstrumentation
+from cycle_profiler import CycleProfiler
+
+logger = logging.getLogger(__name__)
+
+# Fields that must be set for email alerts to be sent
+REQUIRED_SMTP_FIELDS = ['smtp_username', 'smtp_password', 'smtp_from', 'smtp_to']
+
+# Seconds between deletions of probe history past the store's retention
+HISTORY_PRUNE_INTERVAL = 3600
+
+# State store setting holding the config file's mtime at its last import
+CONFIG_MTIME_SETTING = 'config_file_mtime'
+
+# Environment switches that make an engine open real resources
+MONITOR_ENV_VARS = ('SERVER_MONITOR_DB', 'SERVER_MONITOR_METRICS', 'SERVER_MONITOR_API',
+                    'SERVER_MONITOR_WORKERS', 'SERVER_MONITOR_AGGREGATOR')
+
+
+@contextmanager
+def without_monitor_env() -> Iterator[None]:
+    """Hide the MONITOR_ENV_VARS so engines created inside open no real resources."""
+    saved = {name: os.environ.pop(name) for name in MONITOR_ENV_VARS if name in os.environ}
+    try:
+        yield
+    finally:
+        os.environ.update(saved)
+
+
+def load_env_file(env_file: str = '.env'):
+    """Load environment variables from .env file if it exists."""
+    if os.path.exists(env_file):
+        with open(env_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    os.environ[key.strip()] = value.strip()
+
+
+def load_smtp_config() -> Dict[str, str]:
+    """Load SMTP configuration from environment variables."""
+    return {
+        'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+        'smtp_port': int(os.getenv('SMTP_PORT', '587')),
+        'smtp_username': os.getenv('SMTP_USERNAME', ''),
+        'smtp_password': os.getenv('SMTP_PASSWORD', ''),
+        'smtp_from': os.getenv('SMTP_FROM', ''),
+        'smtp_to': os.getenv('SMTP_TO', ''),
+        'smtp_use_tls': os.getenv('SMTP_USE_TLS', 'true').lower() == 'true',
+        'smtp_timeout': float(os.getenv('SMTP_TIMEOUT', '30'))
+    }
+
+
+def ping_server(server: str) -> Tuple[bool, int]:
+    """
+    Ping a server and return (is_reachable, response_time_ms).
+
+    Args:
+        server: IP address or hostname to ping
+
+    Returns:
+        Tuple of (is_reachable: bool, response_time: int)
+    """
+    import platform
+    import subprocess
+
+    try:
+        # Determine ping command based on platform
+        if platform.system().lower() == "windows":
+            cmd = ["ping", "-n", "1", "-w", "3000", server]
+        else:
+            cmd = ["ping", "-c", "1", "-W", "3", server]
+
+        start_time = time.time()
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
+        end_time = time.time()
+
+        if result.returncode == 0:
+            response_time = int((end_time - start_time) * 1000)
+            return True, response_time
+        else:
+            return False, 0
+
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError) as e:
+        logger.warning(f"Ping failed for {server}: {e}")
+        return False, 0
+
+
+def probe_timeout() -> float:
+    """Timeout in seconds of TCP, HTTP and UDP probes (SERVER_MONITOR_PROBE_TIMEOUT)."""
+    try:
+        return float(os.getenv('SERVER_MONITOR_PROBE_TIMEOUT', '3'))
+    except ValueError:
+        return 3.0
+
+
+def split_host_port(target: str) -> Optional[Tuple[str, int]]:
+    """Split 'host:port' or '[v6addr]:port'; returns None for a bare host or IPv6 address."""
+    if target.startswith('['):
+        host, _, port = target[1:].partition(']:')
+    elif target.count(':') == 1:
+        host, _, port = target.partition(':')
+    else:
+        return None
+    return (host, int(port)) if host and port.isdigit() else None
+
+
+def tcp_probe(host: str, port: int, timeout: Optional[float] = None) -> Tuple[bool, int]:
+    """Open a TCP connection and return (is_reachable, connect_time_ms)."""
+    import socket
+
+    start_time = time.monotonic()
+    try:
+        with socket.create_connection((host, port), timeout=timeout or probe_timeout()):
+            return True, int((time.monotonic() - start_time) * 1000)
+    except OSError as e:
+        logger.warning(f"TCP probe failed for {host}:{port}: {e}")
+        return False, 0
+
+
+def http_probe(url: str, timeout: Optional[float] = None) -> Tuple[bool, int]:
+    """GET a URL and return (is_reachable, response_time_ms); any status below 500 counts as up."""
+    import http.client
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=timeout or probe_timeout())
+
+    start_time = time.monotonic()
+    try:
+        connection.request('GET', parts.path or '/', headers={'User-Agent': 'server-monitor'})
+        response = connection.getresponse()
+        response.read()
+        if response.status >= 500:
+            logger.warning(f"HTTP probe of {url} returned {response.status}")
+            return False, 0
+        return True, int((time.monotonic() - start_time) * 1000)
+    except (OSError, http.client.HTTPException) as e:
+        logger.warning(f"HTTP probe failed for {url}: {e}")
+        return False, 0
+    finally:
+        connection.close()
+
+
+def udp_probe(host: str, port: int, timeout: Optional[float] = None) -> Tuple[bool, int]:
+    """Send a datagram to an echo-style responder and return (is_reachable, round_trip_ms)."""
+    import socket
+
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    start_time = time.monotonic()
+    try:
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout or probe_timeout())
+            sock.connect((host, port))
+            sock.send(b'server-monitor probe')
+            sock.recv(512)
+            return True, int((time.monotonic() - start_time) * 1000)
+    except OSError as e:
+        logger.warning(f"UDP probe failed for {host}:{port}: {e}")
+        return False, 0
+
+
+def probe_server(target: str) -> Tuple[bool, int]:
+    """
+    Probe a server by the kind of target given.
+
+    - 'host' pings with ICMP
+    - 'host:port' opens a TCP connection
+    - 'http://host[:port]/path' and 'https://...' issue a GET request
+    - 'udp://host:port' expects a reply to a datagram
+
+    Returns:
+        Tuple of (is_reachable: bool, response_time: int)
+    """
+    if target.startswith(('http://', 'https://')):
+        return http_probe(target)
+
+    if target.startswith('udp://'):
+        address = split_host_port(target[len('udp://'):])
+        if address is None:
+            logger.warning(f"Invalid UDP target {target}: expected udp://host:port")
+            return False, 0
+        return udp_probe(*address)
+
+    address = split_host_port(target)
+    if address is not None:
+        return tcp_probe(*address)
+    return ping_server(target)
+
+
+def new_server_data() -> Dict:
+    """Return the initial state of a newly added server."""
+    return {
+        'status': None,
+        'last_check': None,
+        'response_time': 0,
+        'failures': 0,
+        'last_failure_email': None
+    }
+
+
+class MonitorEngine:
+    """Server monitoring core: probing, failure tracking, alerts and persistence."""
+
+    # Name used in email subjects and footers
+    app_name = "Server Availability Monitor"
+
+    def __init__(self, config_file: str = 'servers.json',
+                 prober: Optional[Callable[[str], Tuple[bool, int]]] = None):
+        self.monitoring = False
+        self.monitor_thread = None
+        self.servers = {}  # {ip: {'status': bool, 'last_check': datetime, 'failures': int}}
+        self.check_interval = 30  # seconds
+        self.max_failures = 3  # Send email after this many consecutive failures
+
+        self.config_file = config_file
+        self.prober = prober or probe_server
+
+        # Source of check and alert timestamps; replay swaps in a simulated clock
+        self.clock: Callable[[], datetime] = datetime.now
+
+        # Fleet-wide counts and RTT statistics, kept in step with self.servers;
+        # optional server groups come from the "groups" key of the config file
+        self.aggregates = FleetAggregates()
+        self.server_groups: Dict[str, str] = {}
+
+        # SMTP configuration from environment variables
+        self.smtp_config = self.load_smtp_config()
+
+        # Optional components are only imported when configured
+
+        # Optional SQLite backend (SERVER_MONITOR_DB) replacing the JSON file
+        self.state_store = None
+        if os.getenv('SERVER_MONITOR_DB', '').strip():
+            from state_store import open_state_store
+            self.state_store = open_state_store()
+
+        # Optional Prometheus endpoint (SERVER_MONITOR_METRICS)
+        self.metrics = None
+        if os.getenv('SERVER_MONITOR_METRICS', '').strip():
+            from metrics_exporter import open_metrics_exporter
+            self.metrics = open_metrics_exporter()
+
+        # Optional read-only JSON API (SERVER_MONITOR_API)
+        self.status_api = None
+        if os.getenv('SERVER_MONITOR_API', '').strip():
+            from status_api import open_status_api
+            self.status_api = open_status_api()
+
+        # Cycle timings, probe overhead, alert latency, CPU and RSS
+        self.instrumentation = MonitorInstrumentation()
+
+        # Optional probe worker processes (SERVER_MONITOR_WORKERS); started
+        # on the first cycle
+        self.shard_pool = None
+        if os.getenv('SERVER_MONITOR_WORKERS', '').strip():
+            from shard_pool import open_shard_pool
+            self.shard_pool = open_shard_pool(self.prober, observe_probes=self.instrumentation.observe_probes)
+
+        # Optional agent mode (SERVER_MONITOR_AGGREGATOR): probe agents send
+        # their results and servers are down only by a quorum of agents
+        self.aggregator = None
+        if os.getenv('SERVER_MONITOR_AGGREGATOR', '').strip():
+            from quorum_aggregator import open_aggregator
+            self.aggregator = open_aggregator(observe_probes=self.instrumentation.observe_probes)
+
+        # On-demand cProfile/tracemalloc of the next N cycles
+        self.profiler = CycleProfiler()
+
+        # Live reload: request_reload() from any thread or signal handler,
+        # or watch_config to reload when the config file changes
+        self.watch_config = False
+        self._reload_requested = False
+        self._config_mtime: Optional[float] = None
+        # mtime of the config file when it was last imported into the state store
+        self._imported_config_mtime: Optional[float] = None
+        self._config_import_pending = False
+
+        # Monotonic time of the next probe history retention run
+        self._next_history_prune = 0.0
+
+    # ------------------------------------------------------------------
+    # Hooks for front-ends
+    # ------------------------------------------------------------------
+
+    def on_status_update(self, server: str, prev_status: Optional[bool]):
+        """Called after a server's data was updated from a probe."""
+
+    def on_transition(self, server: str, is_reachable: bool):
+        """Called when a server went offline or came back online."""
+
+    def on_cycle_start(self):
+        """Called before each monitoring cycle."""
+
+    def on_cycle_complete(self, cycle_records: List[tuple]):
+        """Called after each monitoring cycle has been recorded."""
+
+    def on_alert_sent(self, server: str):
+        """Called after a failure email was sent."""
+
+    def on_alert_failed(self, server: str, error: Exception):
+        """Called when sending a failure email failed."""
+
+    def on_profile_written(self, paths: List[str]):
+        """Called when a requested profile has been written to disk."""
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Return the sizes of front-end queues for self-instrumentation."""
+        return {}
+
+    def on_config_reloaded(self, added: List[str], removed: List[str],
+                           changed: Dict[str, Tuple[object, object]]):
+        """Called after a live reload applied a non-empty configuration diff."""
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+
+    def load_smtp_config(self) -> Dict[str, str]:
+        """Load SMTP configuration from environment variables."""
+        return load_smtp_config()
+
+    def is_smtp_configured(self) -> bool:
+        """Check if SMTP is properly configured."""
+        return all(self.smtp_config.get(field) for field in REQUIRED_SMTP_FIELDS)
+
+    def get_settings(self) -> Dict[str, object]:
+        """Return the settings persisted alongside the server list."""
+        return {
+            'check_interval': self.check_interval,
+            'max_failures': self.max_failures
+        }
+
+    def apply_settings(self, data: Dict):
+        """Apply settings loaded from the server list file or state store."""
+        self.check_interval = int(data.get('check_interval', 30))
+        self.max_failures = int(data.get('max_failures', 3))
+
+    # ------------------------------------------------------------------
+    # Server list
+    # ------------------------------------------------------------------
+
+    def add_server_entry(self, server: str) -> bool:
+        """Start tracking a server; return False if it is already monitored."""
+        if server in self.servers:
+            return False
+
+        self.servers[server] = new_server_data()
+        self.aggregates.add(server, group=self.server_groups.get(server))
+        return True
+
+    def remove_server_entry(self, server: str) -> bool:
+        """Stop tracking a server; return False if it was not monitored."""
+        self.aggregates.remove(server)
+        return self.servers.pop(server, None) is not None
+
+    def clear_server_entries(self):
+        """Stop tracking all servers."""
+        self.servers.clear()
+        self.aggregates.clear()
+
+    def set_server_groups(self, groups: Dict[str, List[str]]):
+        """Assign servers to groups from a {group: [servers]} mapping."""
+        self.server_groups = {server: group for group, servers in groups.items() for server in servers}
+        self.aggregates.set_groups(groups)
+
+    def get_server_groups(self) -> Dict[str, List[str]]:
+        """Return the group assignments as a {group: [servers]} mapping."""
+        groups: Dict[str, List[str]] = {}
+        for server, group in self.server_groups.items():
+            groups.setdefault(group, []).append(server)
+        return groups
+
+    def persisted_inventory(self) -> Tuple[List[str], Dict[str, object]]:
+        """Return the servers and settings that save_servers() writes."""
+        return list(self.servers.keys()), self.get_settings()
+
+    def save_servers(self):
+        """Save server list to the state store, or to the JSON config file without one."""
+        servers, settings = self.persisted_inventory()
+
+        try:
+            if self.state_store:
+                if self._imported_config_mtime is not None:
+                    settings[CONFIG_MTIME_SETTING] = self._imported_config_mtime
+                # Settings values are text, so the mapping is stored as JSON
+                settings['groups'] = json.dumps(self.get_server_groups())
+                self.state_store.save_inventory(servers, settings)
+                self._config_import_pending = False
+                return
+
+            servers_data = {'servers': servers, **settings}
+            if self.server_groups:
+                servers_data['groups'] = self.get_server_groups()
+
+            with open(self.config_file, 'w') as f:
+                json.dump(servers_data, f, indent=2)
+        except Exception as e:
+            logger.error(f"Failed to save servers: {e}")
+
+    def load_servers(self) -> int:
+        """
+        Load the server list chosen by read_config_file().
+
+        Returns:
+            Number of servers loaded
+        """
+        try:
+            data = self.read_config_file()
+            saved_state = self.state_store.load_state() if self.state_store else {}
+
+            self.apply_settings(data)
+
+            self.server_groups = {server: group for group, servers in data.get('groups', {}).items()
+                                  for server in servers}
+
+            for server in data.get('servers', []):
+                self.servers[server] = saved_state.get(server, new_server_data())
+                state = self.servers[server]
+                self.aggregates.add(server, state['status'], state['response_time'],
+                                    self.server_groups.get(server))
+
+            if self.state_store and self._config_import_pending:
+                self.save_servers()
+        except Exception as e:
+            logger.error(f"Failed to load servers: {e}")
+
+        return len(self.servers)
+
+    def read_config_file(self) -> Dict:
+        """
+        Read the configuration; startup and reload both use this precedence.
+
+        Without a state store the JSON config file is the configuration.
+        With one, the store wins, so servers added in the UI survive
+        restarts and reloads. The file wins only when the store has no
+        servers yet or the file was modified after its last import; it is
+        then imported into the store by the next save_servers().
+        """
+        try:
+            mtime = os.stat(self.config_file).st_mtime
+        except OSError:
+            mtime = None
+
+        if self.state_store:
+            servers, settings = self.state_store.load_inventory()
+            imported = settings.pop(CONFIG_MTIME_SETTING, None)
+            groups = json.loads(settings.pop('groups', '{}'))
+            if imported is not None:
+                self._imported_config_mtime = float(imported)
+            elif servers and self._imported_config_mtime is None:
+                # Store written before import times were recorded: keep it and
+                # let later edits of the file win
+                self._imported_config_mtime = mtime
+
+            file_is_newer = mtime is not None and (self._imported_config_mtime is None or
+                                                   mtime > self._imported_config_mtime)
+            if servers and not file_is_newer:
+                return {'servers': servers, 'groups': groups, **settings}
+
+        if mtime is None:
+            return {}
+
+        with open(self.config_file, 'r') as f:
+            data = json.load(f)
+        if self.state_store:
+            self._imported_config_mtime = mtime
+            self._config_import_pending = True
+        return data
+
+    def request_reload(self):
+        """Ask the monitor loop to reload the configuration at its next safe point."""
+        self._reload_requested = True
+
+    def check_reload(self):
+        """Reload the configuration if requested or if the watched config file changed."""
+        if self.watch_config:
+            try:
+                mtime = os.stat(self.config_file).st_mtime
+            except OSError:
+                mtime = None
+            if self._config_mtime is None:
+                self._config_mtime = mtime
+            elif mtime != self._config_mtime:
+                self._config_mtime = mtime
+                self._reload_requested = True
+
+        if self._reload_requested:
+            self._reload_requested = False
+            self.reload_config()
+
+    def reload_config(self) -> Optional[Tuple[List[str], List[str], Dict[str, Tuple[object, object]]]]:
+        """
+        Re-read the configuration and apply only what changed.
+
+        Servers that are still configured keep their status, failure counts
+        and alert state; new servers are probed from the next cycle on.
+
+        Returns:
+            (added, removed, changed settings as {key: (old, new)}), or None
+            if the configuration could not be read
+        """
+        try:
+            data = self.read_config_file()
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to reload configuration: {e}")
+            return None
+
+        before = self.get_settings()
+        self.apply_settings(data)
+        changed = {key: (before.get(key), value)
+                   for key, value in self.get_settings().items() if before.get(key) != value}
+
+        groups = data.get('groups', {})
+        if groups != self.get_server_groups():
+            changed['groups'] = (self.get_server_groups(), groups)
+            self.set_server_groups(groups)
+
+        wanted = dict.fromkeys(server.strip() for server in data.get('servers', []) if server.strip())
+        added = [server for server in wanted if server not in self.servers]
+        removed = [server for server in self.servers if server not in wanted]
+
+        for server in removed:
+            self.remove_server_entry(server)
+        for server in added:
+            self.add_server_entry(server)
+
+        if self.state_store and (added or removed or self._config_import_pending):
+            self.save_servers()
+
+        if added or removed or changed:
+            logger.info(f"Configuration reloaded: {len(added)} added, {len(removed)} removed, "
+                        f"settings changed: {', '.join(changed) or 'none'}")
+            self.on_config_reloaded(added, removed, changed)
+
+        return added, removed, changed
+
+    def record_cycle(self, cycle_records: List[tuple]):
+        """Write the probe results of one cycle to the state store, if enabled."""
+        if not self.state_store:
+            return
+
+        import sqlite3
+
+        try:
+            self.state_store.record_cycle(cycle_records)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record probe results: {e}")
+
+    def prune_history(self):
+        """Apply the state store's history retention, at most once per HISTORY_PRUNE_INTERVAL."""
+        if not self.state_store or time.monotonic() < self._next_history_prune:
+            return
+        self._next_history_prune = time.monotonic() + HISTORY_PRUNE_INTERVAL
+
+        import sqlite3
+
+        try:
+            deleted = self.state_store.prune_expired_history()
+            if deleted:
+                logger.info(f"Pruned {deleted} probe history rows older than "
+                            f"{self.state_store.history_days:g} days")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to prune probe history: {e}")
+
+    def instrumentation_snapshot(self) -> Dict[str, object]:
+        """Return the monitor's own timings, resource usage and queue depths."""
+        return self.instrumentation.snapshot(self.queue_depths())
+
+    def close_metrics_exporter(self):
+        """Stop the metrics endpoint, if enabled."""
+        if self.metrics:
+            self.metrics.stop()
+            self.metrics = None
+
+    def close_status_api(self):
+        """Stop the JSON status API, if enabled."""
+        if self.status_api:
+            self.status_api.stop()
+            self.status_api = None
+
+    def close_aggregator(self):
+        """Disconnect probe agents and stop listening, if enabled."""
+        if self.aggregator:
+            self.aggregator.stop()
+            self.aggregator = None
+
+    def close_shard_pool(self):
+        """Stop the probe worker processes, if enabled."""
+        if self.shard_pool:
+            self.shard_pool.stop()
+            self.shard_pool = None
+
+    def close_state_store(self):
+        """Checkpoint and close the state store, if enabled."""
+        if self.state_store:
+            self.state_store.close()
+            self.state_store = None
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the monitoring thread."""
+        self.monitoring = True
+        self.instrumentation.reset_schedule()
+        self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
+        self.monitor_thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop monitoring, optionally waiting for the current cycle to finish."""
+        self.monitoring = False
+        if timeout and self.monitor_thread and self.monitor_thread.is_alive():
+            self.monitor_thread.join(timeout=timeout)
+
+    def monitor_loop(self):
+        """Main monitoring loop running in separate thread."""
+        while self.monitoring:
+            self.check_reload()
+            self.run_cycle(interruptible=True)
+            finished = time.monotonic()
+            self.prune_history()
+
+            # Wait for next check interval; a reload may change it meanwhile
+            while self.monitoring:
+                wake_at = finished + self.check_interval
+                self.instrumentation.schedule_next(wake_at)
+                remaining = wake_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(1.0, remaining))
+                self.check_reload()
+
+    def run_cycle(self, interruptible: bool = False) -> List[tuple]:
+        """
+        Probe every server once and record the results.
+
+        Args:
+            interruptible: Stop early when monitoring is switched off
+        """
+        self.profiler.cycle_started()
+        cycle_started = self.instrumentation.cycle_started()
+        self.on_cycle_start()
+        cycle_records = []
+        # Time spent waiting on probes and alerts, as opposed to monitor overhead
+        external_seconds = 0.0
+
+        servers = list(self.servers.keys())
+        should_continue = (lambda: self.monitoring) if interruptible else None
+        if self.aggregator:
+            results = self.aggregator.verdicts(servers, self.check_interval, should_continue)
+        elif self.shard_pool:
+            results = self.shard_pool.probe(servers, should_continue)
+        else:
+            results = self.probe_servers(servers, should_continue)
+
+        for server, is_reachable, response_time, probe_seconds in results:
+            external_seconds += probe_seconds
+
+            applied = time.monotonic()
+            record = self.apply_result(server, is_reachable, response_time)
+            if record is None:
+                continue
+            if not is_reachable:
+                # Failures may send an alert, which is not monitor overhead
+                external_seconds += time.monotonic() - applied
+            cycle_records.append(record)
+
+        # Persist the whole cycle in one transaction
+        self.record_cycle(cycle_records)
+        self.instrumentation.cycle_finished(cycle_started, len(cycle_records), external_seconds)
+
+        # Render the /metrics buffer once per cycle
+        if self.metrics:
+            self.metrics.publish(self, cycle_records)
+
+        # Swap in a new snapshot for API readers
+        if self.status_api:
+            self.status_api.publish(self)
+        self.on_cycle_complete(cycle_records)
+
+        profile_paths = self.profiler.cycle_finished()
+        if profile_paths:
+            self.on_profile_written(profile_paths)
+
+        return cycle_records
+
+    def apply_result(self, server: str, is_reachable: bool, response_time: int) -> Optional[tuple]:
+        """
+        Apply one probe result: update the server's status and handle a failure.
+
+        Returns:
+            The cycle record (server, ts, is_reachable, response_time,
+            failures, last_failure_email), or None if the server was
+            removed while it was being probed
+        """
+        if server not in self.servers:
+            return None
+
+        self.update_server_status(server, is_reachable, response_time)
+
+        # Check for failures and send email if needed
+        if not is_reachable:
+            self.handle_server_failure(server)
+
+        server_data = self.servers[server]
+        return (server, server_data['last_check'].timestamp(), is_reachable,
+                response_time, server_data['failures'], server_data['last_failure_email'])
+
+    def probe_servers(self, servers: List[str],
+                      should_continue: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[str, bool, int, float]]:
+        """
+        Probe servers one after another in this thread.
+
+        Yields:
+            (server, is_reachable, response_time, probe_seconds); stops
+            early when should_continue() returns False
+        """
+        for server in servers:
+            if should_continue and not should_continue():
+                return
+
+            probe_started = time.monotonic()
+            is_reachable, response_time = self.ping_server(server)
+            probe_seconds = time.monotonic() - probe_started
+            self.instrumentation.observe_probe(probe_seconds)
+            yield server, is_reachable, response_time, probe_seconds
+
+    def ping_server(self, server: str) -> Tuple[bool, int]:
+        """Probe a server and return (is_reachable, response_time_ms)."""
+        return self.prober(server)
+
+    def update_server_status(self, server: str, is_reachable: bool, response_time: int):
+        """Update server data after a probe."""
+        current_time = self.clock()
+
+        # Update server data
+        server_data = self.servers[server]
+        prev_status = server_data['status']
+        server_data['status'] = is_reachable
+        server_data['last_check'] = current_time
+        server_data['response_time'] = response_time
+        self.aggregates.update(server, is_reachable, response_time)
+
+        if is_reachable:
+            # Reset failure count on successful ping
+            server_data['failures'] = 0
+        else:
+            # Increment failure count
+            server_data['failures'] += 1
+
+        self.on_status_update(server, prev_status)
+
+        if prev_status is not None and prev_status != is_reachable:
+            self.on_transition(server, is_reachable)
+
+    # ------------------------------------------------------------------
+    # Alerts
+    # ------------------------------------------------------------------
+
+    def handle_server_failure(self, server: str):
+        """Handle server failure and send email if needed."""
+        server_data = self.servers[server]
+
+        # Send email after max_failures consecutive failures
+        if (server_data['failures'] >= self.max_failures and
+            self.is_smtp_configured() and
+            server_data['last_failure_email'] != server_data['failures']):
+
+            self.send_failure_email(server, server_data['failures'])
+            server_data['last_failure_email'] = server_data['failures']
+
+    def _send_email(self, subject: str, body: str):
+        """Send a plain text email using the SMTP configuration."""
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
+        msg = MIMEMultipart()
+        msg['From'] = self.smtp_config['smtp_from']
+        msg['To'] = self.smtp_config['smtp_to']
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+
+        # A stalled relay must not hold up the monitor loop indefinitely; the
+        # connection is closed even when login or sending fails
+        with smtplib.SMTP(self.smtp_config['smtp_server'], self.smtp_config['smtp_port'],
+                          timeout=self.smtp_config.get('smtp_timeout', 30)) as server_smtp:
+            if self.smtp_config['smtp_use_tls']:
+                server_smtp.starttls()
+
+            server_smtp.login(self.smtp_config['smtp_username'], self.smtp_config['smtp_password'])
+            server_smtp.send_message(msg)
+
+    def send_failure_email(self, server: str, failure_count: int) -> bool:
+        """Send email notification for server failure."""
+        body = f"""
+Server Monitoring Alert
+
+Server: {server}
+Status: UNREACHABLE
+Consecutive Failures: {failure_count}
+Time: {self.clock().strftime("%Y-%m-%d %H:%M:%S")}
+
+Please investigate the server connectivity issue.
+
+---
+This is an automated message from {self.app_name}.
+        """.strip()
+
+        send_started = time.monotonic()
+        try:
+            self._send_email(f"Server Alert: {server} is unreachable", body)
+        except Exception as e:
+            self.instrumentation.observe_alert(time.monotonic() - send_started)
+            logger.error(f"Failed to send email for {server}: {e}")
+            if self.metrics:
+                self.metrics.alert_failed(server)
+            self.on_alert_failed(server, e)
+            return False
+
+        self.instrumentation.observe_alert(time.monotonic() - send_started)
+        if self.metrics:
+            self.metrics.alert_sent(server)
+        self.on_alert_sent(server)
+        return True
+
+    def send_test_email(self):
+        """Send a test message; raises on failure."""
+        body = f"""
+This is a test email from {self.app_name}.
+
+Configuration:
+- SMTP Server: {self.smtp_config['smtp_server']}:{self.smtp_config['smtp_port']}
+- From: {self.smtp_config['smtp_from']}
+- To: {self.smtp_config['smtp_to']}
+- TLS: {self.smtp_config['smtp_use_tls']}
+
+Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+
+If you received this email, the SMTP configuration is working correctly.
+        """.strip()
+
+        self._send_email(f"{self.app_name} - Test Email", body)
@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Network Simulator
+Loopback stand-in for a fleet, for end-to-end load tests without network access.
+
+Every simulated host gets its own loopback address (127.x.y.z; on Linux the
+whole 127.0.0.0/8 block reaches the loopback interface without aliases)
+and, per host:
+
+- a TCP listener that also answers HTTP GET requests
+- a UDP responder that echoes datagrams back
+
+Each host follows a scripted schedule:
+
+- latency: base delay plus uniform jitter before HTTP and UDP replies
+- loss: probability that an HTTP request is answered by closing the
+  connection, or that a datagram gets no reply
+- outages: [start, end] windows in seconds since the simulator started
+- flaps: down for flap_down seconds at the end of every flap_period
+
+A host that is down closes its listener and UDP socket, so TCP connects
+are refused and UDP probes get a port unreachable, like a host whose
+service stopped. Latency and loss cannot apply to plain TCP connects
+because the kernel completes the handshake; use HTTP or UDP targets for those.
+
+Each host holds one socket per protocol. For large fleets run only the
+protocol being probed (--protocols tcp) and make sure the open file hard
+limit covers the listeners plus in-flight connections.
+
+Usage:
+    python net_simulator.py --hosts 5000 --loss 0.01 --flap-fraction 0.02 \\
+        --outage-fraction 0.01 --outage 60:180 --write-config servers_sim.json
+    SERVER_MONITOR_PROBE_TIMEOUT=0.5 python server_monitor_daemon.py \\
+        --config servers_sim.json --interval 10
+
+Per-host schedules can be scripted in a JSON file given with --script:
+
+    {
+      "defaults": {"latency_ms": 2, "jitter_ms": 1},
+      "hosts": {
+        "127.1.0.3": {"outages": [[30, 90]]},
+        "127.1.0.4": {"flap_period": 20, "flap_down": 5, "loss": 0.2}
+      }
+    }
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+import ipaddress
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_ADDRESS = '127.1.0.1'
+DEFAULT_TCP_PORT = 8080
+DEFAULT_UDP_PORT = 9999
+
+# How often host schedules are re-evaluated, in seconds
+SCHEDULE_TICK = 0.1
+
+# File descriptors kept free for accepted connections on top of the listeners
+CONNECTION_HEADROOM = 4096
+
+TARGET_KINDS = ('http', 'tcp', 'udp')
+
+HTTP_RESPONSE = (b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+                 b"Content-Length: 3\r\nConnection: close\r\n\r\nOK\n")
+
+
+class Schedule:
+    """Scripted behaviour of one simulated host."""
+
+    __slots__ = ('latency_ms', 'jitter_ms', 'loss', 'outages', 'flap_period', 'flap_down', 'flap_offset')
+
+    def __init__(self, latency_ms: float = 1.0, jitter_ms: float = 0.0, loss: float = 0.0,
+                 outages: Iterable[Tuple[float, float]] = (), flap_period: float = 0.0,
+                 flap_down: float = 0.0, flap_offset: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.loss = loss
+        self.outages = [(float(start), float(end)) for start, end in outages]
+        self.flap_period = flap_period
+        self.flap_down = flap_down
+        self.flap_offset = flap_offset
+
+    @classmethod
+    def from_dict(cls, data: Dict, defaults: Optional[Dict] = None) -> 'Schedule':
+        """Build a schedule from script entries, falling back to `defaults`."""
+        merged = {**(defaults or {}), **data}
+        unknown = set(merged) - set(cls.__slots__)
+        if unknown:
+            raise ValueError(f"unknown schedule keys: {', '.join(sorted(unknown))}")
+        return cls(**merged)
+
+    def is_up(self, elapsed: float) -> bool:
+        """Whether the host answers at `elapsed` seconds since the simulator started."""
+        for start, end in self.outages:
+            if start <= elapsed < end:
+                return False
+
+        if self.flap_period > 0 and self.flap_down > 0:
+            phase = (elapsed + self.flap_offset) % self.flap_period
+            if phase >= self.flap_period - self.flap_down:
+                return False
+        return True
+
+    def delay(self, rng: random.Random) -> float:
+        """Reply delay in seconds."""
+        jitter = rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+    def drops(self, rng: random.Random) -> bool:
+        """Whether this request or datagram is lost."""
+        return self.loss > 0 and rng.random() < self.loss
+
+
+def loopback_addresses(count: int, base: str = DEFAULT_BASE_ADDRESS) -> List[str]:
+    """Return `count` consecutive 127.x.y.z addresses, skipping .0 and .255."""
+    address = ipaddress.IPv4Address(base)
+    loopback = ipaddress.IPv4Network('127.0.0.0/8')
+
+    addresses = []
+    while len(addresses) < count:
+        if address not in loopback:
+            raise ValueError(f"ran out of loopback addresses after {len(addresses)} hosts")
+        if address.packed[-1] not in (0, 255):
+            addresses.append(str(address))
+        address += 1
+    return addresses
+
+
+def raise_file_limit(needed: int):
+    """Raise the soft open file limit towards `needed`, up to the hard limit."""
+    if resource is None:
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        if target < needed:
+            logger.warning(f"Open file limit {target} is below the {needed} sockets needed; "
+                           f"raise the hard limit (ulimit -Hn)")
+
+
+class _EchoProtocol(asyncio.DatagramProtocol):
+    """UDP responder of one host: echoes datagrams after the scheduled delay."""
+
+    def __init__(self, simulator: 'NetworkSimulator', schedule: Schedule):
+        self.simulator = simulator
+        self.schedule = schedule
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        stats = self.simulator.stats
+        stats['udp_datagrams'] += 1
+        if self.schedule.drops(self.simulator.rng):
+            stats['udp_dropped'] += 1
+            return
+        self.simulator.loop.call_later(self.schedule.delay(self.simulator.rng), self._reply, data, addr)
+
+    def _reply(self, data: bytes, addr):
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(data, addr)
+
+
+class NetworkSimulator:
+    """
+    Loopback responders for many simulated hosts, driven by their schedules.
+
+    Use start()/stop() to run the event loop in a background thread, or
+    run() to block until interrupted.
+    """
+
+    def __init__(self, schedules: Dict[str, Schedule], tcp_port: int = DEFAULT_TCP_PORT,
+                 udp_port: int = DEFAULT_UDP_PORT, protocols: Iterable[str] = ('tcp', 'udp'),
+                 seed: int = 0):
+        self.schedules = schedules
+        self.tcp_port = tcp_port
+        self.udp_port = udp_port
+        self.protocols = set(protocols)
+        self.rng = random.Random(seed)
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.started_at = 0.0
+        self.up: Dict[str, bool] = {}
+        self.stats = {'http_requests': 0, 'http_dropped': 0, 'tcp_connections': 0,
+                      'udp_datagrams': 0, 'udp_dropped': 0, 'transitions': 0, 'bring_up_errors': 0}
+
+        self._tcp_servers: Dict[str, asyncio.AbstractServer] = {}
+        self._udp_transports: Dict[str, asyncio.DatagramTransport] = {}
+        # Hosts whose last bring-up failed
+        self._failed: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopping: Optional[asyncio.Event] = None
+
+    # ------------------------------------------------------------------
+    # Targets for the monitor
+    # ------------------------------------------------------------------
+
+    def targets(self, kind: str = 'http') -> List[str]:
+        """Return the monitor targets of all hosts for one probe kind."""
+        if kind == 'http':
+            return [f"http://{host}:{self.tcp_port}/" for host in self.schedules]
+        if kind == 'tcp':
+            return [f"{host}:{self.tcp_port}" for host in self.schedules]
+        if kind == 'udp':
+            return [f"udp://{host}:{self.udp_port}" for host in self.schedules]
+        raise ValueError(f"unknown target kind: {kind}")
+
+    def elapsed(self) -> float:
+        """Seconds since the simulator started; schedule times are relative to this."""
+        return time.monotonic() - self.started_at
+
+    # ------------------------------------------------------------------
+    # Responders
+    # ------------------------------------------------------------------
+
+    async def _handle_tcp(self, host: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats['tcp_connections'] += 1
+        try:
+            await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            # Plain TCP connect probes hang up without sending a request
+            writer.close()
+            return
+
+        self.stats['http_requests'] += 1
+        schedule = self.schedules[host]
+        try:
+            await asyncio.sleep(schedule.delay(self.rng))
+            if schedule.drops(self.rng) or not self.up.get(host):
+                self.stats['http_dropped'] += 1
+                return
+            writer.write(HTTP_RESPONSE)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _bring_up(self, host: str):
+        if 'tcp' in self.protocols:
+            self._tcp_servers[host] = await asyncio.start_server(
+                lambda reader, writer: self._handle_tcp(host, reader, writer),
+                host, self.tcp_port, reuse_address=True, backlog=128)
+        if 'udp' in self.protocols:
+            transport, _ = await self.loop.create_datagram_endpoint(
+                lambda: _EchoProtocol(self, self.schedules[host]), local_addr=(host, self.udp_port))
+            self._udp_transports[host] = transport
+
+    def _bring_down(self, host: str):
+        server = self._tcp_servers.pop(host, None)
+        if server is not None:
+            server.close()
+        transport = self._udp_transports.pop(host, None)
+        if transport is not None:
+            transport.close()
+
+    async def _set_state(self, host: str, up: bool):
+        if self.up.get(host) == up:
+            return
+        known = host in self.up
+        self.up[host] = up
+        if up:
+            try:
+                await self._bring_up(host)
+            except OSError:
+                # Close whichever responder did bind and stay down
+                self._bring_down(host)
+                self.up[host] = False
+                raise
+        else:
+            self._bring_down(host)
+        if known:
+            self.stats['transitions'] += 1
+            logger.debug(f"{host} {'up' if up else 'down'} at {self.elapsed():.1f}s")
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self.started_at = time.monotonic()
+
+        try:
+            for host, schedule in self.schedules.items():
+                await self._set_state(host, schedule.is_up(0.0))
+        except OSError as e:
+            self.stats['error'] = str(e)
+            for host in list(self.up):
+                self._bring_down(host)
+            self._ready.set()
+            return
+        self._ready.set()
+
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=SCHEDULE_TICK)
+            except asyncio.TimeoutError:
+                pass
+            elapsed = self.elapsed()
+            for host, schedule in self.schedules.items():
+                try:
+                    await self._set_state(host, schedule.is_up(elapsed))
+                except OSError as e:
+                    # e.g. EMFILE or EADDRINUSE: the host stays down and is retried next tick
+                    self.stats['bring_up_errors'] += 1
+                    self.stats['last_error'] = f"{host}: {e}"
+                    if host not in self._failed:
+                        self._failed.add(host)
+                        logger.warning(f"Failed to bring up {host}, retrying: {e}")
+                    continue
+                if host in self._failed and self.up[host]:
+                    self._failed.discard(host)
+                    logger.info(f"{host} is up after failing to bind")
+
+        for host in list(self.up):
+            self._bring_down(host)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self, timeout: float = 60.0):
+        """Bring up all responders in a background thread; returns once they listen."""
+        raise_file_limit(len(self.schedules) * len(self.protocols) + CONNECTION_HEADROOM)
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),), daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout) or 'error' in self.stats:
+            raise OSError(f"Network simulator failed to start: {self.stats.get('error', 'timed out')}")
+        logger.info(f"Network simulator serving {len(self.schedules)} hosts")
+
+    def stop(self, timeout: float = 10.0):
+        """Close all responders and stop the event loop."""
+        if self.loop is not None and self._stopping is not None:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self, report_interval: float = 10.0):
+        """Serve until interrupted, printing statistics every report_interval seconds."""
+        self.start()
+        try:
+            while True:
+                time.sleep(report_interval)
+                down = sum(1 for up in self.up.values() if not up)
+                print(f"[{self.elapsed():7.1f}s] down: {down}/{len(self.up)} | {self.stats}", file=sys.stderr)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+def build_schedules(hosts: List[str], defaults: Dict, flap_fraction: float = 0.0,
+                    flap_period: float = 60.0, flap_down: float = 20.0,
+                    outage_fraction: float = 0.0, outage: Tuple[float, float] = (60.0, 180.0),
+                    script: Optional[Dict] = None, seed: int = 0) -> Tuple[Dict[str, Schedule], Dict[str, List[str]]]:
+    """
+    Assign schedules to hosts.
+
+    Random fractions of the hosts flap or have an outage; entries in the
+    script override them per host.
+
+    Returns:
+        ({host: Schedule}, {scenario: [hosts]}) where the scenarios are
+        'steady', 'flapping', 'outage' and 'scripted'
+    """
+    rng = random.Random(seed)
+    script = script or {}
+    defaults = {**defaults, **script.get('defaults', {})}
+    scripted = script.get('hosts', {})
+
+    schedules: Dict[str, Schedule] = {}
+    scenarios: Dict[str, List[str]] = {'steady': [], 'flapping': [], 'outage': [], 'scripted': []}
+
+    for host in hosts:
+        if host in scripted:
+            schedules[host] = Schedule.from_dict(scripted[host], defaults)
+            scenarios['scripted'].append(host)
+            continue
+
+        draw = rng.random()
+        if draw < flap_fraction:
+            # Spread flaps over the period so they do not all happen at once
+            schedules[host] = Schedule.from_dict({'flap_period': flap_period, 'flap_down': flap_down,
+                                                  'flap_offset': rng.uniform(0, flap_period)}, defaults)
+            scenarios['flapping'].append(host)
+        elif draw < flap_fraction + outage_fraction:
+            schedules[host] = Schedule.from_dict({'outages': [outage]}, defaults)
+            scenarios['outage'].append(host)
+        else:
+            schedules[host] = Schedule.from_dict({}, defaults)
+            scenarios['steady'].append(host)
+
+    return schedules, scenarios
+
+
+def write_monitor_config(path: str, simulator: NetworkSimulator, scenarios: Dict[str, List[str]],
+                         kind: str = 'http', check_interval: int = 10, max_failures: int = 3):
+    """Write a monitor config file listing the simulated targets, grouped by scenario."""
+    targets = dict(zip(simulator.schedules, simulator.targets(kind)))
+    config = {
+        'servers': list(targets.values()),
+        'check_interval': check_interval,
+        'max_failures': max_failures,
+        'groups': {scenario: [targets[host] for host in hosts]
+                   for scenario, hosts in scenarios.items() if hosts}
+    }
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=2)
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Simulate a fleet of hosts on loopback addresses")
+    parser.add_argument('--hosts', type=int, default=100, help="Number of simulated hosts (default: %(default)s)")
+    parser.add_argument('--base', default=DEFAULT_BASE_ADDRESS,
+                        help="First loopback address (default: %(default)s)")
+    parser.add_argument('--tcp-port', type=int, default=DEFAULT_TCP_PORT,
+                        help="TCP/HTTP port on every host (default: %(default)s)")
+    parser.add_argument('--udp-port', type=int, default=DEFAULT_UDP_PORT,
+                        help="UDP echo port on every host (default: %(default)s)")
+    parser.add_argument('--protocols', default='tcp,udp', help="Responders to run (default: %(default)s)")
+    parser.add_argument('--latency-ms', type=float, default=1.0, help="Reply delay (default: %(default)s)")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Uniform jitter around the delay")
+    parser.add_argument('--loss', type=float, default=0.0, help="Probability of losing a request")
+    parser.add_argument('--flap-fraction', type=float, default=0.0, help="Fraction of hosts that flap")
+    parser.add_argument('--flap-period', type=float, default=60.0, help="Flap period in seconds")
+    parser.add_argument('--flap-down', type=float, default=20.0, help="Seconds down per flap period")
+    parser.add_argument('--outage-fraction', type=float, default=0.0,
+                        help="Fraction of hosts with one outage window")
+    parser.add_argument('--outage', default='60:180', help="Outage window START:END in seconds (default: %(default)s)")
+    parser.add_argument('--script', help="JSON file with per-host schedules")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: %(default)s)")
+    parser.add_argument('--write-config', help="Write a monitor config file listing the simulated targets")
+    parser.add_argument('--target', choices=TARGET_KINDS, default='http',
+                        help="Probe kind used in the written config (default: %(default)s)")
+    parser.add_argument('--interval', type=int, default=10, help="check_interval in the written config")
+    parser.add_argument('--verbose', '-v', action='store_true', help="Log every host transition")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    protocols = {protocol.strip() for protocol in args.protocols.split(',') if protocol.strip()}
+    if not protocols or not protocols <= {'tcp', 'udp'}:
+        parser.error("--protocols takes tcp, udp or tcp,udp")
+
+    try:
+        start, end = (float(value) for value in args.outage.split(':'))
+        hosts = loopback_addresses(args.hosts, args.base)
+        script = None
+        if args.script:
+            with open(args.script, 'r') as f:
+                script = json.load(f)
+        schedules, scenarios = build_schedules(
+            hosts, {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'loss': args.loss},
+            args.flap_fraction, args.flap_period, args.flap_down,
+            args.outage_fraction, (start, end), script, args.seed)
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+
+    simulator = NetworkSimulator(schedules, args.tcp_port, args.udp_port, protocols, args.seed)
+
+    if args.write_config:
+        write_monitor_config(args.write_config, simulator, scenarios, args.target, args.interval)
+        print(f"✅ Wrote {len(hosts)} {args.target} targets to {args.write_config}", file=sys.stderr)
+
+    print(f"🌐 Simulating {len(hosts)} hosts {hosts[0]} - {hosts[-1]} "
+          f"({', '.join(f'{name}: {len(members)}' for name, members in scenarios.items() if members)})",
+          file=sys.stderr)
+    try:
+        simulator.run()
+    except OSError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
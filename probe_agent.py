@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Probe Agent
+Probes servers from one vantage point, e.g. one availability zone, and
+streams the results to a central monitor running in agent mode
+(quorum_aggregator.py).
+
+The agent has no configuration of its own: after connecting it receives
+the server list and check interval from the aggregator, probes every
+server once per interval and sends the results back in compact batches.
+It reconnects with backoff when the aggregator goes away.
+
+Protocol: TCP; every message is a 4-byte big-endian length followed by
+compact JSON.
+
+    agent -> aggregator   {"type": "hello", "agent": "us-east-1a", "protocol": 2, "token": "..."}
+    aggregator -> agent   {"type": "config", "version": 3, "interval": 30, "servers": [...]}
+    agent -> aggregator   {"type": "results", "version": 3, "results": [i, v, i, v, ...],
+                           "probe_seconds": 1.25}
+    aggregator -> agent   {"type": "error", "message": "..."} before hanging up
+
+Results are (index into the servers of that config version, value) pairs;
+value is the response time in ms of a reachable server and -1 - response
+time of an unreachable one. probe_seconds is the time the batch's probes
+spent in the prober, for the monitor's self-instrumentation.
+
+The aggregator only accepts agents whose hello carries its shared token,
+SERVER_MONITOR_AGENT_TOKEN; set the same value on every agent, e.g. in
+the --env-file. The token is sent in clear text, so the aggregator should
+listen on a private address only.
+
+Usage:
+    python probe_agent.py --aggregator monitor.internal:9107 --name us-east-1a
+    python probe_agent.py --aggregator 127.0.0.1:9107 --name local-1 --threads 64
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import asyncio
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from monitor_engine import load_env_file, probe_server, split_host_port
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 2
+DEFAULT_AGGREGATOR_PORT = 9107
+DEFAULT_AGENT_THREADS = 32
+
+# An agent sends a batch when it has this many results, or when the
+# oldest unsent result is BATCH_INTERVAL seconds old
+BATCH_SIZE = 512
+BATCH_INTERVAL = 0.5
+
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+RECONNECT_MIN_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 30.0
+
+_HEADER = struct.Struct('!I')
+
+
+def encode_message(message: Dict) -> bytes:
+    """Frame a message for the wire."""
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(len(payload)) + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> Dict:
+    """Read one framed message; raises ValueError on malformed input."""
+    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError(f"message of {length} bytes exceeds the limit")
+    message = json.loads(await reader.readexactly(length))
+    if not isinstance(message, dict) or not isinstance(message.get('type'), str):
+        raise ValueError("message without a type")
+    return message
+
+
+def encode_result(is_reachable: bool, response_time: int) -> int:
+    """Pack a probe result into one integer."""
+    return response_time if is_reachable else -1 - response_time
+
+
+def decode_result(value: int) -> Tuple[bool, int]:
+    """Unpack a value made by encode_result into (is_reachable, response_time)."""
+    return (True, value) if value >= 0 else (False, -1 - value)
+
+
+class ProbeAgent:
+    """
+    Probes the aggregator's servers and streams results back to it.
+
+    Use start()/stop() to run in a background thread, or run() to block
+    until interrupted.
+    """
+
+    def __init__(self, host: str, port: int = DEFAULT_AGGREGATOR_PORT, name: str = 'agent',
+                 prober: Optional[Callable[[str], Tuple[bool, int]]] = None,
+                 threads: int = DEFAULT_AGENT_THREADS, token: str = ''):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.token = token
+        self.prober = prober or probe_server
+        self.threads = max(1, int(threads))
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.connected = False
+        self.stats = {'connections': 0, 'rounds': 0, 'probes': 0, 'batches': 0, 'bytes_sent': 0}
+
+        self._config: Optional[Dict] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopping: Optional[asyncio.Event] = None
+
+    # ------------------------------------------------------------------
+    # Probing
+    # ------------------------------------------------------------------
+
+    def _probe(self, server: str) -> Tuple[bool, int, float]:
+        started = time.monotonic()
+        try:
+            is_reachable, response_time = self.prober(server)
+        except Exception as e:
+            logger.warning(f"Probe of {server} failed: {e}")
+            is_reachable, response_time = False, 0
+        return is_reachable, response_time, time.monotonic() - started
+
+    async def _send(self, writer: asyncio.StreamWriter, message: Dict):
+        data = encode_message(message)
+        writer.write(data)
+        await writer.drain()
+        self.stats['bytes_sent'] += len(data)
+
+    async def _probe_round(self, config: Dict, writer: asyncio.StreamWriter):
+        """Probe every server of a config once, sending results as they complete."""
+        loop = asyncio.get_running_loop()
+        completed: asyncio.Queue = asyncio.Queue()
+        futures = []
+        for index, server in enumerate(config['servers']):
+            future = loop.run_in_executor(self._executor, self._probe, server)
+            future.add_done_callback(lambda future, index=index: completed.put_nowait((index, future)))
+            futures.append(future)
+
+        remaining = len(futures)
+        batch: List[int] = []
+        batch_probe_seconds = 0.0
+        batch_started = time.monotonic()
+        try:
+            while remaining:
+                try:
+                    index, future = await asyncio.wait_for(completed.get(), timeout=BATCH_INTERVAL)
+                    while True:
+                        is_reachable, response_time, probe_seconds = future.result()
+                        batch.append(index)
+                        batch.append(encode_result(is_reachable, response_time))
+                        batch_probe_seconds += probe_seconds
+                        remaining -= 1
+                        if len(batch) >= 2 * BATCH_SIZE:
+                            break
+                        index, future = completed.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    pass
+
+                if batch and (len(batch) >= 2 * BATCH_SIZE or not remaining or
+                              time.monotonic() - batch_started >= BATCH_INTERVAL):
+                    await self._send(writer, {'type': 'results', 'version': config['version'], 'results': batch,
+                                              'probe_seconds': round(batch_probe_seconds, 6)})
+                    self.stats['batches'] += 1
+                    self.stats['probes'] += len(batch) // 2
+                    batch = []
+                    batch_probe_seconds = 0.0
+                    batch_started = time.monotonic()
+        finally:
+            # Disconnected or stopping: drop probes that have not started
+            for future in futures:
+                future.cancel()
+
+    async def _probe_loop(self, writer: asyncio.StreamWriter, configured: asyncio.Event):
+        await configured.wait()
+        next_round = time.monotonic()
+        while True:
+            config = self._config
+            await self._probe_round(config, writer)
+            self.stats['rounds'] += 1
+
+            # A round that overran the interval is followed immediately
+            next_round = max(next_round + config['interval'], time.monotonic())
+            await asyncio.sleep(next_round - time.monotonic())
+
+    async def _read_messages(self, reader: asyncio.StreamReader, configured: asyncio.Event):
+        while True:
+            message = await read_message(reader)
+            if message['type'] == 'config':
+                self._config = {
+                    'version': int(message['version']),
+                    'interval': max(1.0, float(message['interval'])),
+                    'servers': [str(server) for server in message['servers']]
+                }
+                logger.info(f"Received {len(self._config['servers'])} servers, "
+                            f"interval {self._config['interval']:g}s (version {self._config['version']})")
+                configured.set()
+            elif message['type'] == 'error':
+                logger.error(f"Aggregator refused agent {self.name}: {message.get('message')}")
+                return
+
+    # ------------------------------------------------------------------
+    # Connection
+    # ------------------------------------------------------------------
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Run one connection until it fails, the aggregator hangs up or the agent stops."""
+        self.stats['connections'] += 1
+        self.connected = True
+        logger.info(f"Agent {self.name} connected to {self.host}:{self.port}")
+
+        configured = asyncio.Event()
+        tasks = [
+            asyncio.create_task(self._read_messages(reader, configured)),
+            asyncio.create_task(self._probe_loop(writer, configured)),
+            asyncio.create_task(self._stopping.wait())
+        ]
+        try:
+            await self._send(writer, {'type': 'hello', 'agent': self.name, 'protocol': PROTOCOL_VERSION,
+                                      'token': self.token})
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if isinstance(error, (asyncio.IncompleteReadError, ConnectionError)):
+                    logger.warning(f"Lost connection to aggregator {self.host}:{self.port}")
+                elif error is not None:
+                    logger.error(f"Agent session failed: {error}")
+        except ConnectionError as e:
+            logger.warning(f"Lost connection to aggregator {self.host}:{self.port}: {e}")
+        finally:
+            self.connected = False
+            self._config = None
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='probe')
+        self._ready.set()
+
+        backoff = RECONNECT_MIN_SECONDS
+        try:
+            while not self._stopping.is_set():
+                try:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                except OSError as e:
+                    logger.warning(f"Cannot connect to aggregator {self.host}:{self.port}: {e}")
+                    backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+                else:
+                    backoff = RECONNECT_MIN_SECONDS
+                    await self._session(reader, writer)
+
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=backoff)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Connect and probe in a background thread."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),), daemon=True,
+                                        name=f"probe-agent-{self.name}")
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout: float = 10.0):
+        """Disconnect and stop the event loop."""
+        if self.loop is not None and self._stopping is not None:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self):
+        """Run until interrupted."""
+        try:
+            asyncio.run(self._main())
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Probe servers for a central monitor in agent mode")
+    parser.add_argument('--aggregator', required=True, metavar='HOST[:PORT]',
+                        help=f"Address of the monitor's aggregator (default port {DEFAULT_AGGREGATOR_PORT})")
+    parser.add_argument('--name', required=True,
+                        help="Unique agent name, e.g. the availability zone")
+    parser.add_argument('--threads', type=int, default=DEFAULT_AGENT_THREADS,
+                        help="Concurrent probes (default: %(default)s)")
+    parser.add_argument('--env-file', default='.env',
+                        help="File with environment variables, e.g. SERVER_MONITOR_AGENT_TOKEN "
+                             "and SERVER_MONITOR_PROBE_TIMEOUT")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="Log level (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    host, port = split_host_port(args.aggregator) or (args.aggregator.strip('[]'), DEFAULT_AGGREGATOR_PORT)
+    if not host:
+        parser.error(f"invalid --aggregator: {args.aggregator}")
+    if args.threads < 1:
+        parser.error("--threads must be at least 1")
+
+    from log_setup import configure_logging
+
+    configure_logging(level=getattr(logging, args.log_level), stream=sys.stderr)
+    load_env_file(args.env_file)
+
+    token = os.getenv('SERVER_MONITOR_AGENT_TOKEN', '').strip()
+    if not token:
+        logger.error("SERVER_MONITOR_AGENT_TOKEN is not set; the aggregator refuses agents without its token")
+        return 1
+
+    ProbeAgent(host, port, args.name, threads=args.threads, token=token).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Quorum Aggregator
+Central side of agent mode: probe agents (probe_agent.py) in several
+vantage points stream their results here, and a server is only declared
+down when a quorum of agents saw it fail.
+
+Enable with SERVER_MONITOR_AGGREGATOR=[host:]port or the daemon's
+--aggregator option, and set SERVER_MONITOR_AGENT_TOKEN to a secret shared
+with the agents: connections whose hello does not carry it are refused.
+Listen on a private or loopback address, as the token is not encrypted. The monitor then does not probe by itself: every
+cycle it applies one verdict per server with new votes, so failure
+counting, alerts, persistence and exporters work as with local probes.
+Agents receive the monitor's server list and check interval when they
+connect and whenever either changes.
+
+Each agent's latest vote per server counts while it is less than
+STALE_INTERVALS check intervals old. The verdict for a server is:
+- down when at least `quorum` agents saw it fail
+- up when at least one agent reached it and fewer than `quorum` saw it
+  fail; the response time is the lowest one reported
+- none otherwise, e.g. a failure seen by the only voting agent of two;
+  the server keeps its previous state
+
+The quorum (SERVER_MONITOR_QUORUM or --quorum) defaults to a majority of
+the agents that connected since the monitor started, so with one agent in
+each availability zone (us-east-1a and us-east-1b in main.tf) both must
+see a failure before anyone is paged. The quorum does not shrink when
+agents stop voting, so a dead or partitioned agent cannot let a single
+vantage point page anyone. Instead the loss of quorum is logged as an
+error and reported as quorum_reachable in status(), the agent metrics
+and the daemon's events.
+
+Usage:
+    python server_monitor_daemon.py --config servers_console.json --aggregator 10.0.1.10:9107
+    python probe_agent.py --aggregator monitor.internal:9107 --name us-east-1a
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import hmac
+import time
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from metrics_exporter import parse_address
+from probe_agent import PROTOCOL_VERSION, DEFAULT_AGGREGATOR_PORT, decode_result, encode_message, read_message
+
+logger = logging.getLogger(__name__)
+
+# Votes older than this many check intervals are ignored
+STALE_INTERVALS = 2.5
+
+# Config versions kept so results of a round started before a change still count
+CONFIG_VERSIONS_KEPT = 4
+
+HELLO_TIMEOUT = 10.0
+
+
+class QuorumAggregator:
+    """
+    TCP endpoint for probe agents that turns their votes into verdicts.
+
+    Agents are served by an asyncio loop in a background thread; the
+    monitor thread calls verdicts() once per cycle. The prober time agents
+    report for each batch is passed to observe_probes(seconds, count) when
+    given.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_AGGREGATOR_PORT,
+                 quorum: Optional[int] = None,
+                 observe_probes: Optional[Callable[[float, int], None]] = None, token: str = ''):
+        self.host = host
+        self.port = port
+        self.quorum = quorum
+        # Shared secret agents must send in their hello; no agent is accepted without one
+        self.token = token
+        self.observe_probes = observe_probes
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.agents: Dict[str, asyncio.StreamWriter] = {}
+        self.known_agents: Set[str] = set()
+        self.stats = {'connections': 0, 'batches': 0, 'votes': 0, 'stale_batches': 0,
+                      'rejected': 0, 'split_verdicts': 0, 'no_quorum': 0}
+
+        # Guards agents, votes and stats, which the loop and monitor threads share
+        self._lock = threading.Lock()
+        # {server: {agent: (received, encoded result)}}
+        self._votes: Dict[str, Dict[str, Tuple[float, int]]] = {}
+        # Time each agent last sent results, and the agents voting at the last verdict
+        self._last_votes: Dict[str, float] = {}
+        self._voting: Set[str] = set()
+        self._quorum_reachable: Optional[bool] = None
+        # Newest vote per server already turned into a verdict
+        self._applied: Dict[str, float] = {}
+        self._configs: Dict[int, List[str]] = {}
+        self._version = 0
+        self._servers: List[str] = []
+        self._interval = 0.0
+        self._config_message: Optional[bytes] = None
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopping: Optional[asyncio.Event] = None
+        self._error: Optional[str] = None
+
+    def _voting_agents(self, interval: float) -> Set[str]:
+        """Agents whose latest results are not stale; call with _lock held."""
+        if not interval:
+            return set(self._last_votes)
+        oldest = time.monotonic() - STALE_INTERVALS * interval
+        return {agent for agent, received in self._last_votes.items() if received >= oldest}
+
+    def _required_votes(self) -> int:
+        """Failed votes needed for a down verdict; call with _lock held."""
+        return self.quorum or len(self.known_agents) // 2 + 1
+
+    def required_votes(self) -> int:
+        """Failed votes needed for a down verdict."""
+        with self._lock:
+            return self._required_votes()
+
+    def status(self) -> Dict[str, object]:
+        """Connected and voting agents, quorum and vote counters."""
+        with self._lock:
+            voting = self._voting_agents(self._interval)
+            required = self._required_votes()
+            return {'connected': sorted(self.agents), 'known': len(self.known_agents),
+                    'voting': sorted(voting), 'quorum': required,
+                    'quorum_reachable': len(voting) >= required, **self.stats}
+
+    # ------------------------------------------------------------------
+    # Monitor side
+    # ------------------------------------------------------------------
+
+    def publish_config(self, servers: List[str], interval: float):
+        """Send the server list and interval to all agents if they changed."""
+        if servers == self._servers and interval == self._interval:
+            return
+
+        with self._lock:
+            self._version += 1
+            self._configs[self._version] = list(servers)
+            self._configs.pop(self._version - CONFIG_VERSIONS_KEPT, None)
+
+            # Forget votes of removed servers
+            current = set(servers)
+            for server in [server for server in self._votes if server not in current]:
+                del self._votes[server]
+                self._applied.pop(server, None)
+
+        self._servers = list(servers)
+        self._interval = interval
+        self._config_message = encode_message({'type': 'config', 'version': self._version,
+                                               'interval': interval, 'servers': self._servers})
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._broadcast_config)
+
+    def verdicts(self, servers: List[str], interval: float,
+                 should_continue: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[str, bool, int, float]]:
+        """
+        Quorum verdicts for servers with votes newer than their last verdict.
+
+        Yields:
+            (server, is_reachable, response_time, 0.0) in the shape of
+            MonitorEngine.probe_servers(); stops early when
+            should_continue() returns False
+        """
+        self.publish_config(servers, interval)
+
+        oldest = time.monotonic() - STALE_INTERVALS * interval
+        results = []
+        with self._lock:
+            voting = self._voting_agents(interval)
+            required = self._required_votes()
+            self._check_voting(voting, required)
+
+            for server in servers:
+                votes = self._votes.get(server)
+                if not votes:
+                    continue
+                newest = max(received for received, _ in votes.values())
+                if newest <= self._applied.get(server, 0.0):
+                    continue
+                self._applied[server] = newest
+
+                failed = 0
+                response_times = []
+                for received, value in votes.values():
+                    if received < oldest:
+                        continue
+                    is_reachable, response_time = decode_result(value)
+                    if is_reachable:
+                        response_times.append(response_time)
+                    else:
+                        failed += 1
+
+                if failed >= required:
+                    results.append((server, False, 0))
+                elif response_times:
+                    if failed:
+                        self.stats['split_verdicts'] += 1
+                    results.append((server, True, min(response_times)))
+                else:
+                    self.stats['no_quorum'] += 1
+
+        for server, is_reachable, response_time in results:
+            if should_continue and not should_continue():
+                return
+            yield server, is_reachable, response_time, 0.0
+
+    def _check_voting(self, voting: Set[str], required: int):
+        """Log agents that stopped or resumed voting and loss of quorum; call with _lock held."""
+        if voting != self._voting:
+            stopped = sorted(self._voting - voting)
+            resumed = sorted(voting - self._voting)
+            self._voting = voting
+            if stopped:
+                logger.warning(f"Agents stopped voting: {', '.join(stopped)}; "
+                               f"{len(voting)} voting, quorum {required}")
+            if resumed:
+                logger.info(f"Agents started voting: {', '.join(resumed)}; "
+                            f"{len(voting)} voting, quorum {required}")
+
+        # Agents are still connecting until the first votes arrive
+        if not self._last_votes:
+            return
+        reachable = len(voting) >= required
+        previous, self._quorum_reachable = self._quorum_reachable, reachable
+        if previous is None or reachable == previous:
+            return
+        if reachable:
+            logger.info(f"Quorum of {required} reached with {len(voting)} voting agents")
+        else:
+            logger.error(f"No quorum: {len(voting)} of {required} required agents voting; "
+                         f"no server can be declared down")
+
+    # ------------------------------------------------------------------
+    # Agent side
+    # ------------------------------------------------------------------
+
+    def _broadcast_config(self):
+        for writer in self.agents.values():
+            writer.write(self._config_message)
+
+    def _record_votes(self, agent: str, message: Dict):
+        values = message['results']
+        received = time.monotonic()
+        with self._lock:
+            servers = self._configs.get(message.get('version'))
+            if servers is None:
+                self.stats['stale_batches'] += 1
+                return
+
+            for offset in range(0, len(values) - 1, 2):
+                index, value = int(values[offset]), int(values[offset + 1])
+                if 0 <= index < len(servers):
+                    self._votes.setdefault(servers[index], {})[agent] = (received, value)
+            self._last_votes[agent] = received
+            self.stats['batches'] += 1
+            self.stats['votes'] += len(values) // 2
+
+        probe_seconds = message.get('probe_seconds')
+        if self.observe_probes and isinstance(probe_seconds, (int, float)):
+            self.observe_probes(float(probe_seconds), len(values) // 2)
+
+    def _valid_token(self, token) -> bool:
+        if not self.token or not isinstance(token, str):
+            return False
+        return hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+
+    async def _handle_agent(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        with self._lock:
+            self.stats['connections'] += 1
+        self._handlers.add(asyncio.current_task())
+        peer = writer.get_extra_info('peername')
+        name = None
+        try:
+            hello = await asyncio.wait_for(read_message(reader), timeout=HELLO_TIMEOUT)
+            if hello['type'] != 'hello' or hello.get('protocol') != PROTOCOL_VERSION or not hello.get('agent'):
+                writer.write(encode_message({'type': 'error',
+                                             'message': f"expected hello with protocol {PROTOCOL_VERSION}"}))
+                await writer.drain()
+                return
+            if not self._valid_token(hello.get('token')):
+                with self._lock:
+                    self.stats['rejected'] += 1
+                logger.warning(f"Refused agent {hello['agent']} from {peer[0] if peer else 'unknown'}: invalid token")
+                writer.write(encode_message({'type': 'error', 'message': "invalid agent token"}))
+                await writer.drain()
+                return
+
+            name = str(hello['agent'])
+            previous = self.agents.get(name)
+            if previous is not None:
+                logger.warning(f"Agent {name} reconnected; closing its previous connection")
+                previous.close()
+            with self._lock:
+                self.agents[name] = writer
+                self.known_agents.add(name)
+            logger.info(f"Agent {name} connected from {peer[0] if peer else 'unknown'}; "
+                        f"{len(self.agents)} connected, quorum {self.required_votes()}")
+
+            if self._config_message is not None:
+                writer.write(self._config_message)
+            while True:
+                message = await read_message(reader)
+                if message['type'] == 'results':
+                    self._record_votes(name, message)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Dropping agent {name or peer}: invalid message: {e}")
+        finally:
+            if name is not None and self.agents.get(name) is writer:
+                with self._lock:
+                    del self.agents[name]
+                logger.warning(f"Agent {name} disconnected; {len(self.agents)} connected")
+            writer.close()
+            self._handlers.discard(asyncio.current_task())
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        try:
+            self._server = await asyncio.start_server(self._handle_agent, self.host, self.port,
+                                                      reuse_address=True)
+        except OSError as e:
+            self._error = str(e)
+            self.loop = None
+            self._ready.set()
+            return
+
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        await self._stopping.wait()
+
+        # Closed connections end their handlers, which must finish before
+        # the loop does
+        self._server.close()
+        for writer in list(self.agents.values()):
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self, timeout: float = 10.0):
+        """Listen for agents in a background thread."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),), daemon=True,
+                                        name='quorum-aggregator')
+        self._thread.start()
+        if not self._ready.wait(timeout) or self._error:
+            raise OSError(f"Aggregator failed to start: {self._error or 'timed out'}")
+        logger.info(f"Aggregator listening for probe agents on {self.host}:{self.port}")
+
+    def stop(self, timeout: float = 10.0):
+        """Disconnect all agents and stop the event loop."""
+        if self.loop is not None and self._stopping is not None:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def open_aggregator(address: Optional[str] = None, quorum: Optional[int] = None,
+                    observe_probes: Optional[Callable[[float, int], None]] = None) -> Optional[QuorumAggregator]:
+    """Start the aggregator configured by SERVER_MONITOR_AGGREGATOR, or return None."""
+    address = (address or os.getenv('SERVER_MONITOR_AGGREGATOR', '')).strip()
+    if not address:
+        return None
+
+    token = os.getenv('SERVER_MONITOR_AGENT_TOKEN', '').strip()
+    if not token:
+        logger.error("SERVER_MONITOR_AGENT_TOKEN must be set to a secret shared with the probe agents")
+        return None
+
+    try:
+        if quorum is None and os.getenv('SERVER_MONITOR_QUORUM', '').strip():
+            quorum = int(os.getenv('SERVER_MONITOR_QUORUM'))
+        host, port = parse_address(address)
+        aggregator = QuorumAggregator(host, port, quorum, observe_probes, token)
+        aggregator.start()
+        return aggregator
+    except (ValueError, OSError) as e:
+        logger.error(f"Failed to start aggregator on {address}: {e}")
+        return None
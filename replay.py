@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Replay
+Replays recorded probe results through the failure detection and alerting
+logic with a simulated clock, much faster than real time.
+
+Recordings are the probe history kept by the state store
+(SERVER_MONITOR_DB), or CSV files written from it by history_export.py.
+Every recorded probe is fed to a MonitorEngine with the check time as its
+clock, so failure counting and alert decisions are the ones the monitor
+makes. Alerts are recorded instead of sent.
+
+The report lists, per replayed configuration:
+- the alerts that would have fired
+- incidents (runs of failed probes of one host) and whether they alerted
+- detection latency: alert time minus the first failed probe, and minus
+  the last successful probe before the incident
+- hosts with the most state transitions (flapping)
+
+Usage:
+    python replay.py --db monitor.db --since 30d --max-failures 2,3,5
+    python replay.py --csv january.csv --max-failures 3 --interval 60,120 -o replay.json
+
+--interval replays as if checks had run less often, by skipping recorded
+probes that come sooner than the interval after the last one used. It
+cannot make checks more frequent than they were recorded.
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from history_export import parse_time
+from monitor_engine import MonitorEngine, without_monitor_env
+from self_metrics import percentile
+from state_store import iter_history
+
+logger = logging.getLogger(__name__)
+
+ProbeRow = Tuple[float, str, int, int]
+
+CHUNK_SIZE = 50000
+
+# A recorded probe is used when it comes at least this fraction of the
+# replay interval after the last one, to tolerate scheduling jitter
+INTERVAL_TOLERANCE = 0.9
+
+TOP_FLAPPING = 20
+
+
+class SimulatedClock:
+    """Clock that returns the time of the probe being replayed."""
+
+    def __init__(self):
+        self.ts = 0.0
+
+    def __call__(self) -> datetime:
+        return datetime.fromtimestamp(self.ts)
+
+
+class ReplayEngine(MonitorEngine):
+    """MonitorEngine that records alerts and transitions instead of acting on them."""
+
+    def __init__(self, max_failures: int):
+        with without_monitor_env():
+            super().__init__(config_file=os.devnull)
+        self.max_failures = max_failures
+        self.clock = SimulatedClock()
+        self.alerts: List[Tuple[float, str, int]] = []
+        self.transitions: Dict[str, int] = {}
+
+    def is_smtp_configured(self) -> bool:
+        return True
+
+    def send_failure_email(self, server: str, failure_count: int) -> bool:
+        self.alerts.append((self.clock.ts, server, failure_count))
+        return True
+
+    def on_transition(self, server: str, is_reachable: bool):
+        self.transitions[server] = self.transitions.get(server, 0) + 1
+
+
+def iter_csv_history(paths: Iterable[str], hosts: Optional[Iterable[str]] = None,
+                     since: Optional[float] = None, until: Optional[float] = None,
+                     chunk_size: int = CHUNK_SIZE) -> Iterator[List[ProbeRow]]:
+    """Stream rows of history_export.py CSV files, which must be in timestamp order."""
+    wanted = set(hosts) if hosts is not None else None
+    for path in paths:
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            chunk: List[ProbeRow] = []
+            for row in csv.DictReader(f):
+                ts = float(row['timestamp'])
+                if (since is not None and ts < since) or (until is not None and ts >= until):
+                    continue
+                if wanted is not None and row['host'] not in wanted:
+                    continue
+                chunk.append((ts, row['host'], int(row['reachable']), int(row['response_time_ms'])))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+
+def replay(chunks: Iterable[List[ProbeRow]], max_failures: int = 3,
+           interval: Optional[float] = None) -> Dict[str, object]:
+    """
+    Feed recorded probes through a ReplayEngine and build the report.
+
+    Args:
+        chunks: Probe rows (ts, host, reachable, response_time) in timestamp order
+        max_failures: Consecutive failures before an alert
+        interval: Replay as if checks ran every `interval` seconds
+
+    Returns:
+        Report as a JSON-serialisable dict
+    """
+    engine = ReplayEngine(max_failures)
+    clock = engine.clock
+    min_gap = interval * INTERVAL_TOLERANCE if interval else 0.0
+
+    last_used: Dict[str, float] = {}
+    last_success: Dict[str, float] = {}
+    open_incidents: Dict[str, Dict] = {}
+    incidents: List[Dict] = []
+    probes = skipped = 0
+    first_ts = last_ts = None
+
+    started = time.perf_counter()
+    for chunk in chunks:
+        for ts, host, reachable, response_time in chunk:
+            if min_gap and ts - last_used.get(host, float('-inf')) < min_gap:
+                skipped += 1
+                continue
+            last_used[host] = ts
+            probes += 1
+            if first_ts is None:
+                first_ts = ts
+            last_ts = ts
+
+            if host not in engine.servers:
+                engine.add_server_entry(host)
+            clock.ts = ts
+            alerts_before = len(engine.alerts)
+            engine.apply_result(host, bool(reachable), response_time)
+
+            if reachable:
+                incident = open_incidents.pop(host, None)
+                if incident is not None:
+                    incident['end'] = ts
+                    incidents.append(incident)
+                last_success[host] = ts
+                continue
+
+            incident = open_incidents.get(host)
+            if incident is None:
+                incident = open_incidents[host] = {
+                    'host': host, 'start': ts, 'end': None, 'failed_probes': 0,
+                    'last_success': last_success.get(host), 'alert_at': None, 'alerts': 0
+                }
+            incident['failed_probes'] += 1
+
+            if len(engine.alerts) > alerts_before:
+                incident['alerts'] += 1
+                if incident['alert_at'] is None:
+                    incident['alert_at'] = ts
+    elapsed = time.perf_counter() - started
+
+    incidents.extend(open_incidents.values())
+    incidents.sort(key=lambda incident: incident['start'])
+
+    alerted = [incident for incident in incidents if incident['alert_at'] is not None]
+    from_first_failure = [incident['alert_at'] - incident['start'] for incident in alerted]
+    from_last_success = [incident['alert_at'] - incident['last_success']
+                         for incident in alerted if incident['last_success'] is not None]
+
+    def latency_stats(values: List[float]) -> Dict[str, float]:
+        return {
+            'count': len(values),
+            'p50': percentile(values, 0.5),
+            'p95': percentile(values, 0.95),
+            'max': max(values, default=0.0)
+        }
+
+    def iso(ts: Optional[float]) -> Optional[str]:
+        return datetime.fromtimestamp(ts).isoformat(timespec='seconds') if ts is not None else None
+
+    span = (last_ts - first_ts) if probes else 0.0
+    flapping = sorted(engine.transitions.items(), key=lambda item: item[1], reverse=True)[:TOP_FLAPPING]
+
+    return {
+        'max_failures': max_failures,
+        'interval': interval,
+        'probes': probes,
+        'probes_skipped': skipped,
+        'hosts': len(engine.servers),
+        'from': iso(first_ts),
+        'to': iso(last_ts),
+        'replay_seconds': elapsed,
+        'speedup': span / elapsed if elapsed else 0.0,
+        'alert_count': len(engine.alerts),
+        'incidents': {
+            'total': len(incidents),
+            'alerted': len(alerted),
+            'not_alerted': len(incidents) - len(alerted),
+            'ongoing': len(open_incidents)
+        },
+        'detection_latency_seconds': {
+            'from_first_failure': latency_stats(from_first_failure),
+            'from_last_success': latency_stats(from_last_success)
+        },
+        'flapping_hosts': [{'host': host, 'transitions': count} for host, count in flapping],
+        'alerts': [{'time': iso(ts), 'host': host, 'failures': failures}
+                   for ts, host, failures in engine.alerts],
+        'incident_list': [{
+            'host': incident['host'],
+            'start': iso(incident['start']),
+            'end': iso(incident['end']),
+            'failed_probes': incident['failed_probes'],
+            'alerts': incident['alerts'],
+            'first_alert': iso(incident['alert_at']),
+            'detection_latency_seconds': (incident['alert_at'] - incident['start']
+                                          if incident['alert_at'] is not None else None)
+        } for incident in incidents]
+    }
+
+
+def _format_report(report: Dict) -> str:
+    latency = report['detection_latency_seconds']['from_first_failure']
+    incidents = report['incidents']
+    interval = f"{report['interval']:g}s" if report['interval'] else "recorded"
+    return (f"max_failures={report['max_failures']} interval={interval} | "
+            f"{report['alert_count']} alerts | incidents {incidents['total']}: "
+            f"{incidents['alerted']} alerted, {incidents['not_alerted']} not | "
+            f"detection p50 {latency['p50']:.0f}s p95 {latency['p95']:.0f}s max {latency['max']:.0f}s | "
+            f"{report['probes']} probes in {report['replay_seconds']:.1f}s ({report['speedup']:.0f}x)")
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Replay recorded probes through detection and alerting")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--db', default=os.getenv('SERVER_MONITOR_DB', ''),
+                        help="State store database to read history from (default: SERVER_MONITOR_DB)")
+    source.add_argument('--csv', nargs='+', help="CSV files written by history_export.py")
+    parser.add_argument('--since', help="Start time: Unix time, ISO date/time or age like 24h, 30d")
+    parser.add_argument('--until', help="End time (exclusive), same formats as --since")
+    parser.add_argument('--servers', help="Comma-separated servers to replay (default: all)")
+    parser.add_argument('--max-failures', type=_int_list, default=[3],
+                        help="Comma-separated max_failures values to try (default: 3)")
+    parser.add_argument('--interval', type=_int_list, default=[],
+                        help="Comma-separated check intervals in seconds to try (default: as recorded)")
+    parser.add_argument('--output', '-o', help="Write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.csv:
+        if not args.db:
+            parser.error("no recording given; use --db, --csv or set SERVER_MONITOR_DB")
+        if not os.path.exists(args.db):
+            parser.error(f"database not found: {args.db}")
+
+    try:
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+    except ValueError as e:
+        parser.error(f"invalid time: {e}")
+    hosts = [server.strip() for server in args.servers.split(',')] if args.servers else None
+
+    def source_chunks() -> Iterator[List[ProbeRow]]:
+        if args.csv:
+            return iter_csv_history(args.csv, hosts, since, until)
+        return iter_history(args.db, hosts, since, until, CHUNK_SIZE)
+
+    # Alerts are only recorded; keep engine warnings out of the report
+    logging.basicConfig(level=logging.ERROR)
+
+    reports = []
+    try:
+        for max_failures in args.max_failures:
+            for interval in args.interval or [None]:
+                report = replay(source_chunks(), max_failures, interval)
+                reports.append(report)
+                print(_format_report(report), file=sys.stderr)
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        print(f"❌ Replay failed: {e}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'generated_at': datetime.now().isoformat(timespec='seconds'), 'reports': reports},
+                      f, indent=2)
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Self-Instrumentation
+Measures the monitor's own cost so slowness can be attributed to the
+network or to the monitor itself.
+
+Tracked per MonitorEngine:
+- cycle wall time and scheduler lag (how late a cycle started compared to
+  the wake time the monitor loop scheduled for it)
+- time spent inside the prober versus probe harness overhead (status
+  bookkeeping, hooks, persistence) per probe
+- alert send latency
+- process CPU usage and resident memory
+- queue depths reported by the front-end (pending GUI rows, log lines,
+  buffered output)
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import time
+import threading
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class DurationStat:
+    """Count, last, mean and maximum of a series of durations in seconds."""
+
+    __slots__ = ('count', 'total', 'last', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def observe_many(self, total: float, count: int):
+        """Record count durations known only by their sum; last and max use their mean."""
+        if count <= 0:
+            return
+        mean = total / count
+        self.count += count
+        self.total += total
+        self.last = mean
+        if mean > self.max:
+            self.max = mean
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'last': self.last,
+            'avg': self.total / self.count if self.count else 0.0,
+            'max': self.max
+        }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values (0.0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def process_cpu_seconds() -> float:
+    """Return user plus system CPU time of this process."""
+    times = os.times()
+    return times.user + times.system
+
+
+def process_rss_bytes() -> int:
+    """Return the current resident set size, or the peak where that is all we can get."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Reported in bytes on macOS and kilobytes elsewhere
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    return 0
+
+
+class MonitorInstrumentation:
+    """Timings and resource usage of one monitor instance."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cycle = DurationStat()
+        self.scheduler_lag = DurationStat()
+        self.probe = DurationStat()           # time inside the prober
+        self.probe_overhead = DurationStat()  # per-probe time outside the prober
+        self.alert = DurationStat()
+
+        self.probes = 0
+        self.cpu_percent = 0.0
+        self.rss_bytes = 0
+
+        self._wake_at: Optional[float] = None
+        self._cpu_mark = (time.monotonic(), process_cpu_seconds())
+
+    def schedule_next(self, wake_at: float):
+        """Record the monotonic time the next cycle is meant to start."""
+        with self._lock:
+            self._wake_at = wake_at
+
+    def cycle_started(self) -> float:
+        """Record the start of a cycle and its lag; returns the start time."""
+        now = time.monotonic()
+        with self._lock:
+            if self._wake_at is not None:
+                self.scheduler_lag.observe(max(0.0, now - self._wake_at))
+                self._wake_at = None
+        return now
+
+    def reset_schedule(self):
+        """Forget the scheduled wake time, e.g. when monitoring is restarted."""
+        with self._lock:
+            self._wake_at = None
+
+    def cycle_finished(self, started: float, probes: int, external_seconds: float):
+        """
+        Record wall time and probe overhead of a cycle, and sample CPU and RSS.
+
+        external_seconds is the time spent waiting on probes and alerts.
+        """
+        now = time.monotonic()
+        wall = now - started
+        cpu = process_cpu_seconds()
+
+        with self._lock:
+            self.cycle.observe(wall)
+            self.probes += probes
+            if probes:
+                self.probe_overhead.observe(max(0.0, wall - external_seconds) / probes)
+
+            mark_time, mark_cpu = self._cpu_mark
+            if now > mark_time:
+                self.cpu_percent = 100.0 * (cpu - mark_cpu) / (now - mark_time)
+            self._cpu_mark = (now, cpu)
+            self.rss_bytes = process_rss_bytes()
+
+    def observe_probe(self, seconds: float):
+        """Record time spent inside the prober for one probe."""
+        with self._lock:
+            self.probe.observe(seconds)
+
+    def observe_probes(self, seconds: float, count: int):
+        """Record the total prober time of a batch of count probes."""
+        with self._lock:
+            self.probe.observe_many(seconds, count)
+
+    def observe_alert(self, seconds: float):
+        """Record how long sending one alert took."""
+        with self._lock:
+            self.alert.observe(seconds)
+
+    def snapshot(self, queues: Optional[Dict[str, int]] = None) -> Dict[str, object]:
+        """Return all measurements as plain values; queue depths are passed in."""
+        with self._lock:
+            return {
+                'cycle_seconds': self.cycle.as_dict(),
+                'scheduler_lag_seconds': self.scheduler_lag.as_dict(),
+                'probe_seconds': self.probe.as_dict(),
+                'probe_overhead_seconds': self.probe_overhead.as_dict(),
+                'alert_seconds': self.alert.as_dict(),
+                'probes': self.probes,
+                'cpu_percent': self.cpu_percent,
+                'rss_bytes': self.rss_bytes,
+                'queues': dict(queues or {})
+            }
+
+    def summary(self) -> str:
+        """One-line human readable summary for dashboards."""
+        with self._lock:
+            return (f"Cycle: {self.cycle.last:.2f}s (max {self.cycle.max:.2f}s) | "
+                    f"Lag: {self.scheduler_lag.last:.2f}s | "
+                    f"Overhead: {self.probe_overhead.last * 1000:.2f}ms/probe | "
+                    f"Alert: {self.alert.last:.2f}s | "
+                    f"CPU: {self.cpu_percent:.1f}% | RSS: {self.rss_bytes / 1048576:.1f}MB")
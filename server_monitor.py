@@ -18,30 +18,38 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import threading
 import time
-import subprocess
-import platform
-import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import bisect
 from datetime import datetime
+from collections import deque
 import logging
 from typing import Dict, List, Optional
-import json
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('server_monitor.log'),
-        logging.StreamHandler()
-    ]
-)
+from monitor_engine import MonitorEngine, REQUIRED_SMTP_FIELDS, load_env_file
+from log_setup import configure_logging
+
 logger = logging.getLogger(__name__)
 
+# Number of recent probe samples kept in memory per server for sparklines
+SPARKLINE_SAMPLES = 20
+SPARKLINE_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(samples) -> str:
+    """Render (timestamp, response_time, is_reachable) samples as a text sparkline."""
+    rtts = [rtt for _, rtt, ok in samples if ok]
+    if not rtts:
+        return "·" * len(samples)
+    
+    low = min(rtts)
+    span = (max(rtts) - low) or 1
+    top = len(SPARKLINE_CHARS) - 1
+    return "".join(
+        SPARKLINE_CHARS[int((rtt - low) / span * top)] if ok else "·"
+        for _, rtt, ok in samples
+    )
 
-class ServerMonitor:
+
+class ServerMonitor(MonitorEngine):
     """Main class for server monitoring application."""
     
     def __init__(self, root):
@@ -50,15 +58,21 @@ class ServerMonitor:
         self.root.geometry("800x600")
         self.root.resizable(True, True)
         
-        # Monitoring state
-        self.monitoring = False
-        self.monitor_thread = None
-        self.servers = {}  # {ip: {'status': bool, 'last_check': datetime, 'failures': int}}
-        self.check_interval = 30  # seconds
-        self.max_failures = 3  # Send email after this many consecutive failures
+        # Monitoring state, SMTP configuration and optional state store
+        super().__init__(config_file='servers.json')
+        
+        # Pending GUI work written by worker threads and applied by the Tk
+        # thread once per frame tick
+        self.frame_interval = 100  # milliseconds (10 Hz)
+        self._pending_lock = threading.Lock()
+        self._dirty_servers = set()
+        self._pending_samples = []  # [(ip, (timestamp, response_time, is_reachable))]
+        self._pending_histories = []  # [(graph, samples or None on error)]
         
-        # SMTP configuration from environment variables
-        self.smtp_config = self.load_smtp_config()
+        # Recent samples for sparklines and open latency graphs; only touched
+        # by the Tk thread
+        self.rtt_samples = {}  # {ip: deque([(timestamp, response_time, is_reachable)])}
+        self.graphs = []
         
         # Setup GUI
         self.setup_gui()
@@ -66,23 +80,17 @@ class ServerMonitor:
         # Load saved servers if exists
         self.load_servers()
         
+        # Start applying coalesced status updates
+        self.root.after(self.frame_interval, self._drain_pending_updates)
+        
         logger.info("Server Monitor initialized")
     
     def load_smtp_config(self) -> Dict[str, str]:
-        """Load SMTP configuration from environment variables."""
-        config = {
-            'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
-            'smtp_port': int(os.getenv('SMTP_PORT', '587')),
-            'smtp_username': os.getenv('SMTP_USERNAME', ''),
-            'smtp_password': os.getenv('SMTP_PASSWORD', ''),
-            'smtp_from': os.getenv('SMTP_FROM', ''),
-            'smtp_to': os.getenv('SMTP_TO', ''),
-            'smtp_use_tls': os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
-        }
+        """Load SMTP configuration from environment variables and warn if incomplete."""
+        config = super().load_smtp_config()
         
         # Validate required SMTP settings
-        required_fields = ['smtp_username', 'smtp_password', 'smtp_from', 'smtp_to']
-        missing_fields = [field for field in required_fields if not config[field]]
+        missing_fields = [field for field in REQUIRED_SMTP_FIELDS if not config[field]]
         
         if missing_fields:
             logger.warning(f"Missing SMTP configuration: {', '.join(missing_fields)}")
@@ -147,31 +155,55 @@ class ServerMonitor:
         status_frame = ttk.LabelFrame(main_frame, text="Server Status", padding="10")
         status_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
         status_frame.columnconfigure(0, weight=1)
-        status_frame.rowconfigure(0, weight=1)
+        status_frame.rowconfigure(1, weight=1)
         
-        # Create treeview for server status
-        columns = ('Server', 'Status', 'Last Check', 'Response Time', 'Failures')
-        self.tree = ttk.Treeview(status_frame, columns=columns, show='headings', height=10)
+        # Create virtualized treeview for server status
+        columns = ('Server', 'Status', 'Last Check', 'Response Time', 'Failures', 'Trend')
+        self.index = ServerIndex(self.servers)
+        self.table = VirtualServerTable(status_frame, columns, self.index, self._row_display)
+        self.tree = self.table.tree
         
         # Define column widths and headings
-        self.tree.heading('Server', text='Server IP/Hostname')
-        self.tree.heading('Status', text='Status')
-        self.tree.heading('Last Check', text='Last Check')
-        self.tree.heading('Response Time', text='Response Time (ms)')
-        self.tree.heading('Failures', text='Consecutive Failures')
+        self.headings = {
+            'Server': 'Server IP/Hostname',
+            'Status': 'Status',
+            'Last Check': 'Last Check',
+            'Response Time': 'Response Time (ms)',
+            'Failures': 'Consecutive Failures',
+            'Trend': 'RTT Trend'
+        }
+        for column, text in self.headings.items():
+            self.tree.heading(column, text=text)
+        
+        # Clicking a sortable heading sorts by it; clicking again reverses
+        for column in ServerIndex.SORT_COLUMNS:
+            self.tree.heading(column, command=lambda c=column: self.sort_by_column(c))
         
         self.tree.column('Server', width=200)
         self.tree.column('Status', width=100, anchor=tk.CENTER)
         self.tree.column('Last Check', width=150)
         self.tree.column('Response Time', width=120, anchor=tk.CENTER)
         self.tree.column('Failures', width=120, anchor=tk.CENTER)
+        self.tree.column('Trend', width=140)
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(status_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.table.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
         
-        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        # Filter controls
+        filter_frame = ttk.Frame(status_frame)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        
+        ttk.Label(filter_frame, text="Show:").pack(side=tk.LEFT)
+        self.filter_mode_var = tk.StringVar(value=ServerIndex.FILTER_MODES[0])
+        filter_mode = ttk.Combobox(filter_frame, textvariable=self.filter_mode_var,
+                                   values=ServerIndex.FILTER_MODES, state='readonly', width=12)
+        filter_mode.pack(side=tk.LEFT, padx=(5, 15))
+        filter_mode.bind('<<ComboboxSelected>>', lambda e: self.apply_filter())
+        
+        ttk.Label(filter_frame, text="Hostname contains:").pack(side=tk.LEFT)
+        self.filter_text_var = tk.StringVar()
+        self.filter_text_var.trace_add('write', lambda *args: self.apply_filter())
+        ttk.Entry(filter_frame, textvariable=self.filter_text_var, width=25).pack(side=tk.LEFT, padx=(5, 0))
         
         # Context menu for tree
         self.tree.bind("<Button-3>", self.show_context_menu)  # Right click
@@ -182,15 +214,24 @@ class ServerMonitor:
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
         
-        self.log_text = scrolledtext.ScrolledText(log_frame, height=8, state=tk.DISABLED)
+        self.activity_log = ActivityLog(log_frame)
+        self.log_text = self.activity_log.text
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        ttk.Checkbutton(log_frame, text="Transitions only", variable=self.activity_log.transitions_only,
+                        command=self.activity_log.rebuild).grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
         status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN)
         status_bar.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
         
+        # Monitor's own cost: cycle time, lag, overhead, CPU and memory
+        self.perf_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.perf_var, foreground='gray').grid(
+            row=6, column=0, columnspan=3, sticky=tk.W)
+        
         # Setup custom styles
         self.setup_styles()
         
@@ -224,23 +265,13 @@ class ServerMonitor:
             messagebox.showwarning("Invalid Input", "Please enter a server IP or hostname.")
             return
         
-        if server in self.servers:
+        if not self.add_server_entry(server):
             messagebox.showwarning("Duplicate Server", f"Server {server} is already being monitored.")
             return
         
-        # Initialize server data
-        self.servers[server] = {
-            'status': None,
-            'last_check': None,
-            'response_time': 0,
-            'failures': 0,
-            'last_failure_email': None
-        }
-        
-        # Add to treeview
-        self.tree.insert('', tk.END, iid=server, values=(
-            server, 'Unknown', 'Never', '-', '0'
-        ))
+        # Add to table index
+        self.index.add(server)
+        self.table.render()
         
         self.server_entry.delete(0, tk.END)
         self.log_message(f"Added server: {server}")
@@ -248,17 +279,21 @@ class ServerMonitor:
     
     def remove_server(self, server):
         """Remove a server from monitoring."""
-        if server in self.servers:
-            del self.servers[server]
-            self.tree.delete(server)
+        if self.remove_server_entry(server):
+            self.rtt_samples.pop(server, None)
+            self.index.remove(server)
+            self.table.forget(server)
             self.log_message(f"Removed server: {server}")
             self.save_servers()
     
     def clear_all_servers(self):
         """Clear all servers from monitoring."""
         if messagebox.askyesno("Confirm", "Are you sure you want to remove all servers?"):
-            self.servers.clear()
-            self.tree.delete(*self.tree.get_children())
+            self.clear_server_entries()
+            self.rtt_samples.clear()
+            self.index.rebuild()
+            self.table.select([])
+            self.table.render()
             self.log_message("All servers removed")
             self.save_servers()
     
@@ -268,187 +303,137 @@ class ServerMonitor:
             messagebox.showwarning("No Servers", "Please add at least one server to monitor.")
             return
         
-        self.monitoring = True
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
         self.status_var.set("Monitoring...")
         
         # Start monitoring thread
-        self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
-        self.monitor_thread.start()
+        self.start()
         
         self.log_message("Monitoring started")
     
     def stop_monitoring(self):
         """Stop the monitoring process."""
-        self.monitoring = False
+        self.stop()
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.status_var.set("Ready")
         
         self.log_message("Monitoring stopped")
     
-    def monitor_loop(self):
-        """Main monitoring loop running in separate thread."""
-        while self.monitoring:
-            for server in list(self.servers.keys()):
-                if not self.monitoring:
-                    break
-                
-                # Perform ping check
-                is_reachable, response_time = self.ping_server(server)
-                
-                # Update server status
-                self.update_server_status(server, is_reachable, response_time)
-                
-                # Check for failures and send email if needed
-                if not is_reachable:
-                    self.handle_server_failure(server)
+    def on_status_update(self, server: str, prev_status: Optional[bool]):
+        """Queue the sample and mark the server's row for the next GUI frame."""
+        data = self.servers[server]
+        sample = (data['last_check'].timestamp(), data['response_time'], data['status'])
+        
+        with self._pending_lock:
+            self._dirty_servers.add(server)
+            self._pending_samples.append((server, sample))
+    
+    def on_transition(self, server: str, is_reachable: bool):
+        """Log status changes."""
+        status_change = "came online" if is_reachable else "went offline"
+        self.log_message(f"Server {server} {status_change}", kind='transition')
+    
+    def _drain_pending_updates(self):
+        """Apply all rows and log messages queued since the last frame tick."""
+        with self._pending_lock:
+            dirty, self._dirty_servers = self._dirty_servers, set()
+            pending_samples, self._pending_samples = self._pending_samples, []
+            pending_histories, self._pending_histories = self._pending_histories, []
+        
+        for graph, history in pending_histories:
+            if graph in self.graphs:
+                if history is None:
+                    history = self.recent_rtt_samples(graph.servers, time.time() - graph.WINDOW)
+                graph.load_history(history)
+        
+        dirty = [server for server in dirty if server in self.servers]
+        
+        for server, sample in pending_samples:
+            if server not in self.servers:
+                continue
+            samples = self.rtt_samples.get(server)
+            if samples is None:
+                samples = self.rtt_samples[server] = deque(maxlen=SPARKLINE_SAMPLES)
+            samples.append(sample)
             
-            # Wait for next check interval
-            for _ in range(self.check_interval):
-                if not self.monitoring:
-                    break
-                time.sleep(1)
+            for graph in self.graphs:
+                if server in graph.servers:
+                    graph.add_sample(*sample)
+        
+        # Re-position changed servers in the sort/filter index; when the
+        # visible order changed the table refills its window, otherwise only
+        # the changed rows are redrawn
+        if self.index.update_many(dirty):
+            self.table.render()
+        
+        for server in dirty:
+            self.table.refresh_server(server)
+        
+        if dirty:
+            self.perf_var.set(f"{self.instrumentation.summary()} | "
+                              f"Pending rows: {len(dirty)} | Pending log lines: {self.activity_log.pending_count}")
+        
+        if dirty and self.monitoring:
+            counts = self.aggregates.counts()
+            self.status_var.set(f"Monitoring... Online: {counts['online']} | "
+                                f"Offline: {counts['offline']} | Unknown: {counts['unknown']}")
+        
+        self.activity_log.flush()
+        
+        self.root.after(self.frame_interval, self._drain_pending_updates)
     
-    def ping_server(self, server: str) -> tuple[bool, int]:
-        """
-        Ping a server and return (is_reachable, response_time_ms).
+    def sort_by_column(self, column: str):
+        """Sort the table by a heading; clicking the same heading reverses the order."""
+        key = ServerIndex.SORT_COLUMNS[column]
+        descending = not self.index.descending if self.index.sort_key == key else False
+        self.index.set_sort(key, descending)
+        
+        for name, text in self.headings.items():
+            if name == column:
+                text += " ▼" if descending else " ▲"
+            self.tree.heading(name, text=text)
+        
+        self.table.render()
+    
+    def apply_filter(self):
+        """Apply the status and hostname filters from the filter controls."""
+        self.index.set_filter(self.filter_mode_var.get(), self.filter_text_var.get().strip())
+        self.table.scroll_to(0)
+        self.table.render()
+    
+    def _row_values(self, server: str) -> tuple:
+        """Build treeview row values from the current server data."""
+        data = self.servers[server]
         
-        Args:
-            server: IP address or hostname to ping
-            
-        Returns:
-            Tuple of (is_reachable: bool, response_time: int)
-        """
-        try:
-            # Determine ping command based on platform
-            if platform.system().lower() == "windows":
-                cmd = ["ping", "-n", "1", "-w", "3000", server]
-            else:
-                cmd = ["ping", "-c", "1", "-W", "3", server]
-            
-            start_time = time.time()
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-            end_time = time.time()
-            
-            if result.returncode == 0:
-                response_time = int((end_time - start_time) * 1000)
-                return True, response_time
-            else:
-                return False, 0
-                
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError) as e:
-            logger.warning(f"Ping failed for {server}: {e}")
-            return False, 0
-    
-    def update_server_status(self, server: str, is_reachable: bool, response_time: int):
-        """Update server status in GUI and data structures."""
-        current_time = datetime.now()
-        
-        # Update server data
-        prev_status = self.servers[server]['status']
-        self.servers[server]['status'] = is_reachable
-        self.servers[server]['last_check'] = current_time
-        self.servers[server]['response_time'] = response_time
-        
-        if is_reachable:
-            # Reset failure count on successful ping
-            self.servers[server]['failures'] = 0
+        if data['status'] is None:
+            status_text = 'Unknown'
+        elif data['status']:
             status_text = "✅ Online"
-            status_color = "green"
         else:
-            # Increment failure count
-            self.servers[server]['failures'] += 1
             status_text = "❌ Offline"
-            status_color = "red"
         
-        # Update treeview in main thread
-        self.root.after(0, self._update_treeview_item, server, status_text, 
-                       current_time.strftime("%H:%M:%S"), response_time, 
-                       self.servers[server]['failures'], status_color)
+        last_check = data['last_check'].strftime("%H:%M:%S") if data['last_check'] else 'Never'
+        response_text = f"{data['response_time']}" if data['response_time'] > 0 else "-"
         
-        # Log status change
-        if prev_status is not None and prev_status != is_reachable:
-            status_change = "came online" if is_reachable else "went offline"
-            self.root.after(0, self.log_message, f"Server {server} {status_change}")
-    
-    def _update_treeview_item(self, server: str, status: str, last_check: str, 
-                             response_time: int, failures: int, color: str):
-        """Update treeview item in main thread."""
-        try:
-            response_text = f"{response_time}" if response_time > 0 else "-"
-            self.tree.item(server, values=(
-                server, status, last_check, response_text, failures
-            ))
-            
-            # Set row color based on status
-            if color == "green":
-                self.tree.item(server, tags=('online',))
-            else:
-                self.tree.item(server, tags=('offline',))
-        except tk.TclError:
-            # Item might have been deleted
-            pass
-    
-    def handle_server_failure(self, server: str):
-        """Handle server failure and send email if needed."""
-        server_data = self.servers[server]
+        trend = sparkline(self.rtt_samples.get(server, ()))
         
-        # Send email after max_failures consecutive failures
-        if (server_data['failures'] >= self.max_failures and 
-            self.is_smtp_configured() and
-            server_data['last_failure_email'] != server_data['failures']):
-            
-            self.send_failure_email(server, server_data['failures'])
-            server_data['last_failure_email'] = server_data['failures']
+        return (server, status_text, last_check, response_text, data['failures'], trend)
     
-    def is_smtp_configured(self) -> bool:
-        """Check if SMTP is properly configured."""
-        required_fields = ['smtp_username', 'smtp_password', 'smtp_from', 'smtp_to']
-        return all(self.smtp_config.get(field) for field in required_fields)
+    def _row_display(self, server: str) -> tuple:
+        """Return (values, tags) for a table row; called lazily for visible rows only."""
+        status = self.servers[server]['status']
+        tags = () if status is None else (('online',) if status else ('offline',))
+        return self._row_values(server), tags
     
-    def send_failure_email(self, server: str, failure_count: int):
-        """Send email notification for server failure."""
-        try:
-            # Create message
-            msg = MimeMultipart()
-            msg['From'] = self.smtp_config['smtp_from']
-            msg['To'] = self.smtp_config['smtp_to']
-            msg['Subject'] = f"Server Alert: {server} is unreachable"
-            
-            # Email body
-            body = f"""
-Server Monitoring Alert
-
-Server: {server}
-Status: UNREACHABLE
-Consecutive Failures: {failure_count}
-Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-Please investigate the server connectivity issue.
-
----
-This is an automated message from Server Availability Monitor.
-            """.strip()
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Send email
-            server_smtp = smtplib.SMTP(self.smtp_config['smtp_server'], self.smtp_config['smtp_port'])
-            
-            if self.smtp_config['smtp_use_tls']:
-                server_smtp.starttls()
-            
-            server_smtp.login(self.smtp_config['smtp_username'], self.smtp_config['smtp_password'])
-            server_smtp.send_message(msg)
-            server_smtp.quit()
-            
-            self.root.after(0, self.log_message, f"Email alert sent for {server}")
-            
-        except Exception as e:
-            logger.error(f"Failed to send email for {server}: {e}")
-            self.root.after(0, self.log_message, f"Failed to send email for {server}: {str(e)}")
+    def on_alert_sent(self, server: str):
+        """Log sent alerts."""
+        self.log_message(f"Email alert sent for {server}")
+    
+    def on_alert_failed(self, server: str, error: Exception):
+        """Log alerts that could not be sent."""
+        self.log_message(f"Failed to send email for {server}: {str(error)}")
     
     def test_email(self):
         """Test email configuration by sending a test message."""
@@ -458,42 +443,14 @@ This is an automated message from Server Availability Monitor.
         
         def send_test():
             try:
-                msg = MimeMultipart()
-                msg['From'] = self.smtp_config['smtp_from']
-                msg['To'] = self.smtp_config['smtp_to']
-                msg['Subject'] = "Server Monitor - Test Email"
-                
-                body = f"""
-This is a test email from Server Availability Monitor.
-
-Configuration:
-- SMTP Server: {self.smtp_config['smtp_server']}:{self.smtp_config['smtp_port']}
-- From: {self.smtp_config['smtp_from']}
-- To: {self.smtp_config['smtp_to']}
-- TLS: {self.smtp_config['smtp_use_tls']}
-
-Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-If you received this email, the SMTP configuration is working correctly.
-                """.strip()
-                
-                msg.attach(MIMEText(body, 'plain'))
-                
-                server_smtp = smtplib.SMTP(self.smtp_config['smtp_server'], self.smtp_config['smtp_port'])
-                
-                if self.smtp_config['smtp_use_tls']:
-                    server_smtp.starttls()
-                
-                server_smtp.login(self.smtp_config['smtp_username'], self.smtp_config['smtp_password'])
-                server_smtp.send_message(msg)
-                server_smtp.quit()
+                self.send_test_email()
                 
                 self.root.after(0, lambda: messagebox.showinfo("Email Test", "Test email sent successfully!"))
-                self.root.after(0, self.log_message, "Test email sent successfully")
+                self.log_message("Test email sent successfully")
                 
             except Exception as e:
                 self.root.after(0, lambda: messagebox.showerror("Email Test Failed", f"Failed to send test email:\n{str(e)}"))
-                self.root.after(0, self.log_message, f"Test email failed: {str(e)}")
+                self.log_message(f"Test email failed: {str(e)}")
         
         # Send in separate thread to avoid blocking GUI
         threading.Thread(target=send_test, daemon=True).start()
@@ -504,9 +461,13 @@ If you received this email, the SMTP configuration is working correctly.
     
     def show_context_menu(self, event):
         """Show context menu for server list."""
-        item = self.tree.identify_row(event.y)
+        item = self.table.identify_server(event.y)
         if item:
-            self.tree.selection_set(item)
+            # Keep a multi-row selection so it can be graphed as a group
+            if item not in self.table.selected:
+                self.table.select([item])
+            selected = self.table.selected_servers()
+            graph_label = "Show Latency Graph" if len(selected) == 1 else f"Show Latency Graph ({len(selected)} servers)"
             
             context_menu = tk.Menu(self.root, tearoff=0)
             context_menu.add_command(label="Remove Server", 
@@ -514,12 +475,53 @@ If you received this email, the SMTP configuration is working correctly.
             context_menu.add_separator()
             context_menu.add_command(label="Test Ping", 
                                    command=lambda: self.test_ping(item))
+            context_menu.add_command(label=graph_label,
+                                   command=lambda: self.show_latency_graph(selected))
             
             try:
                 context_menu.tk_popup(event.x_root, event.y_root)
             finally:
                 context_menu.grab_release()
     
+    def show_latency_graph(self, servers: List[str]):
+        """
+        Open an RTT/loss graph for one server or a group of servers.
+        
+        With a state store the history is queried in a worker thread and
+        handed to the graph on a frame tick; otherwise only the recent
+        in-memory samples are available.
+        """
+        graph = LatencyGraph(self, servers)
+        self.graphs.append(graph)
+        
+        now = time.time()
+        if self.state_store:
+            threading.Thread(target=self._load_graph_history, daemon=True,
+                             args=(self.state_store, graph, servers, now - graph.WINDOW, now)).start()
+        else:
+            graph.load_history(self.recent_rtt_samples(servers, now - graph.WINDOW))
+    
+    def _load_graph_history(self, store, graph, servers: List[str], since: float, until: float):
+        """Query a graph's history off the Tk thread and queue it for the next frame."""
+        import sqlite3
+        
+        try:
+            samples = [(row['ts'], row['response_time'], bool(row['reachable']))
+                       for row in store.query_history(servers, since=since, until=until)]
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load probe history: {e}")
+            samples = None
+        
+        with self._pending_lock:
+            self._pending_histories.append((graph, samples))
+    
+    def recent_rtt_samples(self, servers, since: float) -> List[tuple]:
+        """Return the in-memory (timestamp, response_time, is_reachable) samples since a time."""
+        samples = []
+        for server in servers:
+            samples.extend(sample for sample in self.rtt_samples.get(server, ()) if sample[0] >= since)
+        return samples
+    
     def test_ping(self, server: str):
         """Test ping for a specific server."""
         def ping_test():
@@ -534,59 +536,49 @@ If you received this email, the SMTP configuration is working correctly.
         
         threading.Thread(target=ping_test, daemon=True).start()
     
-    def log_message(self, message: str):
-        """Add message to activity log."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
+    def log_message(self, message: str, kind: str = 'info'):
+        """
+        Add message to activity log.
         
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
-        self.log_text.config(state=tk.DISABLED)
+        Safe to call from any thread; the widget is updated on the next frame tick.
+        
+        Args:
+            message: Text to log
+            kind: 'transition' for status changes, 'info' for everything else
+        """
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.activity_log.append(kind, f"[{timestamp}] {message}\n")
         
         logger.info(message)
     
-    def save_servers(self):
-        """Save server list to file."""
-        try:
-            servers_data = {
-                'servers': list(self.servers.keys()),
-                'check_interval': self.check_interval,
-                'max_failures': self.max_failures
-            }
-            
-            with open('servers.json', 'w') as f:
-                json.dump(servers_data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save servers: {e}")
+    def queue_depths(self) -> Dict[str, int]:
+        """Report rows and log lines waiting for the next frame tick."""
+        return {
+            'pending_gui_updates': len(self._dirty_servers),
+            'pending_log_lines': self.activity_log.pending_count
+        }
     
-    def load_servers(self):
-        """Load server list from file."""
-        try:
-            if os.path.exists('servers.json'):
-                with open('servers.json', 'r') as f:
-                    data = json.load(f)
-                
-                self.check_interval = data.get('check_interval', 30)
-                self.max_failures = data.get('max_failures', 3)
-                
-                for server in data.get('servers', []):
-                    self.servers[server] = {
-                        'status': None,
-                        'last_check': None,
-                        'response_time': 0,
-                        'failures': 0,
-                        'last_failure_email': None
-                    }
-                    
-                    self.tree.insert('', tk.END, iid=server, values=(
-                        server, 'Unknown', 'Never', '-', '0'
-                    ))
-                
-                if self.servers:
-                    self.log_message(f"Loaded {len(self.servers)} servers from saved configuration")
-        except Exception as e:
-            logger.error(f"Failed to load servers: {e}")
+    def get_settings(self) -> Dict[str, object]:
+        """Return monitoring settings plus the activity log size."""
+        settings = super().get_settings()
+        settings['log_max_lines'] = self.activity_log.max_lines
+        return settings
+    
+    def apply_settings(self, data: Dict):
+        """Apply monitoring settings and the activity log size."""
+        super().apply_settings(data)
+        self.activity_log.set_max_lines(int(data.get('log_max_lines', ActivityLog.DEFAULT_MAX_LINES)))
+    
+    def load_servers(self) -> int:
+        """Load saved servers and show them in the table."""
+        count = super().load_servers()
+        
+        self.index.rebuild()
+        self.table.render()
+        
+        if count:
+            self.log_message(f"Loaded {count} servers from saved configuration")
+        return count
     
     def on_closing(self):
         """Handle application closing."""
@@ -594,9 +586,569 @@ If you received this email, the SMTP configuration is working correctly.
             self.stop_monitoring()
         
         self.save_servers()
+        self.close_state_store()
+        
         self.root.destroy()
 
 
+class ServerIndex:
+    """
+    Sorted and filtered view of the servers, maintained incrementally.
+    
+    Servers passing the filter are kept in a list ordered by the active sort
+    key. A status change re-positions only that server using bisect, so the
+    table never re-sorts or rebuilds rows on a normal update. Large batches
+    fall back to a single re-sort, which is cheaper than many moves.
+    """
+    
+    SORT_COLUMNS = {
+        'Server': 'server',
+        'Status': 'status',
+        'Response Time': 'rtt',
+        'Failures': 'failures'
+    }
+    FILTER_MODES = ('All', 'Offline only', 'Online only')
+    
+    # Batches larger than this fraction of the index are applied by re-sorting
+    REBUILD_FRACTION = 0.1
+    
+    def __init__(self, servers: Dict[str, Dict]):
+        self.servers = servers
+        self.sort_key = 'added'
+        self.descending = False
+        self.filter_mode = 'All'
+        self.filter_text = ''
+        
+        self._keys: List[tuple] = []  # sorted keys of the matching servers
+        self._hosts: List[str] = []  # servers in the same order as _keys
+        self._key_of: Dict[str, tuple] = {}  # {server: key currently in _keys}
+        self._added: Dict[str, int] = {}  # {server: insertion sequence}
+        self._next_seq = 0
+    
+    def __len__(self) -> int:
+        return len(self._hosts)
+    
+    def slice(self, start: int, stop: int) -> List[str]:
+        """Return servers at display positions start..stop."""
+        if not self.descending:
+            return self._hosts[start:stop]
+        
+        total = len(self._hosts)
+        return self._hosts[max(0, total - stop):max(0, total - start)][::-1]
+    
+    def _sort_value(self, server: str) -> tuple:
+        data = self.servers[server]
+        
+        if self.sort_key == 'server':
+            return (server,)
+        if self.sort_key == 'status':
+            # Offline first, then unknown, then online
+            return ({False: 0, None: 1, True: 2}[data['status']], server)
+        if self.sort_key == 'rtt':
+            rtt = data['response_time'] if data['status'] else float('inf')
+            return (rtt, server)
+        if self.sort_key == 'failures':
+            return (data['failures'], server)
+        return (self._added[server], server)
+    
+    def matches(self, server: str) -> bool:
+        """Return True if the server passes the current filter."""
+        if self.filter_text and self.filter_text.lower() not in server.lower():
+            return False
+        
+        status = self.servers[server]['status']
+        if self.filter_mode == 'Offline only':
+            return status is False
+        if self.filter_mode == 'Online only':
+            return status is True
+        return True
+    
+    def add(self, server: str):
+        """Index a newly added server."""
+        self._added[server] = self._next_seq
+        self._next_seq += 1
+        self.update(server)
+    
+    def remove(self, server: str):
+        """Drop a removed server from the index."""
+        self._discard(server)
+        self._added.pop(server, None)
+    
+    def _discard(self, server: str):
+        key = self._key_of.pop(server, None)
+        if key is not None:
+            position = bisect.bisect_left(self._keys, key)
+            del self._keys[position]
+            del self._hosts[position]
+    
+    def update(self, server: str) -> bool:
+        """Re-position a server after its data changed; return True if the order changed."""
+        new_key = self._sort_value(server) if self.matches(server) else None
+        if self._key_of.get(server) == new_key:
+            return False
+        
+        self._discard(server)
+        if new_key is not None:
+            position = bisect.bisect_left(self._keys, new_key)
+            self._keys.insert(position, new_key)
+            self._hosts.insert(position, server)
+            self._key_of[server] = new_key
+        return True
+    
+    def update_many(self, servers: List[str]) -> bool:
+        """Re-position a batch of changed servers; return True if the order changed."""
+        if len(servers) > max(64, len(self._added) * self.REBUILD_FRACTION):
+            self.rebuild()
+            return True
+        
+        changed = False
+        for server in servers:
+            changed = self.update(server) or changed
+        return changed
+    
+    def rebuild(self):
+        """Re-sort and re-filter every server."""
+        for server in self.servers:
+            if server not in self._added:
+                self._added[server] = self._next_seq
+                self._next_seq += 1
+        for server in [s for s in self._added if s not in self.servers]:
+            del self._added[server]
+        
+        entries = sorted((self._sort_value(server), server) for server in self.servers if self.matches(server))
+        self._keys = [key for key, _ in entries]
+        self._hosts = [server for _, server in entries]
+        self._key_of = dict(zip(self._hosts, self._keys))
+    
+    def set_sort(self, sort_key: str, descending: bool = False):
+        """Change the sort order."""
+        self.descending = descending
+        if sort_key != self.sort_key:
+            self.sort_key = sort_key
+            self.rebuild()
+    
+    def set_filter(self, mode: str, text: str = ''):
+        """Change the status/hostname filter."""
+        narrowing = mode == self.filter_mode and self.filter_text.lower() in text.lower()
+        self.filter_mode = mode
+        self.filter_text = text
+        
+        if not narrowing:
+            self.rebuild()
+            return
+        
+        # A longer substring can only hide servers, so filter the current
+        # order instead of re-sorting
+        keep = [i for i, server in enumerate(self._hosts) if self.matches(server)]
+        if len(keep) != len(self._hosts):
+            self._keys = [self._keys[i] for i in keep]
+            self._hosts = [self._hosts[i] for i in keep]
+            self._key_of = dict(zip(self._hosts, self._keys))
+
+
+class VirtualServerTable:
+    """
+    Treeview that only materialises the rows currently on screen.
+    
+    The server index is a ServerIndex holding the sorted, filtered hosts. The
+    Treeview holds a small pool of row items that is refilled from
+    row_provider() whenever the scroll offset, the widget size, the index
+    order or a visible server changes, so memory and redraw cost depend on
+    the window height rather than on the fleet size.
+    """
+    
+    def __init__(self, parent, columns, index, row_provider):
+        self.row_provider = row_provider  # server -> (values, tags)
+        self.columns = columns
+        self.index = index
+        self.offset = 0
+        self.capacity = 10  # rows that fit in the widget
+        self.selected = set()
+        
+        self._pool: List[str] = []  # Treeview item ids, top to bottom
+        self._visible: Dict[str, str] = {}  # {server: pool item id}
+        self._pool_servers: Dict[str, str] = {}  # {pool item id: server}
+        self._rendered: Dict[str, tuple] = {}  # {pool item id: (values, tags)}
+        
+        self.tree = ttk.Treeview(parent, columns=columns, show='headings', height=self.capacity)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self._on_scrollbar)
+        
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<Prior>', lambda e: self.scroll(-self.capacity))
+        self.tree.bind('<Next>', lambda e: self.scroll(self.capacity))
+        self.tree.bind('<Home>', lambda e: self.scroll_to(0))
+        self.tree.bind('<End>', lambda e: self.scroll_to(len(self.index)))
+    
+    def forget(self, server: str):
+        """Drop a removed server from the selection and redraw."""
+        self.selected.discard(server)
+        self.render()
+    
+    def refresh_server(self, server: str):
+        """Re-render a server's row if it is currently on screen."""
+        item = self._visible.get(server)
+        if item is not None:
+            self._render_item(item, server)
+    
+    def scroll(self, rows: int):
+        """Scroll the view by a number of rows."""
+        self.scroll_to(self.offset + rows)
+    
+    def scroll_to(self, offset: int):
+        """Scroll so that the given index position is the first visible row."""
+        offset = max(0, min(offset, len(self.index) - self.capacity))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+    
+    def render(self):
+        """Refill the row pool from the index slice at the current offset."""
+        self.offset = max(0, min(self.offset, len(self.index) - self.capacity))
+        window = self.index.slice(self.offset, self.offset + self.capacity)
+        
+        # Grow or shrink the pool to the number of rows on screen
+        while len(self._pool) < len(window):
+            self._pool.append(self.tree.insert('', tk.END, values=()))
+        while len(self._pool) > len(window):
+            item = self._pool.pop()
+            self._rendered.pop(item, None)
+            self.tree.delete(item)
+        
+        self._visible = {}
+        self._pool_servers = {}
+        for item, server in zip(self._pool, window):
+            self._visible[server] = item
+            self._pool_servers[item] = server
+            self._render_item(item, server)
+        
+        self._sync_selection()
+        self._update_scrollbar()
+    
+    def _render_item(self, item: str, server: str):
+        """Push a server's row to a pool item, skipping unchanged rows."""
+        row = self.row_provider(server)
+        if self._rendered.get(item) == row:
+            return
+        
+        values, tags = row
+        self.tree.item(item, values=values, tags=tags)
+        self._rendered[item] = row
+    
+    def _update_scrollbar(self):
+        """Map the visible slice onto the scrollbar."""
+        total = len(self.index)
+        if total <= self.capacity:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.capacity) / total)
+    
+    def _on_scrollbar(self, action, *args):
+        """Handle scrollbar drags and clicks."""
+        if action == 'moveto':
+            self.scroll_to(int(float(args[0]) * len(self.index)))
+        elif action == 'scroll':
+            amount = int(args[0])
+            self.scroll(amount * self.capacity if args[1] == 'pages' else amount)
+    
+    def _on_mousewheel(self, event):
+        """Handle mouse wheel scrolling on Windows and macOS."""
+        self.scroll(-1 * (event.delta // 120 or (1 if event.delta > 0 else -1)) * 3)
+    
+    def _on_configure(self, event):
+        """Recompute how many rows fit when the widget is resized."""
+        header_height, row_height = self._row_metrics()
+        capacity = max(1, (event.height - header_height) // row_height)
+        if capacity != self.capacity:
+            self.capacity = capacity
+            self.render()
+    
+    def _row_metrics(self) -> tuple:
+        """Return (header_height, row_height) in pixels."""
+        if self._pool:
+            bbox = self.tree.bbox(self._pool[0])
+            if bbox:
+                return bbox[1], bbox[3]
+        
+        try:
+            row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        except (tk.TclError, ValueError):
+            row_height = 20
+        return row_height, row_height
+    
+    def _on_select(self, event):
+        """Record selection changes made by the user on visible rows."""
+        current = set(self.tree.selection())
+        for server, item in self._visible.items():
+            if item in current:
+                self.selected.add(server)
+            else:
+                self.selected.discard(server)
+    
+    def _sync_selection(self):
+        """Reflect the selected servers on the current pool items."""
+        wanted = [item for server, item in self._visible.items() if server in self.selected]
+        if set(wanted) != set(self.tree.selection()):
+            self.tree.selection_set(wanted)
+    
+    def identify_server(self, y: int) -> Optional[str]:
+        """Return the server shown at the given widget y coordinate."""
+        return self._pool_servers.get(self.tree.identify_row(y))
+    
+    def select(self, servers: List[str]):
+        """Replace the selection."""
+        self.selected = set(servers)
+        self._sync_selection()
+    
+    def selected_servers(self) -> List[str]:
+        """Return selected servers in index order."""
+        return [server for server in self.index.slice(0, len(self.index)) if server in self.selected]
+
+
+class ActivityLog:
+    """
+    Bounded activity log with batched inserts.
+    
+    Messages from any thread are buffered and appended to the ScrolledText
+    once per frame. The widget keeps at most max_lines lines and drops old
+    lines in blocks, so deletes stay rare. The most recent max_lines entries
+    are kept in a ring buffer so the view can be re-filtered.
+    """
+    
+    DEFAULT_MAX_LINES = 1000
+    
+    def __init__(self, parent, max_lines: int = DEFAULT_MAX_LINES):
+        self.max_lines = max_lines
+        self.transitions_only = tk.BooleanVar(value=False)
+        
+        self._lock = threading.Lock()
+        self._pending = []  # [(kind, line)] not yet shown
+        self._entries = deque(maxlen=max_lines)  # [(kind, line)] most recent
+        self._line_count = 0  # lines currently in the widget
+        
+        self.text = scrolledtext.ScrolledText(parent, height=8, state=tk.DISABLED)
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of queued lines not yet shown."""
+        return len(self._pending)
+    
+    @property
+    def trim_block(self) -> int:
+        """Number of lines the widget may overrun before it is trimmed."""
+        return max(1, self.max_lines // 10)
+    
+    def append(self, kind: str, line: str):
+        """Queue a log line; safe to call from any thread."""
+        with self._lock:
+            self._pending.append((kind, line))
+    
+    def _visible(self, kind: str) -> bool:
+        return kind == 'transition' or not self.transitions_only.get()
+    
+    def flush(self):
+        """Append all queued lines in one insert and trim old lines if needed."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        
+        if not pending:
+            return
+        
+        self._entries.extend(pending)
+        lines = [line for kind, line in pending if self._visible(kind)]
+        if not lines:
+            return
+        
+        # Only follow new output if the user has not scrolled up
+        at_bottom = self.text.yview()[1] >= 0.999
+        
+        self.text.config(state=tk.NORMAL)
+        self.text.insert(tk.END, ''.join(lines[-self.max_lines:]))
+        self._line_count += min(len(lines), self.max_lines)
+        
+        excess = self._line_count - self.max_lines
+        if excess >= self.trim_block:
+            self.text.delete('1.0', f'{excess + 1}.0')
+            self._line_count -= excess
+        
+        if at_bottom:
+            self.text.see(tk.END)
+        self.text.config(state=tk.DISABLED)
+    
+    def rebuild(self):
+        """Redraw the widget from the ring buffer, e.g. after the filter changed."""
+        lines = [line for kind, line in self._entries if self._visible(kind)]
+        
+        self.text.config(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        self.text.insert(tk.END, ''.join(lines))
+        self.text.see(tk.END)
+        self.text.config(state=tk.DISABLED)
+        self._line_count = len(lines)
+    
+    def set_max_lines(self, max_lines: int):
+        """Change the line limit, keeping the most recent entries."""
+        if max_lines == self.max_lines:
+            return
+        
+        self.max_lines = max_lines
+        self._entries = deque(self._entries, maxlen=max_lines)
+        self.rebuild()
+
+
+class LatencyGraph:
+    """
+    RTT and loss graph for a server or a group of servers.
+    
+    Samples are decimated into one min/max bucket per pixel column. A new
+    sample only redraws its own column, and moving into a new column shifts
+    the existing items on the canvas instead of redrawing them, so a 24 hour
+    window stays cheap to keep up to date.
+    """
+    
+    WINDOW = 24 * 3600  # seconds
+    WIDTH = 640
+    HEIGHT = 240
+    LEFT = 50  # room for the RTT axis labels
+    RIGHT = 10
+    TOP = 10
+    BOTTOM = 30  # room for the loss strip
+    
+    def __init__(self, monitor, servers: List[str]):
+        self.monitor = monitor
+        self.servers = set(servers)
+        
+        self.plot_width = self.WIDTH - self.LEFT - self.RIGHT
+        self.plot_height = self.HEIGHT - self.TOP - self.BOTTOM
+        self.col_seconds = self.WINDOW / self.plot_width
+        self.head = int(time.time() // self.col_seconds)  # column at the right edge
+        self.scale = 1.0  # RTT in ms at the top of the plot
+        self.columns = {}  # {column: [min_rtt, max_rtt, samples, lost]}
+        self.items = {}  # {column: [canvas item ids]}
+        
+        title = servers[0] if len(servers) == 1 else f"{len(servers)} servers"
+        self.window = tk.Toplevel(monitor.root)
+        self.window.title(f"Latency - {title}")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        self.canvas = tk.Canvas(self.window, width=self.WIDTH, height=self.HEIGHT, background='white')
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.redraw()
+    
+    def load_history(self, samples: List[tuple]):
+        """Add stored (timestamp, rtt, ok) samples and redraw once."""
+        for ts, rtt, ok in samples:
+            self._accumulate(ts, rtt, ok)
+        
+        peak = max((column[1] for column in self.columns.values()), default=0)
+        self.scale = max(self.scale, peak * 1.25)
+        self.redraw()
+    
+    def _accumulate(self, ts: float, rtt: int, ok: bool) -> Optional[int]:
+        """Add a sample to its pixel column; return the column or None if too old."""
+        col = int(ts // self.col_seconds)
+        if col <= self.head - self.plot_width:
+            return None
+        
+        column = self.columns.get(col)
+        if column is None:
+            column = self.columns[col] = [float('inf'), 0, 0, 0]
+        
+        column[2] += 1
+        if ok:
+            column[0] = min(column[0], rtt)
+            column[1] = max(column[1], rtt)
+        else:
+            column[3] += 1
+        return col
+    
+    def add_sample(self, ts: float, rtt: int, ok: bool):
+        """Add a live sample, redrawing as little as possible."""
+        col = self._accumulate(ts, rtt, ok)
+        if col is None:
+            return
+        
+        if col > self.head:
+            self._advance(col)
+        
+        if self.columns[col][1] > self.scale:
+            self.scale = self.columns[col][1] * 1.25
+            self.redraw()
+        else:
+            self._draw_column(col)
+    
+    def _advance(self, col: int):
+        """Scroll the plot left so that col becomes the rightmost column."""
+        shift = col - self.head
+        self.head = col
+        self.canvas.move('sample', -shift, 0)
+        
+        oldest = self.head - self.plot_width
+        for old in [c for c in self.columns if c <= oldest]:
+            del self.columns[old]
+            for item in self.items.pop(old, ()):
+                self.canvas.delete(item)
+    
+    def _x(self, col: int) -> int:
+        return self.LEFT + self.plot_width - 1 - (self.head - col)
+    
+    def _y(self, rtt: float) -> float:
+        return self.TOP + self.plot_height - min(rtt, self.scale) / self.scale * self.plot_height
+    
+    def _draw_column(self, col: int):
+        """(Re)draw the min/max bar and loss mark of a single column."""
+        for item in self.items.pop(col, ()):
+            self.canvas.delete(item)
+        
+        min_rtt, max_rtt, count, lost = self.columns[col]
+        x = self._x(col)
+        items = []
+        
+        if count > lost:
+            items.append(self.canvas.create_line(
+                x, self._y(max_rtt), x, self._y(min_rtt) + 1, fill='#1f77b4', tags=('sample',)
+            ))
+        if lost:
+            loss_bottom = self.TOP + self.plot_height + self.BOTTOM - 12
+            loss_height = max(1, (self.BOTTOM - 14) * lost / count)
+            items.append(self.canvas.create_line(
+                x, loss_bottom - loss_height, x, loss_bottom, fill='#d62728', tags=('sample',)
+            ))
+        
+        self.items[col] = items
+    
+    def redraw(self):
+        """Redraw axes and every column, e.g. after the RTT scale changed."""
+        self.canvas.delete('all')
+        self.items = {}
+        
+        bottom = self.TOP + self.plot_height
+        right = self.LEFT + self.plot_width
+        
+        self.canvas.create_rectangle(self.LEFT, self.TOP, right, bottom, outline='#cccccc')
+        for fraction in (0.0, 0.5, 1.0):
+            y = bottom - fraction * self.plot_height
+            self.canvas.create_text(self.LEFT - 5, y, text=f"{self.scale * fraction:.0f} ms",
+                                    anchor=tk.E, font=('Arial', 8))
+        
+        self.canvas.create_text(self.LEFT, self.HEIGHT - 2, text="-24h", anchor=tk.SW, font=('Arial', 8))
+        self.canvas.create_text(right, self.HEIGHT - 2, text="now", anchor=tk.SE, font=('Arial', 8))
+        self.canvas.create_text((self.LEFT + right) / 2, self.HEIGHT - 2, text="loss",
+                                anchor=tk.S, fill='#d62728', font=('Arial', 8))
+        
+        for col in self.columns:
+            self._draw_column(col)
+    
+    def close(self):
+        """Close the graph window and stop feeding it samples."""
+        if self in self.monitor.graphs:
+            self.monitor.graphs.remove(self)
+        self.window.destroy()
+
+
 class SettingsDialog:
     """Settings dialog for configuring monitoring parameters."""
     
@@ -606,7 +1158,7 @@ class SettingsDialog:
         # Create dialog window
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Settings")
-        self.dialog.geometry("400x300")
+        self.dialog.geometry("400x340")
         self.dialog.resizable(False, False)
         self.dialog.transient(parent)
         self.dialog.grab_set()
@@ -641,6 +1193,13 @@ class SettingsDialog:
         self.failures_var = tk.StringVar(value=str(self.monitor.max_failures))
         ttk.Entry(failures_frame, textvariable=self.failures_var, width=10).pack(side=tk.RIGHT)
         
+        # Activity log size
+        log_lines_frame = ttk.Frame(main_frame)
+        log_lines_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(log_lines_frame, text="Activity Log Lines:").pack(side=tk.LEFT)
+        self.log_lines_var = tk.StringVar(value=str(self.monitor.activity_log.max_lines))
+        ttk.Entry(log_lines_frame, textvariable=self.log_lines_var, width=10).pack(side=tk.RIGHT)
+        
         # SMTP settings
         ttk.Separator(main_frame, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=20)
         ttk.Label(main_frame, text="SMTP Configuration", font=('Arial', 12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
@@ -679,9 +1238,16 @@ class SettingsDialog:
                 messagebox.showerror("Invalid Value", "Max failures must be at least 1.")
                 return
             
+            # Validate and save activity log size
+            log_lines = int(self.log_lines_var.get())
+            if log_lines < 100:
+                messagebox.showerror("Invalid Value", "Activity log must keep at least 100 lines.")
+                return
+            
             # Update monitor settings
             self.monitor.check_interval = interval
             self.monitor.max_failures = max_failures
+            self.monitor.activity_log.set_max_lines(log_lines)
             self.monitor.save_servers()
             
             messagebox.showinfo("Settings", "Settings saved successfully!")
@@ -725,20 +1291,11 @@ SMTP_TO=admin@company.com
         f.write(env_content)
 
 
-def load_env_file():
-    """Load environment variables from .env file if it exists."""
-    env_file = '.env'
-    if os.path.exists(env_file):
-        with open(env_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
-
-
 def main():
     """Main function to run the application."""
+    # JSON lines log file written by a background thread
+    configure_logging('server_monitor.log')
+    
     # Create example environment file
     create_env_example()
     
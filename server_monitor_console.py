@@ -17,29 +17,21 @@ Version: 1.0.0
 """
 
 import os
+import re
 import sys
 import time
+import shutil
+import unicodedata
 import threading
-import subprocess
-import platform
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import logging
-import json
 import signal
 from typing import Dict, List, Optional
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('server_monitor_console.log'),
-        logging.StreamHandler()
-    ]
-)
+from monitor_engine import MonitorEngine, load_env_file
+from cycle_profiler import DEFAULT_PROFILE_CYCLES
+from log_setup import configure_logging
+
 logger = logging.getLogger(__name__)
 
 # ANSI color codes for console output
@@ -55,38 +47,126 @@ class Colors:
     UNDERLINE = '\033[4m'
     RESET = '\033[0m'
 
-class ConsoleServerMonitor:
+# Escape sequences take no space on screen
+ANSI_ESCAPE = re.compile(r'\033\[[0-9;?]*[A-Za-z]')
+
+
+def char_width(char: str) -> int:
+    """Terminal columns taken by one character."""
+    if unicodedata.combining(char) or unicodedata.category(char) in ('Mn', 'Me', 'Cf'):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+
+
+def clip_line(line: str, columns: int) -> str:
+    """Cut a line to at most `columns` visible characters, keeping escape sequences intact."""
+    out = []
+    width = 0
+    position = 0
+    for match in list(ANSI_ESCAPE.finditer(line)) + [None]:
+        end = match.start() if match else len(line)
+        for char in line[position:end]:
+            width += char_width(char)
+            if width > columns:
+                out.append(Colors.RESET)
+                return "".join(out)
+            out.append(char)
+        if match:
+            out.append(match.group())
+            position = match.end()
+    return line
+
+
+class DashboardRenderer:
+    """
+    Flicker-free terminal renderer for the status dashboard.
+    
+    Keeps the previously drawn frame and rewrites only the lines that
+    changed, using ANSI cursor addressing, in a single write per frame.
+    """
+    
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.previous: List[str] = []
+        self.size = None
+    
+    @property
+    def rows(self) -> int:
+        """Number of terminal rows available for a frame."""
+        return shutil.get_terminal_size().lines
+    
+    def start(self):
+        """Hide the cursor and clear the screen once."""
+        self.stream.write("\033[?25l\033[2J\033[H")
+        self.stream.flush()
+        self.previous = []
+        self.size = shutil.get_terminal_size()
+    
+    def render(self, lines: List[str]):
+        """Draw a frame, writing only the lines that differ from the previous one."""
+        size = shutil.get_terminal_size()
+        out = []
+        
+        if size != self.size:
+            # Line wrapping changed; repaint everything once
+            out.append("\033[2J")
+            self.previous = []
+            self.size = size
+        
+        # A line wider than the terminal would wrap and push every row
+        # below it off the position the diff assumes
+        lines = [clip_line(line, size.columns) for line in lines[:size.lines]]
+        for row, line in enumerate(lines):
+            if row >= len(self.previous) or self.previous[row] != line:
+                out.append(f"\033[{row + 1};1H{line}\033[K")
+        
+        # Blank out lines left over from a longer previous frame
+        for row in range(len(lines), len(self.previous)):
+            out.append(f"\033[{row + 1};1H\033[K")
+        
+        self.previous = lines
+        
+        if out:
+            self.stream.write("".join(out))
+            self.stream.flush()
+    
+    def stop(self):
+        """Move the cursor below the last frame and show it again."""
+        self.stream.write(f"\033[{len(self.previous) + 1};1H\033[?25h")
+        self.stream.flush()
+
+
+class ConsoleServerMonitor(MonitorEngine):
     """Console-based server monitoring application."""
     
+    app_name = "Console Server Monitor"
+    
     def __init__(self):
-        self.monitoring = False
-        self.monitor_thread = None
-        self.servers = {}  # {ip: {'status': bool, 'last_check': datetime, 'failures': int}}
-        self.check_interval = 30  # seconds
-        self.max_failures = 3  # Send email after this many consecutive failures
-        
-        # SMTP configuration from environment variables
-        self.smtp_config = self.load_smtp_config()
+        # Monitoring state, SMTP configuration and optional state store
+        super().__init__(config_file='servers_console.json')
+        
+        # Status dashboard state; monitor output is suppressed while it is shown
+        self.dashboard_active = False
+        self.dashboard_page_seconds = 5
+        self._state_changed = threading.Event()
+        
+        # Monitor loop output: 'summary' prints transitions and one line per
+        # cycle, 'verbose' also prints every probe result. Lines are buffered
+        # and written once per cycle.
+        self.output_mode = 'summary'
+        self._output: List[str] = []
+        self._output_lock = threading.Lock()
+        self._cycle_started = time.monotonic()
+        self._cycle_transitions = 0
         
         # Setup signal handler for graceful shutdown
         signal.signal(signal.SIGINT, self.signal_handler)
+        if hasattr(signal, 'SIGUSR1'):
+            # Profile the next cycles without restarting: kill -USR1 <pid>
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.profiler.request(DEFAULT_PROFILE_CYCLES))
         
         logger.info("Console Server Monitor initialized")
     
-    def load_smtp_config(self) -> Dict[str, str]:
-        """Load SMTP configuration from environment variables."""
-        config = {
-            'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
-            'smtp_port': int(os.getenv('SMTP_PORT', '587')),
-            'smtp_username': os.getenv('SMTP_USERNAME', ''),
-            'smtp_password': os.getenv('SMTP_PASSWORD', ''),
-            'smtp_from': os.getenv('SMTP_FROM', ''),
-            'smtp_to': os.getenv('SMTP_TO', ''),
-            'smtp_use_tls': os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
-        }
-        
-        return config
-    
     def signal_handler(self, signum, frame):
         """Handle Ctrl+C gracefully."""
         print(f"\n{Colors.YELLOW}📡 Stopping monitoring...{Colors.RESET}")
@@ -94,6 +174,7 @@ class ConsoleServerMonitor:
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=5)
         self.save_servers()
+        self.close_state_store()
         print(f"{Colors.GREEN}✅ Monitoring stopped. Configuration saved.{Colors.RESET}")
         sys.exit(0)
     
@@ -124,19 +205,10 @@ class ConsoleServerMonitor:
             print(f"{Colors.RED}❌ Invalid input. Please enter a server IP or hostname.{Colors.RESET}")
             return
         
-        if server in self.servers:
+        if not self.add_server_entry(server):
             print(f"{Colors.YELLOW}⚠️  Server {server} is already being monitored.{Colors.RESET}")
             return
         
-        # Initialize server data
-        self.servers[server] = {
-            'status': None,
-            'last_check': None,
-            'response_time': 0,
-            'failures': 0,
-            'last_failure_email': None
-        }
-        
         print(f"{Colors.GREEN}✅ Added server: {server}{Colors.RESET}")
         self.save_servers()
     
@@ -160,7 +232,7 @@ class ConsoleServerMonitor:
             
             if 0 <= index < len(servers_list):
                 server = servers_list[index]
-                del self.servers[server]
+                self.remove_server_entry(server)
                 print(f"{Colors.GREEN}✅ Removed server: {server}{Colors.RESET}")
                 self.save_servers()
             else:
@@ -207,12 +279,10 @@ class ConsoleServerMonitor:
             print(f"{Colors.YELLOW}⚠️  Monitoring is already running.{Colors.RESET}")
             return
         
-        self.monitoring = True
         print(f"{Colors.GREEN}🚀 Starting monitoring...{Colors.RESET}")
         
         # Start monitoring thread
-        self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
-        self.monitor_thread.start()
+        self.start()
         
         print(f"{Colors.GREEN}✅ Monitoring started with {len(self.servers)} servers{Colors.RESET}")
         print(f"{Colors.CYAN}💡 Press Ctrl+C to stop monitoring{Colors.RESET}")
@@ -223,151 +293,79 @@ class ConsoleServerMonitor:
             print(f"{Colors.YELLOW}⚠️  Monitoring is not running.{Colors.RESET}")
             return
         
-        self.monitoring = False
         print(f"{Colors.YELLOW}🛑 Stopping monitoring...{Colors.RESET}")
         
-        if self.monitor_thread and self.monitor_thread.is_alive():
-            self.monitor_thread.join(timeout=5)
+        self.stop(timeout=5)
         
         print(f"{Colors.GREEN}✅ Monitoring stopped.{Colors.RESET}")
     
-    def monitor_loop(self):
-        """Main monitoring loop running in separate thread."""
-        while self.monitoring:
-            print(f"\n{Colors.CYAN}🔍 Checking servers... {datetime.now().strftime('%H:%M:%S')}{Colors.RESET}")
-            
-            for server in list(self.servers.keys()):
-                if not self.monitoring:
-                    break
-                
-                # Perform ping check
-                is_reachable, response_time = self.ping_server(server)
-                
-                # Update server status
-                self.update_server_status(server, is_reachable, response_time)
-                
-                # Check for failures and send email if needed
-                if not is_reachable:
-                    self.handle_server_failure(server)
-            
-            # Display summary
-            self.print_monitoring_summary()
-            
-            # Wait for next check interval
-            for i in range(self.check_interval):
-                if not self.monitoring:
-                    break
-                time.sleep(1)
+    def emit(self, line: str):
+        """Queue a line of monitor output for the next flush."""
+        with self._output_lock:
+            self._output.append(line)
     
-    def ping_server(self, server: str) -> tuple[bool, int]:
-        """Ping a server and return (is_reachable, response_time_ms)."""
-        try:
-            # Determine ping command based on platform
-            if platform.system().lower() == "windows":
-                cmd = ["ping", "-n", "1", "-w", "3000", server]
-            else:
-                cmd = ["ping", "-c", "1", "-W", "3", server]
-            
-            start_time = time.time()
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-            end_time = time.time()
-            
-            if result.returncode == 0:
-                response_time = int((end_time - start_time) * 1000)
-                return True, response_time
+    def flush_output(self):
+        """Write all queued monitor output with a single write call."""
+        with self._output_lock:
+            lines, self._output = self._output, []
+        
+        if lines and not self.dashboard_active:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+    
+    def on_cycle_start(self):
+        """Start the cycle timer and print the header in verbose mode."""
+        self._cycle_started = time.monotonic()
+        self._cycle_transitions = 0
+        if self.output_mode == 'verbose':
+            self.emit(f"\n{Colors.CYAN}🔍 Checking servers... {datetime.now().strftime('%H:%M:%S')}{Colors.RESET}")
+    
+    def on_cycle_complete(self, cycle_records: List[tuple]):
+        """Emit the cycle summary and flush the output buffer."""
+        if self.servers:
+            if self.output_mode == 'verbose':
+                self.emit(self.format_monitoring_summary())
             else:
-                return False, 0
-                
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError) as e:
-            logger.warning(f"Ping failed for {server}: {e}")
-            return False, 0
-    
-    def update_server_status(self, server: str, is_reachable: bool, response_time: int):
-        """Update server status in data structures."""
-        current_time = datetime.now()
-        
-        # Update server data
-        prev_status = self.servers[server]['status']
-        self.servers[server]['status'] = is_reachable
-        self.servers[server]['last_check'] = current_time
-        self.servers[server]['response_time'] = response_time
-        
-        if is_reachable:
-            # Reset failure count on successful ping
-            self.servers[server]['failures'] = 0
+                elapsed = time.monotonic() - self._cycle_started
+                self.emit(f"[{datetime.now().strftime('%H:%M:%S')}] {self.format_monitoring_summary()} | "
+                          f"Changes: {self._cycle_transitions} | Cycle: {elapsed:.1f}s")
+        self.flush_output()
+    
+    def on_status_update(self, server: str, prev_status: Optional[bool]):
+        """Emit the probe result in verbose mode."""
+        self._state_changed.set()
+        if self.output_mode != 'verbose':
+            return
+        
+        data = self.servers[server]
+        
+        if data['status']:
             status_text = f"{Colors.GREEN}✅ Online{Colors.RESET}"
         else:
-            # Increment failure count
-            self.servers[server]['failures'] += 1
             status_text = f"{Colors.RED}❌ Offline{Colors.RESET}"
         
-        # Print status update
+        response_time = data['response_time']
         time_info = f" ({response_time}ms)" if response_time > 0 else ""
-        print(f"   {server}: {status_text}{time_info}")
-        
-        # Log status change
-        if prev_status is not None and prev_status != is_reachable:
-            status_change = "came online" if is_reachable else "went offline"
-            print(f"{Colors.YELLOW}🔄 Server {server} {status_change}{Colors.RESET}")
+        self.emit(f"   {server}: {status_text}{time_info}")
     
-    def handle_server_failure(self, server: str):
-        """Handle server failure and send email if needed."""
-        server_data = self.servers[server]
-        
-        # Send email after max_failures consecutive failures
-        if (server_data['failures'] >= self.max_failures and 
-            self.is_smtp_configured() and
-            server_data['last_failure_email'] != server_data['failures']):
-            
-            self.send_failure_email(server, server_data['failures'])
-            server_data['last_failure_email'] = server_data['failures']
+    def on_transition(self, server: str, is_reachable: bool):
+        """Emit status change."""
+        self._cycle_transitions += 1
+        status_change = "came online" if is_reachable else "went offline"
+        self.emit(f"{Colors.YELLOW}🔄 Server {server} {status_change}{Colors.RESET}")
     
-    def is_smtp_configured(self) -> bool:
-        """Check if SMTP is properly configured."""
-        required_fields = ['smtp_username', 'smtp_password', 'smtp_from', 'smtp_to']
-        return all(self.smtp_config.get(field) for field in required_fields)
+    def on_alert_sent(self, server: str):
+        """Emit sent alerts."""
+        self.emit(f"{Colors.GREEN}📧 Email alert sent for {server}{Colors.RESET}")
     
-    def send_failure_email(self, server: str, failure_count: int):
-        """Send email notification for server failure."""
-        try:
-            # Create message
-            msg = MimeMultipart()
-            msg['From'] = self.smtp_config['smtp_from']
-            msg['To'] = self.smtp_config['smtp_to']
-            msg['Subject'] = f"Server Alert: {server} is unreachable"
-            
-            # Email body
-            body = f"""
-Server Monitoring Alert
-
-Server: {server}
-Status: UNREACHABLE
-Consecutive Failures: {failure_count}
-Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-Please investigate the server connectivity issue.
-
----
-This is an automated message from Console Server Monitor.
-            """.strip()
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Send email
-            server_smtp = smtplib.SMTP(self.smtp_config['smtp_server'], self.smtp_config['smtp_port'])
-            
-            if self.smtp_config['smtp_use_tls']:
-                server_smtp.starttls()
-            
-            server_smtp.login(self.smtp_config['smtp_username'], self.smtp_config['smtp_password'])
-            server_smtp.send_message(msg)
-            server_smtp.quit()
-            
-            print(f"{Colors.GREEN}📧 Email alert sent for {server}{Colors.RESET}")
-            
-        except Exception as e:
-            logger.error(f"Failed to send email for {server}: {e}")
-            print(f"{Colors.RED}❌ Failed to send email for {server}: {str(e)}{Colors.RESET}")
+    def on_alert_failed(self, server: str, error: Exception):
+        """Emit alerts that could not be sent."""
+        self.emit(f"{Colors.RED}❌ Failed to send email for {server}: {str(error)}{Colors.RESET}")
+    
+    def on_profile_written(self, paths: List[str]):
+        """Print where the profile reports were written."""
+        self.emit(f"{Colors.MAGENTA}🔬 Profile written: {', '.join(paths)}{Colors.RESET}")
+        self.flush_output()
     
     def test_email(self):
         """Test email configuration by sending a test message."""
@@ -377,35 +375,7 @@ This is an automated message from Console Server Monitor.
             return
         
         try:
-            msg = MimeMultipart()
-            msg['From'] = self.smtp_config['smtp_from']
-            msg['To'] = self.smtp_config['smtp_to']
-            msg['Subject'] = "Console Server Monitor - Test Email"
-            
-            body = f"""
-This is a test email from Console Server Monitor.
-
-Configuration:
-- SMTP Server: {self.smtp_config['smtp_server']}:{self.smtp_config['smtp_port']}
-- From: {self.smtp_config['smtp_from']}
-- To: {self.smtp_config['smtp_to']}
-- TLS: {self.smtp_config['smtp_use_tls']}
-
-Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-If you received this email, the SMTP configuration is working correctly.
-            """.strip()
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            server = smtplib.SMTP(self.smtp_config['smtp_server'], self.smtp_config['smtp_port'])
-            
-            if self.smtp_config['smtp_use_tls']:
-                server.starttls()
-            
-            server.login(self.smtp_config['smtp_username'], self.smtp_config['smtp_password'])
-            server.send_message(msg)
-            server.quit()
+            self.send_test_email()
             
             print(f"{Colors.GREEN}✅ Test email sent successfully!{Colors.RESET}")
             print(f"{Colors.CYAN}📧 Check {self.smtp_config['smtp_to']} for the test message.{Colors.RESET}")
@@ -425,11 +395,14 @@ If you received this email, the SMTP configuration is working correctly.
         print(f"SMTP From: {self.smtp_config['smtp_from']}")
         print(f"SMTP To: {self.smtp_config['smtp_to']}")
         print(f"SMTP TLS: {self.smtp_config['smtp_use_tls']}")
+        print(f"Output Mode: {self.output_mode}")
         
         print(f"\n{Colors.BOLD}Change Settings:{Colors.RESET}")
         print(f"{Colors.GREEN}1.{Colors.RESET} Check Interval")
         print(f"{Colors.GREEN}2.{Colors.RESET} Max Failures")
-        print(f"{Colors.GREEN}3.{Colors.RESET} Back to Main Menu")
+        print(f"{Colors.GREEN}3.{Colors.RESET} Output Mode (summary/verbose)")
+        print(f"{Colors.GREEN}4.{Colors.RESET} Profile Cycles (CPU and memory)")
+        print(f"{Colors.GREEN}5.{Colors.RESET} Back to Main Menu")
         
         choice = input(f"\n{Colors.CYAN}Select option: {Colors.RESET}").strip()
         
@@ -456,109 +429,151 @@ If you received this email, the SMTP configuration is working correctly.
                     print(f"{Colors.RED}❌ Max failures must be at least 1{Colors.RESET}")
             except ValueError:
                 print(f"{Colors.RED}❌ Invalid input. Please enter a number.{Colors.RESET}")
+        
+        elif choice == "3":
+            mode = input(f"Enter output mode (summary/verbose) [{self.output_mode}]: ").strip().lower() or self.output_mode
+            if mode in ('summary', 'verbose'):
+                self.output_mode = mode
+                print(f"{Colors.GREEN}✅ Output mode set to {mode}{Colors.RESET}")
+                self.save_servers()
+            else:
+                print(f"{Colors.RED}❌ Output mode must be 'summary' or 'verbose'{Colors.RESET}")
+        
+        elif choice == "4":
+            try:
+                cycles = int(input(f"Number of cycles to profile [{DEFAULT_PROFILE_CYCLES}]: ").strip() or DEFAULT_PROFILE_CYCLES)
+                if cycles >= 1:
+                    self.profiler.request(cycles)
+                    print(f"{Colors.GREEN}✅ Profiling the next {cycles} cycles; reports go to {self.profiler.output_dir}/{Colors.RESET}")
+                    if not self.monitoring:
+                        print(f"{Colors.CYAN}💡 Profiling starts when monitoring runs{Colors.RESET}")
+                else:
+                    print(f"{Colors.RED}❌ Cycles must be at least 1{Colors.RESET}")
+            except ValueError:
+                print(f"{Colors.RED}❌ Invalid input. Please enter a number.{Colors.RESET}")
+    
+    def format_monitoring_summary(self) -> str:
+        """Return a one-line summary of current monitoring status."""
+        counts = self.aggregates.counts()
+        rtt = self.aggregates.rtt_stats('online')
+        rtt_text = f" | Avg RTT: {rtt['mean']:.0f}ms" if rtt['count'] else ""
+        
+        return (f"{Colors.BOLD}📊 Summary:{Colors.RESET} "
+                f"{Colors.GREEN}Online: {counts['online']}{Colors.RESET} | "
+                f"{Colors.RED}Offline: {counts['offline']}{Colors.RESET} | "
+                f"{Colors.YELLOW}Unknown: {counts['unknown']}{Colors.RESET}{rtt_text}")
     
     def print_monitoring_summary(self):
         """Print a summary of current monitoring status."""
         if not self.servers:
             return
         
-        online_count = sum(1 for s in self.servers.values() if s['status'] is True)
-        offline_count = sum(1 for s in self.servers.values() if s['status'] is False)
-        unknown_count = sum(1 for s in self.servers.values() if s['status'] is None)
+        print(self.format_monitoring_summary())
+    
+    def dashboard_lines(self, rows: int) -> List[str]:
+        """
+        Build one dashboard frame that fits in the given number of terminal rows.
+        
+        When there are more servers than rows, the server list is split into
+        pages that rotate every dashboard_page_seconds.
+        """
+        lines = [
+            f"{Colors.BOLD}📊 Server Status Dashboard - {datetime.now().strftime('%H:%M:%S')}{Colors.RESET}",
+            f"{Colors.CYAN}{'='*80}{Colors.RESET}"
+        ]
+        
+        if not self.servers:
+            lines.append(f"{Colors.RED}❌ No servers configured{Colors.RESET}")
+            return lines
+        
+        # Header, separator, footer separator, summary, status, monitor and page lines
+        per_page = max(1, rows - 7)
+        servers = list(self.servers.items())
+        pages = (len(servers) + per_page - 1) // per_page
+        page = int(time.monotonic() // self.dashboard_page_seconds) % pages
         
-        print(f"{Colors.BOLD}📊 Summary:{Colors.RESET} "
-              f"{Colors.GREEN}Online: {online_count}{Colors.RESET} | "
-              f"{Colors.RED}Offline: {offline_count}{Colors.RESET} | "
-              f"{Colors.YELLOW}Unknown: {unknown_count}{Colors.RESET}")
+        for server, data in servers[page * per_page:(page + 1) * per_page]:
+            status = data['status']
+            last_check = data['last_check']
+            response_time = data['response_time']
+            
+            if status is None:
+                status_text = f"{Colors.YELLOW}❓ Unknown{Colors.RESET}"
+            elif status:
+                status_text = f"{Colors.GREEN}✅ Online{Colors.RESET}"
+            else:
+                status_text = f"{Colors.RED}❌ Offline{Colors.RESET}"
+            
+            last_check_text = last_check.strftime("%H:%M:%S") if last_check else "Never"
+            response_text = f"{response_time}ms" if response_time > 0 else "-"
+            
+            lines.append(f"{Colors.BOLD}{server[:25]:<25}{Colors.RESET} {status_text:<20} "
+                         f"Last: {last_check_text:<10} Time: {response_text:<10} "
+                         f"Failures: {data['failures']}")
+        
+        lines.append(f"{Colors.CYAN}{'-'*80}{Colors.RESET}")
+        lines.append(self.format_monitoring_summary())
+        
+        monitoring_status = f"{Colors.GREEN}Running{Colors.RESET}" if self.monitoring else f"{Colors.RED}Stopped{Colors.RESET}"
+        lines.append(f"Monitoring: {monitoring_status} | Interval: {self.check_interval}s | Max Failures: {self.max_failures}")
+        lines.append(f"Monitor: {self.instrumentation.summary()} | Buffered: {len(self._output)}")
+        
+        if pages > 1:
+            lines.append(f"{Colors.CYAN}Page {page + 1}/{pages} - press Ctrl+C to return to main menu{Colors.RESET}")
+        else:
+            lines.append(f"{Colors.CYAN}Press Ctrl+C to return to main menu{Colors.RESET}")
+        return lines
     
     def status_dashboard(self):
-        """Show real-time status dashboard."""
-        print(f"\n{Colors.BOLD}📊 Real-time Status Dashboard{Colors.RESET}")
-        print(f"{Colors.CYAN}Press Ctrl+C to return to main menu{Colors.RESET}")
+        """Show real-time status dashboard, redrawn when server state changes."""
+        renderer = DashboardRenderer()
+        renderer.start()
+        self.dashboard_active = True
         
         try:
             while True:
-                # Clear screen (works on most terminals)
-                os.system('clear' if os.name == 'posix' else 'cls')
-                
-                print(f"{Colors.BOLD}📊 Server Status Dashboard - {datetime.now().strftime('%H:%M:%S')}{Colors.RESET}")
-                print(f"{Colors.CYAN}{'='*80}{Colors.RESET}")
-                
-                if not self.servers:
-                    print(f"{Colors.RED}❌ No servers configured{Colors.RESET}")
-                    time.sleep(2)
-                    continue
-                
-                # Print server status
-                for server, data in self.servers.items():
-                    status = data['status']
-                    last_check = data['last_check']
-                    response_time = data['response_time']
-                    failures = data['failures']
-                    
-                    if status is None:
-                        status_text = f"{Colors.YELLOW}❓ Unknown{Colors.RESET}"
-                    elif status:
-                        status_text = f"{Colors.GREEN}✅ Online{Colors.RESET}"
-                    else:
-                        status_text = f"{Colors.RED}❌ Offline{Colors.RESET}"
-                    
-                    last_check_text = last_check.strftime("%H:%M:%S") if last_check else "Never"
-                    response_text = f"{response_time}ms" if response_time > 0 else "-"
-                    
-                    print(f"{Colors.BOLD}{server:<25}{Colors.RESET} {status_text:<20} "
-                          f"Last: {last_check_text:<10} Time: {response_text:<10} "
-                          f"Failures: {failures}")
-                
-                # Print summary
-                print(f"\n{Colors.CYAN}{'-'*80}{Colors.RESET}")
-                self.print_monitoring_summary()
+                frame_start = time.monotonic()
+                renderer.render(self.dashboard_lines(renderer.rows))
                 
-                monitoring_status = f"{Colors.GREEN}Running{Colors.RESET}" if self.monitoring else f"{Colors.RED}Stopped{Colors.RESET}"
-                print(f"Monitoring: {monitoring_status} | Interval: {self.check_interval}s | Max Failures: {self.max_failures}")
+                # Wake up on the next status change, or after a second to
+                # advance the clock and rotate pages
+                self._state_changed.wait(timeout=1.0)
+                self._state_changed.clear()
                 
-                time.sleep(2)
+                # Coalesce bursts of updates into at most 5 frames per second
+                time.sleep(max(0.0, 0.2 - (time.monotonic() - frame_start)))
                 
         except KeyboardInterrupt:
-            print(f"\n{Colors.CYAN}Returning to main menu...{Colors.RESET}")
+            pass
+        finally:
+            self.dashboard_active = False
+            renderer.stop()
+        
+        print(f"\n{Colors.CYAN}Returning to main menu...{Colors.RESET}")
     
-    def save_servers(self):
-        """Save server list to file."""
-        try:
-            servers_data = {
-                'servers': list(self.servers.keys()),
-                'check_interval': self.check_interval,
-                'max_failures': self.max_failures
-            }
-            
-            with open('servers_console.json', 'w') as f:
-                json.dump(servers_data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save servers: {e}")
+    def queue_depths(self) -> Dict[str, int]:
+        """Report the monitor output lines waiting to be written."""
+        return {'output_buffer': len(self._output)}
     
-    def load_servers(self):
-        """Load server list from file."""
-        try:
-            if os.path.exists('servers_console.json'):
-                with open('servers_console.json', 'r') as f:
-                    data = json.load(f)
-                
-                self.check_interval = data.get('check_interval', 30)
-                self.max_failures = data.get('max_failures', 3)
-                
-                for server in data.get('servers', []):
-                    self.servers[server] = {
-                        'status': None,
-                        'last_check': None,
-                        'response_time': 0,
-                        'failures': 0,
-                        'last_failure_email': None
-                    }
-                
-                if self.servers:
-                    print(f"{Colors.GREEN}✅ Loaded {len(self.servers)} servers from saved configuration{Colors.RESET}")
-        except Exception as e:
-            logger.error(f"Failed to load servers: {e}")
+    def get_settings(self) -> Dict[str, object]:
+        """Return monitoring settings plus the output mode."""
+        settings = super().get_settings()
+        settings['output_mode'] = self.output_mode
+        return settings
+    
+    def apply_settings(self, data: Dict):
+        """Apply monitoring settings and the output mode."""
+        super().apply_settings(data)
+        mode = data.get('output_mode', 'summary')
+        self.output_mode = mode if mode in ('summary', 'verbose') else 'summary'
+    
+    def load_servers(self) -> int:
+        """Load saved servers and report how many were found."""
+        count = super().load_servers()
+        
+        if count:
+            print(f"{Colors.GREEN}✅ Loaded {count} servers from saved configuration{Colors.RESET}")
+        return count
     
     def run(self):
         """Main application loop."""
@@ -598,6 +613,7 @@ If you received this email, the SMTP configuration is working correctly.
                     if self.monitoring:
                         self.stop_monitoring()
                     self.save_servers()
+                    self.close_state_store()
                     break
                 else:
                     print(f"{Colors.RED}❌ Invalid option. Please select 1-9.{Colors.RESET}")
@@ -607,25 +623,18 @@ If you received this email, the SMTP configuration is working correctly.
                 if self.monitoring:
                     self.stop_monitoring()
                 self.save_servers()
+                self.close_state_store()
                 print(f"{Colors.GREEN}✅ Application stopped. Configuration saved.{Colors.RESET}")
                 break
             except Exception as e:
                 print(f"{Colors.RED}❌ Error: {str(e)}{Colors.RESET}")
                 logger.error(f"Application error: {e}")
 
-def load_env_file():
-    """Load environment variables from .env file if it exists."""
-    env_file = '.env'
-    if os.path.exists(env_file):
-        with open(env_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
-
 def main():
     """Main function to run the console application."""
+    # JSON lines log file written by a background thread
+    configure_logging('server_monitor_console.log')
+    
     # Load environment variables from .env file
     load_env_file()
     
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Server Availability Monitor - Daemon Version
+Non-interactive monitor for systemd units, containers and other supervisors.
+
+Monitoring starts immediately with the servers from the command line and/or
+a JSON config file (same format as servers_console.json). Every event is
+written to stdout as one JSON object per line; log messages go to stderr.
+
+Features:
+- No prompts; configuration via arguments, config file and environment
+- Clean shutdown on SIGTERM/SIGINT: the running probe and any pending
+  alert are completed and the last cycle is persisted before exit
+- PID file and systemd readiness notification (Type=notify)
+- Profiling of N cycles with --profile-cycles, or on SIGUSR1 while running
+- Live reload on SIGHUP, or when the config file changes with
+  --watch-config; only added/removed servers and changed settings are
+  applied, running servers keep their state
+- Probing in N worker processes with --workers, for very large fleets
+- Agent mode with --aggregator: probe agents in several zones report to
+  this monitor and servers are down only when a quorum agrees
+
+Example:
+    python server_monitor_daemon.py --config servers_console.json \\
+        --interval 30 --pid-file /run/server-monitor.pid
+
+    # One-shot check; exit code 1 if any server is unreachable
+    python server_monitor_daemon.py probe 10.0.1.10 10.0.1.11:443
+
+    # systemd unit
+    [Service]
+    Type=notify
+    ExecStart=/usr/bin/python3 /opt/monitor/server_monitor_daemon.py --config /etc/server-monitor.json
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import sys
+import json
+import signal
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from monitor_engine import MonitorEngine, load_env_file, probe_server
+from cycle_profiler import DEFAULT_PROFILE_CYCLES
+
+logger = logging.getLogger(__name__)
+
+
+def sd_notify(state: str) -> bool:
+    """
+    Send a state string to systemd if running under a Type=notify unit.
+
+    Returns:
+        True if the notification was sent
+    """
+    address = os.getenv('NOTIFY_SOCKET')
+    if not address:
+        return False
+
+    # Abstract namespace sockets are given with a leading '@'
+    if address.startswith('@'):
+        address = '\0' + address[1:]
+
+    import socket
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(state.encode())
+        return True
+    except OSError as e:
+        logger.warning(f"sd_notify failed: {e}")
+        return False
+
+
+def write_pid_file(path: str):
+    """Write the PID file, refusing to start if another instance is alive."""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                pid = int(f.read().strip())
+            os.kill(pid, 0)
+            alive = True
+        except (ValueError, ProcessLookupError):
+            alive = False  # Stale PID file
+        except PermissionError:
+            alive = True  # Running under another user
+
+        if alive:
+            raise RuntimeError(f"PID file {path} belongs to running process {pid}")
+
+    with open(path, 'w') as f:
+        f.write(f"{os.getpid()}\n")
+
+
+def remove_pid_file(path: str):
+    """Remove the PID file if it still belongs to this process."""
+    try:
+        with open(path, 'r') as f:
+            if int(f.read().strip()) != os.getpid():
+                return
+        os.remove(path)
+    except (OSError, ValueError):
+        pass
+
+
+class DaemonServerMonitor(MonitorEngine):
+    """Monitor without a user interface that reports events as JSON lines."""
+
+    app_name = "Server Monitor Daemon"
+
+    def __init__(self, config_file: str = 'servers_console.json', verbose: bool = False,
+                 stream=None):
+        super().__init__(config_file=config_file)
+
+        self.verbose = verbose
+        self.stream = stream or sys.stdout
+        self._output: List[str] = []
+
+        # Command line servers and settings, kept across reloads but never
+        # saved as configuration
+        self.extra_servers: List[str] = []
+        self.setting_overrides: Dict[str, object] = {}
+        # The configuration as last read, before the command line was merged in
+        self._configured: Dict = {}
+
+        # Number of cycles profiled on SIGUSR1
+        self.profile_cycles = DEFAULT_PROFILE_CYCLES
+
+        # Whether the agents could reach the quorum at the last cycle
+        self._quorum_reachable: Optional[bool] = None
+
+        # Signal that stopped monitoring; logged once the loop has returned
+        self._stop_signal: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Structured output
+    # ------------------------------------------------------------------
+
+    def emit(self, event: str, **fields):
+        """Queue one JSON event line; lines are written once per cycle."""
+        record = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'event': event}
+        record.update(fields)
+        self._output.append(json.dumps(record))
+
+    def flush_output(self):
+        """Write all queued events with a single write call."""
+        lines, self._output = self._output, []
+        if lines:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+
+    def on_status_update(self, server: str, prev_status: Optional[bool]):
+        """Emit every probe result in verbose mode."""
+        if self.verbose:
+            data = self.servers[server]
+            self.emit('probe', server=server, reachable=data['status'],
+                      response_time_ms=data['response_time'], failures=data['failures'])
+
+    def on_transition(self, server: str, is_reachable: bool):
+        """Emit status changes."""
+        self.emit('transition', server=server, status='online' if is_reachable else 'offline')
+
+    def on_cycle_complete(self, cycle_records: List[tuple]):
+        """Emit the cycle summary and flush the output buffer."""
+        fleet = self.aggregates.snapshot()
+        agents = self.aggregator.status() if self.aggregator else None
+        if agents and agents['votes']:
+            previous, self._quorum_reachable = self._quorum_reachable, agents['quorum_reachable']
+            if previous is not None and previous != self._quorum_reachable:
+                self.emit('quorum', reachable=self._quorum_reachable, voting=agents['voting'],
+                          quorum=agents['quorum'])
+        self.emit('cycle', probes=len(cycle_records), servers=fleet['total'],
+                  **{state: data['servers'] for state, data in fleet['states'].items()},
+                  rtt_ms=fleet['states']['online']['rtt'], groups=fleet['groups'] or None,
+                  monitor=self.instrumentation_snapshot(), agents=agents)
+        self.flush_output()
+
+    def on_alert_sent(self, server: str):
+        """Emit sent alerts."""
+        self.emit('alert_sent', server=server, failures=self.servers[server]['failures'])
+
+    def on_alert_failed(self, server: str, error: Exception):
+        """Emit alerts that could not be sent."""
+        self.emit('alert_failed', server=server, error=str(error))
+
+    def on_profile_written(self, paths: List[str]):
+        """Emit the paths of a finished profile."""
+        self.emit('profile', files=paths)
+        self.flush_output()
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Report the event lines waiting to be written."""
+        return {'output_buffer': len(self._output)}
+
+    def on_config_reloaded(self, added: List[str], removed: List[str],
+                           changed: Dict[str, Tuple[object, object]]):
+        """Emit the applied configuration diff right away."""
+        self.emit('reload', added=added, removed=removed,
+                  changed={key: {'old': old, 'new': new} for key, (old, new) in changed.items()})
+        self.flush_output()
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+
+    def read_config_file(self) -> Dict:
+        """Read the config file and merge in the command line servers and settings."""
+        self._configured = dict(super().read_config_file())
+        data = dict(self._configured)
+        data['servers'] = list(data.get('servers', [])) + self.extra_servers
+        data.update(self.setting_overrides)
+        return data
+
+    def persisted_inventory(self) -> Tuple[List[str], Dict[str, object]]:
+        """Leave the command line servers and settings out of the saved configuration."""
+        servers, settings = super().persisted_inventory()
+
+        configured = set(self._configured.get('servers', []))
+        extra = set(self.extra_servers) - configured
+        servers = [server for server in servers if server not in extra]
+
+        # Overridden settings keep their configured value; without one the
+        # stored value is left alone
+        for key in self.setting_overrides:
+            if key in self._configured:
+                settings[key] = self._configured[key]
+            else:
+                settings.pop(key, None)
+        return servers, settings
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def handle_reload_signal(self, signum, frame):
+        """Reload the configuration at the monitor loop's next safe point."""
+        self.request_reload()
+
+    def handle_profile_signal(self, signum, frame):
+        """Profile the next profile_cycles cycles."""
+        self.profiler.request(self.profile_cycles)
+
+    def handle_shutdown_signal(self, signum, frame):
+        """
+        Request a graceful stop.
+
+        The monitor loop finishes the probe and alert in progress, records
+        the partial cycle and then returns to run().
+        """
+        if self.monitoring:
+            self.monitoring = False
+            self._stop_signal = signum
+            sd_notify("STOPPING=1")
+
+    def run(self) -> int:
+        """Monitor in the calling thread until a shutdown signal arrives."""
+        signal.signal(signal.SIGTERM, self.handle_shutdown_signal)
+        signal.signal(signal.SIGINT, self.handle_shutdown_signal)
+        signal.signal(signal.SIGHUP, self.handle_reload_signal)
+        signal.signal(signal.SIGUSR1, self.handle_profile_signal)
+
+        if not self.servers:
+            logger.error("No servers configured; use --servers or --config")
+            return 1
+
+        self.monitoring = True
+        self.emit('started', pid=os.getpid(), servers=len(self.servers),
+                  check_interval=self.check_interval, max_failures=self.max_failures,
+                  smtp_configured=self.is_smtp_configured(),
+                  workers=self.shard_pool.size if self.shard_pool else 0,
+                  aggregator=f"{self.aggregator.host}:{self.aggregator.port}" if self.aggregator else None)
+        self.flush_output()
+        sd_notify(f"READY=1\nSTATUS=Monitoring {len(self.servers)} servers")
+
+        try:
+            self.monitor_loop()
+        finally:
+            self.monitoring = False
+            if self._stop_signal is not None:
+                logger.info(f"Stopping after {signal.Signals(self._stop_signal).name}")
+            self.close()
+            self.emit('stopped')
+            self.flush_output()
+
+        return 0
+
+    def close(self):
+        """Close every optional component; safe to call more than once."""
+        self.close_state_store()
+        self.close_metrics_exporter()
+        self.close_status_api()
+        self.close_shard_pool()
+        self.close_aggregator()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse daemon command line arguments."""
+    parser = argparse.ArgumentParser(description="Non-interactive server availability monitor")
+    parser.add_argument('--config', default='servers_console.json',
+                        help="JSON config file with servers and settings (default: %(default)s). "
+                             "With SERVER_MONITOR_DB set, the state store is used at startup and on "
+                             "reload unless this file was modified after it was last imported")
+    parser.add_argument('--servers', default='',
+                        help="Comma-separated servers to monitor in addition to the config file")
+    parser.add_argument('--interval', type=int,
+                        help="Seconds between checks (minimum 5; overrides the config file)")
+    parser.add_argument('--max-failures', type=int,
+                        help="Consecutive failures before an email alert (overrides the config file)")
+    parser.add_argument('--env-file', default='.env',
+                        help="File with SMTP environment variables (default: %(default)s)")
+    parser.add_argument('--metrics', metavar='[HOST:]PORT',
+                        help="Serve Prometheus metrics on /metrics (default: SERVER_MONITOR_METRICS)")
+    parser.add_argument('--api', metavar='[HOST:]PORT',
+                        help="Serve the JSON status API (default: SERVER_MONITOR_API)")
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help="Probe in N worker processes, 0 for none (default: SERVER_MONITOR_WORKERS)")
+    parser.add_argument('--aggregator', metavar='[HOST:]PORT',
+                        help="Agent mode: take probe results from agents on this address "
+                             "(default: SERVER_MONITOR_AGGREGATOR)")
+    parser.add_argument('--quorum', type=int, metavar='N',
+                        help="Agents that must see a failure in agent mode "
+                             "(default: SERVER_MONITOR_QUORUM, else a majority of agents)")
+    parser.add_argument('--profile-cycles', type=int, metavar='N',
+                        help="Profile the first N cycles; SIGUSR1 profiles N more "
+                             f"(default N for SIGUSR1: {DEFAULT_PROFILE_CYCLES})")
+    parser.add_argument('--profile-dir',
+                        help="Directory for profile reports (default: SERVER_MONITOR_PROFILE_DIR or ./profiles)")
+    parser.add_argument('--pid-file', help="Write the process ID to this file")
+    parser.add_argument('--watch-config', action='store_true',
+                        help="Reload the config file automatically when it changes")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Emit a 'probe' event for every probe result")
+    parser.add_argument('--log-file', help="Also write JSON log lines to this file (rotated at 10 MB)")
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="Log level for stderr logging (default: %(default)s)")
+
+    args = parser.parse_args(argv)
+    if args.interval is not None and args.interval < 5:
+        parser.error("--interval must be at least 5 seconds")
+    if args.max_failures is not None and args.max_failures < 1:
+        parser.error("--max-failures must be at least 1")
+    if args.workers is not None and args.workers < 0:
+        parser.error("--workers must not be negative")
+    if args.quorum is not None and args.quorum < 1:
+        parser.error("--quorum must be at least 1")
+    if args.profile_cycles is not None and args.profile_cycles < 1:
+        parser.error("--profile-cycles must be at least 1")
+    return args
+
+
+def probe_main(argv: List[str]) -> int:
+    """
+    Probe servers once and print the results, for scripts and cron jobs.
+
+    Returns:
+        0 if every server is reachable, 1 otherwise
+    """
+    parser = argparse.ArgumentParser(prog='server_monitor_daemon.py probe',
+                                     description="Probe servers once and print the results")
+    parser.add_argument('servers', nargs='+', metavar='server',
+                        help="host (ping), host:port (TCP), http(s)://... (GET) or udp://host:port")
+    parser.add_argument('--json', action='store_true', help="Print one JSON object per server")
+    parser.add_argument('--env-file', default='.env',
+                        help="File with environment variables, e.g. SERVER_MONITOR_PROBE_TIMEOUT")
+    args = parser.parse_args(argv)
+
+    load_env_file(args.env_file)
+
+    all_reachable = True
+    for server in args.servers:
+        is_reachable, response_time = probe_server(server)
+        all_reachable = all_reachable and is_reachable
+        if args.json:
+            print(json.dumps({'server': server, 'reachable': is_reachable, 'response_time_ms': response_time}))
+        elif is_reachable:
+            print(f"✅ {server}: online ({response_time}ms)")
+        else:
+            print(f"❌ {server}: offline")
+    return 0 if all_reachable else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the daemon, or a one-shot probe with 'probe'; returns the process exit code."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['probe']:
+        return probe_main(argv[1:])
+
+    args = parse_args(argv)
+
+    # Imported here so one-shot probes skip the logging machinery
+    from log_setup import configure_logging
+
+    # stdout carries the JSON event stream, so logs go to stderr and the
+    # optional JSON lines log file
+    configure_logging(args.log_file, level=getattr(logging, args.log_level), stream=sys.stderr)
+
+    load_env_file(args.env_file)
+
+    daemon = DaemonServerMonitor(config_file=args.config, verbose=args.verbose)
+    pid_file_written = False
+    # Components opened before an early exit are torn down like on a normal
+    # shutdown, so no sockets, worker processes or PID file are left behind
+    try:
+        daemon.watch_config = args.watch_config
+        if args.profile_dir:
+            daemon.profiler.output_dir = args.profile_dir
+        if args.profile_cycles:
+            daemon.profile_cycles = args.profile_cycles
+            daemon.profiler.request(args.profile_cycles)
+        if args.metrics:
+            from metrics_exporter import open_metrics_exporter
+            daemon.close_metrics_exporter()
+            daemon.metrics = open_metrics_exporter(args.metrics)
+        if args.api:
+            from status_api import open_status_api
+            daemon.close_status_api()
+            daemon.status_api = open_status_api(args.api)
+        if args.workers is not None:
+            from shard_pool import open_shard_pool
+            daemon.close_shard_pool()
+            daemon.shard_pool = open_shard_pool(daemon.prober, str(args.workers),
+                                                observe_probes=daemon.instrumentation.observe_probes)
+        if args.aggregator:
+            from quorum_aggregator import open_aggregator
+            daemon.close_aggregator()
+            daemon.aggregator = open_aggregator(args.aggregator, args.quorum,
+                                                observe_probes=daemon.instrumentation.observe_probes)
+        elif args.quorum is not None and daemon.aggregator:
+            daemon.aggregator.quorum = args.quorum
+        if (args.aggregator or os.getenv('SERVER_MONITOR_AGGREGATOR', '').strip()) and not daemon.aggregator:
+            # Probing locally instead would page on single-vantage failures
+            logger.error("Agent mode requested but the aggregator could not be started")
+            return 1
+        daemon.load_servers()
+
+        daemon.extra_servers = [server.strip() for server in args.servers.split(',') if server.strip()]
+        for server in daemon.extra_servers:
+            daemon.add_server_entry(server)
+        if args.interval is not None:
+            daemon.setting_overrides['check_interval'] = args.interval
+        if args.max_failures is not None:
+            daemon.setting_overrides['max_failures'] = args.max_failures
+        daemon.apply_settings({**daemon.get_settings(), **daemon.setting_overrides})
+
+        # The command line is not configuration: its hosts only get ids so
+        # their probe results can be recorded
+        if daemon.extra_servers and daemon.state_store:
+            daemon.state_store.register_hosts(daemon.extra_servers)
+
+        if args.pid_file:
+            try:
+                write_pid_file(args.pid_file)
+            except (OSError, RuntimeError) as e:
+                logger.error(f"Cannot write PID file: {e}")
+                return 1
+            pid_file_written = True
+
+        return daemon.run()
+    finally:
+        daemon.close()
+        if pid_file_written:
+            remove_pid_file(args.pid_file)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -109,7 +109,7 @@ def test_email_config(server, port, username, password, from_email, to_email, us
         print("\n🧪 Testing email configuration...")
         
         # Create test message
-        msg = MimeMultipart()
+        msg = MIMEMultipart()
         msg['From'] = from_email
         msg['To'] = to_email
         msg['Subject'] = "Server Monitor - Configuration Test"
@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Shard Pool
+Probes servers in several worker processes, for fleets where a single
+process runs out of CPU.
+
+Servers are assigned to workers with a consistent-hash ring: every worker
+owns DEFAULT_VNODES points (virtual nodes) on the ring and a server
+belongs to the worker owning the next point after the server's hash. Adding
+or removing one of N workers therefore moves only about 1/N of the
+servers, and a worker keeps its servers across restarts.
+
+Workers probe their shard with a small thread pool and send results back
+in compact batches (packed server positions and response times). The
+monitor process applies them as they arrive, so failure counting, alerts,
+persistence and the UI stay in one place.
+
+Enable with SERVER_MONITOR_WORKERS=<n> or the daemon's --workers option.
+Workers use the engine's `prober`, which must be picklable (the default
+probe_server is).
+
+Usage:
+    SERVER_MONITOR_WORKERS=4 python server_monitor_daemon.py --config servers_console.json
+    python shard_pool.py --hosts 50000 --workers 4   # ring balance and moves on resize
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import sys
+import time
+import queue
+import bisect
+import signal
+import hashlib
+import logging
+import argparse
+import multiprocessing
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Prober = Callable[[str], Tuple[bool, int]]
+
+DEFAULT_VNODES = 160
+DEFAULT_WORKER_THREADS = 32
+
+# A worker sends a batch when it has this many results, or when the
+# oldest unsent result is BATCH_INTERVAL seconds old
+BATCH_SIZE = 512
+BATCH_INTERVAL = 0.2
+
+# How often the monitor checks for dead workers while waiting for results
+WORKER_CHECK_INTERVAL = 1.0
+WORKER_STOP_TIMEOUT = 5.0
+
+
+def ring_hash(key: str) -> int:
+    """Stable 64-bit hash of a key; unlike hash(), the same in every process."""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent-hash ring mapping keys to nodes through virtual nodes."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = DEFAULT_VNODES):
+        self.vnodes = max(1, int(vnodes))
+        self.nodes: List[str] = []
+        self._ring: List[Tuple[int, str]] = []
+        self._points: List[int] = []
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: str):
+        """Add a node and its virtual nodes; does nothing if already present."""
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        self._ring.extend((ring_hash(f"{node}#{replica}"), node) for replica in range(self.vnodes))
+        self._rebuild()
+
+    def remove_node(self, node: str):
+        """Remove a node; its keys move to the nodes following its points."""
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        self._ring = [point for point in self._ring if point[1] != node]
+        self._rebuild()
+
+    def _rebuild(self):
+        self._ring.sort()
+        self._points = [point for point, _ in self._ring]
+
+    def node_for(self, key: str) -> str:
+        """Return the node owning a key."""
+        if not self._ring:
+            raise ValueError("hash ring has no nodes")
+        index = bisect.bisect(self._points, ring_hash(key)) % len(self._points)
+        return self._ring[index][1]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Split keys by owning node, keeping their order."""
+        shards: Dict[str, List[str]] = {node: [] for node in self.nodes}
+        for key in keys:
+            shards[self.node_for(key)].append(key)
+        return shards
+
+
+class _ForwardHandler(logging.Handler):
+    """Hand log records from workers to the monitor's own loggers."""
+
+    def emit(self, record: logging.LogRecord):
+        logging.getLogger(record.name).handle(record)
+
+
+def _safe_probe(prober: Prober, server: str) -> Tuple[bool, int, float]:
+    started = time.monotonic()
+    try:
+        is_reachable, response_time = prober(server)
+    except Exception:
+        is_reachable, response_time = False, 0
+    return is_reachable, response_time, time.monotonic() - started
+
+
+def _probe_shard(name: str, cycle: int, shard: List[str], prober: Prober,
+                 executor: ThreadPoolExecutor, conn, results) -> bool:
+    """
+    Probe one shard and stream the results; returns True if told to stop.
+
+    A batch is a packed array of (position in shard, value) pairs, where
+    value is the response time of a reachable server and -1 - response
+    time of an unreachable one. It is sent with the seconds its probes
+    spent in the prober.
+    """
+    # Finished probes are queued by their callbacks, so collecting a result
+    # does not depend on the number still running
+    completed: 'queue.SimpleQueue[Tuple[int, Future]]' = queue.SimpleQueue()
+    futures = []
+    for position, server in enumerate(shard):
+        future = executor.submit(_safe_probe, prober, server)
+        future.add_done_callback(lambda future, position=position: completed.put((position, future)))
+        futures.append(future)
+
+    remaining = len(futures)
+    batch = array('l')
+    batch_probe_seconds = 0.0
+    batch_started = time.monotonic()
+    stop = False
+
+    while remaining:
+        try:
+            position, future = completed.get(timeout=BATCH_INTERVAL)
+            while True:
+                is_reachable, response_time, probe_seconds = future.result()
+                batch.append(position)
+                batch.append(response_time if is_reachable else -1 - response_time)
+                batch_probe_seconds += probe_seconds
+                remaining -= 1
+                if len(batch) >= 2 * BATCH_SIZE:
+                    break
+                position, future = completed.get_nowait()
+        except queue.Empty:
+            pass
+
+        if batch and (len(batch) >= 2 * BATCH_SIZE or not remaining or
+                      time.monotonic() - batch_started >= BATCH_INTERVAL):
+            results.put((name, cycle, batch.tobytes(), batch_probe_seconds))
+            batch = array('l')
+            batch_probe_seconds = 0.0
+            batch_started = time.monotonic()
+
+        # Only 'cancel' and 'stop' arrive while a cycle is running
+        if conn.poll():
+            message = conn.recv()
+            stop = message[0] == 'stop'
+            if stop or message[1] == cycle:
+                for future in futures:
+                    future.cancel()
+                break
+
+    results.put((name, cycle, None, 0.0))
+    return stop
+
+
+def _worker_main(name: str, prober: Prober, threads: int, conn, results, log_queue, log_level: int):
+    """Worker process: keep the assigned shard and probe it when asked."""
+    # Ctrl+C reaches the whole process group; the monitor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Probe warnings go through the monitor's log handlers
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(log_level)
+
+    shard: List[str] = []
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix=name) as executor:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+
+            kind = message[0]
+            if kind == 'stop':
+                return
+            if kind == 'assign':
+                shard = message[1]
+            elif kind == 'probe':
+                if _probe_shard(name, message[1], shard, prober, executor, conn, results):
+                    return
+            # A 'cancel' for a cycle that already finished needs nothing
+
+
+class ShardPool:
+    """
+    Worker processes probing consistent-hash shards of the server list.
+
+    Workers are started on first use. probe() yields results in arrival
+    order for the monitor to apply, and passes the prober time of each
+    batch to observe_probes(seconds, count) when given.
+    """
+
+    def __init__(self, prober: Prober, workers: int = 2, threads: int = DEFAULT_WORKER_THREADS,
+                 vnodes: int = DEFAULT_VNODES,
+                 observe_probes: Optional[Callable[[float, int], None]] = None):
+        self.prober = prober
+        self.observe_probes = observe_probes
+        self.size = max(1, int(workers))
+        self.threads = max(1, int(threads))
+        self.ring = HashRing(vnodes=vnodes)
+
+        self._context = multiprocessing.get_context('spawn')
+        self._results = None
+        self._log_queue = None
+        self._log_listener: Optional[QueueListener] = None
+        self._workers: Dict[str, Tuple[multiprocessing.process.BaseProcess, object]] = {}
+        self._shards: Dict[str, List[str]] = {}
+        self._owner: Dict[str, str] = {}
+        self._servers: List[str] = []
+        self._cycle = 0
+
+    @property
+    def started(self) -> bool:
+        return self._results is not None
+
+    @property
+    def workers(self) -> List[str]:
+        """Worker names, which are also their ring nodes."""
+        return list(self.ring.nodes)
+
+    def shard_sizes(self) -> Dict[str, int]:
+        """Number of servers assigned to each worker."""
+        return {name: len(self._shards.get(name, ())) for name in self.ring.nodes}
+
+    def start(self):
+        """Start the worker processes."""
+        if self.started:
+            return
+        self._results = self._context.Queue()
+        self._log_queue = self._context.Queue()
+        self._log_listener = QueueListener(self._log_queue, _ForwardHandler())
+        self._log_listener.start()
+        for index in range(self.size):
+            name = f"worker-{index}"
+            self.ring.add_node(name)
+            self._spawn(name)
+        logger.info(f"Started {self.size} probe workers with {self.threads} threads each")
+
+    def _spawn(self, name: str):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, name=f"server-monitor-{name}", daemon=True,
+            args=(name, self.prober, self.threads, child_conn, self._results,
+                  self._log_queue, logging.getLogger().getEffectiveLevel()))
+        process.start()
+        child_conn.close()
+        self._workers[name] = (process, parent_conn)
+
+        shard = self._shards.setdefault(name, [])
+        if shard:
+            parent_conn.send(('assign', shard))
+
+    def stop(self):
+        """Stop all workers."""
+        if not self.started:
+            return
+        for name in list(self._workers):
+            self._stop_worker(name)
+        self._results.close()
+        self._results = None
+        self._log_listener.stop()
+        self._log_listener = None
+        self._log_queue.close()
+        self._log_queue = None
+
+    def _stop_worker(self, name: str):
+        process, conn = self._workers.pop(name)
+        try:
+            conn.send(('stop',))
+        except OSError:
+            pass
+        process.join(WORKER_STOP_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        conn.close()
+
+    def resize(self, workers: int) -> int:
+        """
+        Change the number of workers between cycles.
+
+        Returns:
+            Number of servers that moved to a different worker
+        """
+        workers = max(1, int(workers))
+        self.size = workers
+        if not self.started:
+            return 0
+
+        while len(self.ring.nodes) < workers:
+            index = 0
+            while f"worker-{index}" in self.ring.nodes:
+                index += 1
+            name = f"worker-{index}"
+            self.ring.add_node(name)
+            self._spawn(name)
+
+        while len(self.ring.nodes) > workers:
+            name = max(self.ring.nodes, key=lambda node: int(node.rsplit('-', 1)[1]))
+            self.ring.remove_node(name)
+            self._stop_worker(name)
+            del self._shards[name]
+
+        moved = self.assign(self._servers, ring_changed=True)
+        logger.info(f"Resized to {workers} probe workers; {moved} servers moved")
+        return moved
+
+    def assign(self, servers: List[str], ring_changed: bool = False) -> int:
+        """
+        Send each worker its shard of `servers`.
+
+        Returns:
+            Number of known servers that moved to a different worker
+        """
+        owner = {}
+        moved = 0
+        for server in servers:
+            previous = self._owner.get(server)
+            if previous is None or ring_changed:
+                node = self.ring.node_for(server)
+                if previous is not None and previous != node:
+                    moved += 1
+            else:
+                node = previous
+            owner[server] = node
+
+        shards: Dict[str, List[str]] = {name: [] for name in self.ring.nodes}
+        for server in servers:
+            shards[owner[server]].append(server)
+
+        for name, shard in shards.items():
+            if shard != self._shards.get(name):
+                self._shards[name] = shard
+                self._workers[name][1].send(('assign', shard))
+
+        self._owner = owner
+        self._servers = list(servers)
+        return moved
+
+    def probe(self, servers: List[str],
+              should_continue: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[str, bool, int, float]]:
+        """
+        Probe `servers` once across the workers.
+
+        Yields:
+            (server, is_reachable, response_time, seconds spent waiting for
+            the batch) in arrival order; stops early when should_continue()
+            returns False
+        """
+        self.start()
+        self._restart_dead_workers()
+        if servers != self._servers:
+            self.assign(servers)
+
+        self._cycle += 1
+        cycle = self._cycle
+        running = set()
+        for name, shard in self._shards.items():
+            if shard:
+                self._workers[name][1].send(('probe', cycle))
+                running.add(name)
+
+        try:
+            while running:
+                if should_continue and not should_continue():
+                    break
+
+                wait_started = time.monotonic()
+                try:
+                    name, batch_cycle, payload, probe_seconds = self._results.get(timeout=WORKER_CHECK_INTERVAL)
+                except queue.Empty:
+                    self._restart_dead_workers(running)
+                    continue
+                waited = time.monotonic() - wait_started
+
+                # Left over from a cancelled cycle
+                if batch_cycle != cycle:
+                    continue
+                if payload is None:
+                    running.discard(name)
+                    continue
+
+                shard = self._shards[name]
+                values = array('l')
+                values.frombytes(payload)
+                if self.observe_probes:
+                    self.observe_probes(probe_seconds, len(values) // 2)
+                for index in range(0, len(values), 2):
+                    value = values[index + 1]
+                    if value >= 0:
+                        yield shard[values[index]], True, value, waited
+                    else:
+                        yield shard[values[index]], False, -1 - value, waited
+                    waited = 0.0
+        finally:
+            for name in running:
+                try:
+                    self._workers[name][1].send(('cancel', cycle))
+                except OSError:
+                    pass
+
+    def _restart_dead_workers(self, running: Optional[set] = None):
+        """Restart crashed workers; their unreported servers are skipped this cycle."""
+        for name in list(self._workers):
+            process = self._workers[name][0]
+            if process.is_alive():
+                continue
+            logger.error(f"Probe worker {name} exited with code {process.exitcode}; restarting")
+            self._workers[name][1].close()
+            self._spawn(name)
+            if running is not None:
+                running.discard(name)
+
+
+def open_shard_pool(prober: Prober, workers: Optional[str] = None,
+                    observe_probes: Optional[Callable[[float, int], None]] = None) -> Optional[ShardPool]:
+    """Create the pool configured by SERVER_MONITOR_WORKERS, or return None."""
+    value = str(workers if workers is not None else os.getenv('SERVER_MONITOR_WORKERS', '')).strip()
+    if not value:
+        return None
+
+    try:
+        count = int(value)
+    except ValueError:
+        logger.error(f"Invalid number of probe workers: {value}")
+        return None
+    if count < 1:
+        return None
+    return ShardPool(prober, count, observe_probes=observe_probes)
+
+
+def main(argv=None) -> int:
+    """Command line entry point: report ring balance and moves when resizing."""
+    parser = argparse.ArgumentParser(description="Show how a consistent-hash ring splits a fleet")
+    parser.add_argument('--hosts', type=int, default=50000, help="Synthetic fleet size (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=4, help="Workers (default: %(default)s)")
+    parser.add_argument('--vnodes', type=int, default=DEFAULT_VNODES,
+                        help="Virtual nodes per worker (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.workers < 2:
+        parser.error("--workers must be at least 2")
+
+    from benchmark import synthetic_fleet
+
+    fleet = synthetic_fleet(args.hosts)
+    names = [f"worker-{index}" for index in range(args.workers)]
+    ring = HashRing(names, args.vnodes)
+    owners = {server: ring.node_for(server) for server in fleet}
+
+    sizes = [len(shard) for shard in ring.assign(fleet).values()]
+    mean = args.hosts / args.workers
+    print(f"{args.hosts} hosts on {args.workers} workers x {args.vnodes} vnodes: "
+          f"min {min(sizes)}, max {max(sizes)} ({(max(sizes) / mean - 1) * 100:+.1f}% over mean)")
+
+    for label, change in (('add', HashRing(names + [f"worker-{args.workers}"], args.vnodes)),
+                          ('remove', HashRing(names[:-1], args.vnodes))):
+        moved = sum(1 for server in fleet if change.node_for(server) != owners[server])
+        workers = len(change.nodes)
+        print(f"{label} a worker ({workers} workers): {moved} hosts moved "
+              f"({moved / args.hosts * 100:.1f}%, ideal {100 / max(workers, args.workers):.1f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
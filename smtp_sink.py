@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Server Monitor SMTP Sink
+Local stand-in for an SMTP relay, for testing alerts without sending mail.
+
+Speaks just enough SMTP for smtplib: EHLO/HELO, AUTH PLAIN and LOGIN,
+MAIL, RCPT, DATA, RSET, NOOP and QUIT. Accepted messages are kept in
+memory with the time they were accepted. STARTTLS is not offered, so point
+the monitor at the sink with TLS switched off:
+
+    python smtp_sink.py --port 2525 --latency 0.05 --refuse-login 0.1 --drop 0.05
+
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=2525 SMTP_USE_TLS=false \\
+    SMTP_USERNAME=monitor SMTP_PASSWORD=secret \\
+    SMTP_FROM=monitor@localhost SMTP_TO=ops@localhost python server_monitor_console.py
+
+Faults that can be injected:
+- latency: delay before every reply
+- relay_delay: extra delay before a message is accepted (a slow relay)
+- refuse_login: probability that AUTH fails with 535
+- drop: probability that a connection is dropped without a reply, right
+  after connecting, during AUTH or in the middle of DATA
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import sys
+import time
+import base64
+import random
+import asyncio
+import argparse
+import threading
+import logging
+from collections import deque
+from email.parser import BytesHeaderParser
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 2525
+DEFAULT_KEEP = 100000
+DROP_STAGES = ('connect', 'auth', 'data')
+
+
+class SinkMessage(NamedTuple):
+    """A message accepted by the sink."""
+    accepted_at: float  # time.time() when 250 was sent for DATA
+    mail_from: str
+    recipients: Tuple[str, ...]
+    subject: str
+    size: int
+
+
+class _Dropped(Exception):
+    """The injected fault closes the connection without a reply."""
+
+
+class SMTPSink:
+    """
+    Minimal asyncio SMTP server with configurable faults.
+
+    Use start()/stop() to serve from a background thread, or run() to
+    block until interrupted.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, latency: float = 0.0,
+                 relay_delay: float = 0.0, refuse_login: float = 0.0, drop: float = 0.0,
+                 credentials: Optional[Tuple[str, str]] = None, keep: int = DEFAULT_KEEP,
+                 seed: int = 0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.relay_delay = relay_delay
+        self.refuse_login = refuse_login
+        self.drop = drop
+        self.credentials = credentials
+        self.rng = random.Random(seed)
+
+        self.messages: Deque[SinkMessage] = deque(maxlen=keep)
+        self.stats = {'connections': 0, 'logins': 0, 'logins_refused': 0,
+                      'messages': 0, 'dropped': 0}
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopping: Optional[asyncio.Event] = None
+        self._error: Optional[OSError] = None
+
+    # ------------------------------------------------------------------
+    # Protocol
+    # ------------------------------------------------------------------
+
+    async def _reply(self, writer: asyncio.StreamWriter, text: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(text.encode('ascii') + b"\r\n")
+        await writer.drain()
+
+    def _check_login(self, username: str, password: str) -> bool:
+        if self.refuse_login and self.rng.random() < self.refuse_login:
+            return False
+        return self.credentials is None or self.credentials == (username, password)
+
+    async def _auth(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, arg: str) -> bool:
+        mechanism, _, initial = arg.partition(' ')
+        mechanism = mechanism.upper()
+
+        try:
+            if mechanism == 'PLAIN':
+                if not initial:
+                    await self._reply(writer, "334 ")
+                    initial = (await reader.readline()).decode('ascii').strip()
+                _, username, password = base64.b64decode(initial).decode('utf-8').split('\0')
+            elif mechanism == 'LOGIN':
+                if not initial:
+                    await self._reply(writer, "334 VXNlcm5hbWU6")
+                    initial = (await reader.readline()).decode('ascii').strip()
+                username = base64.b64decode(initial).decode('utf-8')
+                await self._reply(writer, "334 UGFzc3dvcmQ6")
+                password = base64.b64decode((await reader.readline()).strip()).decode('utf-8')
+            else:
+                await self._reply(writer, "504 5.5.4 Unrecognized authentication type")
+                return False
+        except (ValueError, UnicodeDecodeError):
+            await self._reply(writer, "501 5.5.2 Cannot decode response")
+            return False
+
+        if not self._check_login(username, password):
+            self.stats['logins_refused'] += 1
+            await self._reply(writer, "535 5.7.8 Authentication credentials invalid")
+            return False
+
+        self.stats['logins'] += 1
+        await self._reply(writer, "235 2.7.0 Authentication successful")
+        return True
+
+    async def _read_data(self, reader: asyncio.StreamReader, drop: bool) -> bytes:
+        lines = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionResetError("client closed during DATA")
+            if line in (b".\r\n", b".\n"):
+                return b"".join(lines)
+            if line.startswith(b".."):
+                line = line[1:]
+            lines.append(line)
+            if drop and len(lines) == 2:
+                raise _Dropped()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats['connections'] += 1
+        drop_stage = self.rng.choice(DROP_STAGES) if self.drop and self.rng.random() < self.drop else None
+
+        authenticated = self.credentials is None and not self.refuse_login
+        mail_from = None
+        recipients: List[str] = []
+
+        try:
+            if drop_stage == 'connect':
+                raise _Dropped()
+            await self._reply(writer, f"220 {self.host} server-monitor SMTP sink ready")
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, arg = line.decode('utf-8', 'replace').rstrip("\r\n").partition(' ')
+                command = command.upper()
+
+                if command == 'EHLO':
+                    await self._reply(writer, f"250-{self.host}\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SIZE 10485760")
+                elif command == 'HELO':
+                    await self._reply(writer, f"250 {self.host}")
+                elif command == 'AUTH':
+                    if drop_stage == 'auth':
+                        raise _Dropped()
+                    authenticated = await self._auth(reader, writer, arg) or authenticated
+                elif command == 'MAIL':
+                    if not authenticated:
+                        await self._reply(writer, "530 5.7.0 Authentication required")
+                        continue
+                    mail_from = arg.partition(':')[2].strip().strip('<>')
+                    recipients = []
+                    await self._reply(writer, "250 2.1.0 OK")
+                elif command == 'RCPT':
+                    if mail_from is None:
+                        await self._reply(writer, "503 5.5.1 Need MAIL first")
+                        continue
+                    recipients.append(arg.partition(':')[2].strip().strip('<>'))
+                    await self._reply(writer, "250 2.1.5 OK")
+                elif command == 'DATA':
+                    if not recipients:
+                        await self._reply(writer, "503 5.5.1 Need RCPT first")
+                        continue
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    data = await self._read_data(reader, drop_stage == 'data')
+                    if self.relay_delay:
+                        await asyncio.sleep(self.relay_delay)
+                    self._accept(mail_from, recipients, data)
+                    mail_from, recipients = None, []
+                    await self._reply(writer, "250 2.0.0 Queued")
+                elif command == 'RSET':
+                    mail_from, recipients = None, []
+                    await self._reply(writer, "250 2.0.0 OK")
+                elif command == 'NOOP':
+                    await self._reply(writer, "250 2.0.0 OK")
+                elif command == 'QUIT':
+                    await self._reply(writer, "221 2.0.0 Bye")
+                    break
+                else:
+                    await self._reply(writer, "502 5.5.2 Command not implemented")
+        except _Dropped:
+            self.stats['dropped'] += 1
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _accept(self, mail_from: str, recipients: List[str], data: bytes):
+        headers = BytesHeaderParser().parsebytes(data)
+        message = SinkMessage(time.time(), mail_from, tuple(recipients),
+                              str(headers.get('Subject', '')), len(data))
+        self.messages.append(message)
+        self.stats['messages'] += 1
+        logger.debug(f"Accepted message from {mail_from}: {message.subject}")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        try:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                      reuse_address=True, backlog=512)
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        await self._stopping.wait()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def start(self, timeout: float = 10.0):
+        """Start serving in a background thread; returns once the sink listens."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),), daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise OSError("SMTP sink did not start")
+        if self._error:
+            raise self._error
+        logger.info(f"SMTP sink listening on {self.host}:{self.port}")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop accepting connections and shut down the event loop."""
+        if self.loop is not None and self._stopping is not None:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def smtp_env(self, username: str = 'monitor', password: str = 'secret') -> Dict[str, str]:
+        """Environment variables that point the monitor at this sink."""
+        return {
+            'SMTP_SERVER': self.host,
+            'SMTP_PORT': str(self.port),
+            'SMTP_USE_TLS': 'false',
+            'SMTP_USERNAME': username,
+            'SMTP_PASSWORD': password,
+            'SMTP_FROM': 'monitor@localhost',
+            'SMTP_TO': 'ops@localhost'
+        }
+
+    def run(self, report_interval: float = 10.0):
+        """Serve until interrupted, printing accepted messages and statistics."""
+        self.start()
+        printed = 0
+        try:
+            while True:
+                time.sleep(report_interval)
+                total = self.stats['messages']
+                for message in list(self.messages)[-(total - printed):] if total > printed else []:
+                    print(f"📧 {message.mail_from} -> {', '.join(message.recipients)}: {message.subject}",
+                          file=sys.stderr)
+                printed = total
+                print(f"📊 {self.stats}", file=sys.stderr)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Local SMTP sink with injectable faults")
+    parser.add_argument('--host', default='127.0.0.1', help="Listen address (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Listen port (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before every reply")
+    parser.add_argument('--relay-delay', type=float, default=0.0, help="Extra seconds before accepting a message")
+    parser.add_argument('--refuse-login', type=float, default=0.0, help="Probability that AUTH fails")
+    parser.add_argument('--drop', type=float, default=0.0, help="Probability that a connection is dropped")
+    parser.add_argument('--user', help="Only accept this username (default: any)")
+    parser.add_argument('--password', help="Only accept this password (with --user)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: %(default)s)")
+    parser.add_argument('--verbose', '-v', action='store_true', help="Log every accepted message")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    credentials = (args.user, args.password or '') if args.user else None
+    sink = SMTPSink(args.host, args.port, args.latency, args.relay_delay, args.refuse_login,
+                    args.drop, credentials, seed=args.seed)
+    try:
+        sink.run()
+    except OSError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Server Monitor State Store
+Optional SQLite backend for server inventory, runtime state and probe history.
+
+The database runs in WAL mode so that report jobs and dashboards can read
+while the monitor keeps writing. All probe results of a monitoring cycle are
+written in a single transaction with executemany(), which keeps fsyncs and
+page writes per probe low even for large fleets.
+
+Enable it by pointing SERVER_MONITOR_DB at a database file:
+
+    export SERVER_MONITOR_DB=/var/lib/server-monitor/monitor.db
+
+History can then be queried with plain SQL, for example:
+
+    sqlite3 monitor.db "SELECT s.host, datetime(h.ts, 'unixepoch'), h.reachable
+                        FROM probe_history h JOIN servers s ON s.id = h.server_id
+                        WHERE h.ts > strftime('%s', 'now', '-1 hour')"
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+-- AUTOINCREMENT: ids are never reused, so history rows always belong to
+-- the host that wrote them. Removed hosts keep their row with configured = 0
+-- so their history can still be exported by name.
+CREATE TABLE IF NOT EXISTS servers (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    host       TEXT NOT NULL UNIQUE,
+    added_at   REAL NOT NULL,
+    configured INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS server_state (
+    server_id          INTEGER PRIMARY KEY REFERENCES servers(id) ON DELETE CASCADE,
+    status             INTEGER,
+    last_check         REAL,
+    response_time      INTEGER NOT NULL DEFAULT 0,
+    failures           INTEGER NOT NULL DEFAULT 0,
+    last_failure_email INTEGER
+);
+
+-- Append-only; rows arrive in timestamp order so both the table and the
+-- ts index only ever grow at their right edge. The (server_id, ts) index
+-- serves per-server graphs without scanning the whole time window.
+CREATE TABLE IF NOT EXISTS probe_history (
+    ts            REAL NOT NULL,
+    server_id     INTEGER NOT NULL,
+    reachable     INTEGER NOT NULL,
+    response_time INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_probe_history_ts ON probe_history(ts);
+CREATE INDEX IF NOT EXISTS idx_probe_history_server_ts ON probe_history(server_id, ts);
+"""
+
+# (host, timestamp, is_reachable, response_time, failures, last_failure_email)
+ProbeRecord = Tuple[str, float, bool, int, int, Optional[int]]
+
+# Largest host list filtered in SQL; bigger sets are filtered while streaming
+MAX_SQL_HOST_FILTER = 500
+
+# Days of probe history kept (SERVER_MONITOR_HISTORY_DAYS; 0 keeps everything)
+DEFAULT_HISTORY_DAYS = 30
+
+# History rows deleted per transaction when pruning
+PRUNE_BATCH_ROWS = 10000
+
+
+class SQLiteStateStore:
+    """WAL-mode SQLite store shared by the GUI and console monitors."""
+
+    def __init__(self, path: str, history_days: float = DEFAULT_HISTORY_DAYS):
+        self.path = path
+        self.history_days = history_days
+        self._lock = threading.Lock()
+        # host -> server_id of every known host, and the configured ones
+        self._ids: Dict[str, int] = {}
+        self._configured: Set[str] = set()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # The writer connection is shared between the GUI/menu thread and the
+        # monitor thread, so access is serialised with self._lock.
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes in WAL mode and avoids
+        # an fsync on every commit.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute("PRAGMA journal_size_limit=67108864")
+        self._conn.executescript(SCHEMA)
+        self._migrate_servers_table()
+        self._refresh_ids()
+
+        logger.info(f"State store opened: {path}")
+
+    def _migrate_servers_table(self):
+        """Rebuild a servers table created before ids were AUTOINCREMENT."""
+        sql = self._conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'servers'").fetchone()[0]
+        if 'AUTOINCREMENT' in sql:
+            return
+
+        logger.info("Migrating servers table to never reuse server ids")
+        # Dropping the old table must not cascade to server_state
+        self._conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # One statement at a time: executescript() would commit first
+                for statement in (
+                    "CREATE TABLE servers_new ("
+                    " id INTEGER PRIMARY KEY AUTOINCREMENT, host TEXT NOT NULL UNIQUE,"
+                    " added_at REAL NOT NULL, configured INTEGER NOT NULL DEFAULT 1)",
+                    "INSERT INTO servers_new (id, host, added_at) SELECT id, host, added_at FROM servers",
+                    "DROP TABLE servers",
+                    "ALTER TABLE servers_new RENAME TO servers"
+                ):
+                    self._conn.execute(statement)
+                # Ids of servers deleted by older versions may still own history rows
+                self._conn.execute("DELETE FROM sqlite_sequence WHERE name = 'servers'")
+                self._conn.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES ('servers', "
+                    "MAX(COALESCE((SELECT MAX(id) FROM servers), 0), "
+                    "COALESCE((SELECT MAX(server_id) FROM probe_history), 0)))"
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        finally:
+            self._conn.execute("PRAGMA foreign_keys=ON")
+
+    def _refresh_ids(self):
+        """Reload the host -> server_id cache and the configured hosts."""
+        self._ids = {}
+        self._configured = set()
+        for host, server_id, configured in self._conn.execute("SELECT host, id, configured FROM servers"):
+            self._ids[host] = server_id
+            if configured:
+                self._configured.add(host)
+
+    def connect_reader(self) -> sqlite3.Connection:
+        """
+        Open a read-only connection for dashboards and report jobs.
+
+        Readers see the last committed cycle and never block the writer.
+        """
+        uri = f"file:{os.path.abspath(self.path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def load_inventory(self) -> Tuple[List[str], Dict[str, str]]:
+        """Return (servers, settings) as saved by save_inventory()."""
+        with self._lock:
+            servers = [row[0] for row in self._conn.execute("SELECT host FROM servers WHERE configured ORDER BY id")]
+            settings = dict(self._conn.execute("SELECT key, value FROM settings"))
+        return servers, settings
+
+    def save_inventory(self, servers: Iterable[str], settings: Dict[str, object]):
+        """Synchronise the servers table and settings with the given values."""
+        wanted = list(servers)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Removed servers keep their row and history, which ages out
+                # with the retention; their runtime state is dropped
+                removed = [(self._ids[host],) for host in self._configured - set(wanted)]
+                self._conn.executemany("UPDATE servers SET configured = 0 WHERE id = ?", removed)
+                self._conn.executemany("DELETE FROM server_state WHERE server_id = ?", removed)
+
+                added = [host for host in wanted if host not in self._configured]
+                self._conn.executemany("UPDATE servers SET configured = 1 WHERE host = ?",
+                                       [(host,) for host in added])
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO servers (host, added_at) VALUES (?, ?)",
+                    [(host, now) for host in added]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    [(key, str(value)) for key, value in settings.items()]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._refresh_ids()
+
+    def register_hosts(self, hosts: Iterable[str]):
+        """Give hosts an id for history and state without adding them to the inventory."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO servers (host, added_at, configured) VALUES (?, ?, 0)",
+                [(host, now) for host in hosts]
+            )
+            self._refresh_ids()
+
+    def load_state(self) -> Dict[str, Dict]:
+        """Return the persisted runtime state keyed by host."""
+        query = """
+            SELECT s.host, st.status, st.last_check, st.response_time,
+                   st.failures, st.last_failure_email
+            FROM server_state st JOIN servers s ON s.id = st.server_id
+            WHERE s.configured
+        """
+        state = {}
+        with self._lock:
+            for host, status, last_check, response_time, failures, last_email in self._conn.execute(query):
+                state[host] = {
+                    'status': None if status is None else bool(status),
+                    'last_check': datetime.fromtimestamp(last_check) if last_check else None,
+                    'response_time': response_time,
+                    'failures': failures,
+                    'last_failure_email': last_email
+                }
+        return state
+
+    def record_cycle(self, records: List[ProbeRecord]):
+        """
+        Persist the probe results of one monitoring cycle.
+
+        History rows and runtime state are written in one transaction, so a
+        cycle of any size costs a single commit.
+        """
+        if not records:
+            return
+
+        with self._lock:
+            history = []
+            state = []
+            for host, ts, is_reachable, response_time, failures, last_email in records:
+                server_id = self._ids.get(host)
+                if server_id is None:
+                    # Unknown host, e.g. probed before register_hosts()
+                    continue
+                history.append((ts, server_id, int(is_reachable), response_time))
+                state.append((server_id, int(is_reachable), ts, response_time, failures, last_email))
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO probe_history (ts, server_id, reachable, response_time) "
+                    "VALUES (?, ?, ?, ?)",
+                    history
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO server_state "
+                    "(server_id, status, last_check, response_time, failures, last_failure_email) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    state
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def query_history(self, hosts: Optional[Iterable[str]] = None, since: Optional[float] = None,
+                      until: Optional[float] = None) -> List[sqlite3.Row]:
+        """
+        Return probe history rows in timestamp order, optionally filtered by
+        hosts and time range.
+
+        Hosts are looked up through the (server_id, ts) index, one query per
+        MAX_SQL_HOST_FILTER hosts.
+        """
+        clauses = []
+        params: List[object] = []
+        if since is not None:
+            clauses.append("h.ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("h.ts < ?")
+            params.append(until)
+
+        query = ("SELECT s.host, h.ts, h.reachable, h.response_time "
+                 "FROM probe_history h JOIN servers s ON s.id = h.server_id")
+
+        host_chunks: List[Optional[List[str]]] = [None]
+        if hosts is not None:
+            hosts = list(hosts)
+            host_chunks = [hosts[start:start + MAX_SQL_HOST_FILTER]
+                           for start in range(0, len(hosts), MAX_SQL_HOST_FILTER)]
+
+        rows = []
+        conn = self.connect_reader()
+        try:
+            for chunk in host_chunks:
+                chunk_clauses = list(clauses)
+                chunk_params = list(params)
+                if chunk is not None:
+                    chunk_clauses.insert(0, f"s.host IN ({', '.join('?' * len(chunk))})")
+                    chunk_params[:0] = chunk
+                chunk_query = query
+                if chunk_clauses:
+                    chunk_query += " WHERE " + " AND ".join(chunk_clauses)
+                rows.extend(conn.execute(chunk_query + " ORDER BY h.ts", chunk_params).fetchall())
+        finally:
+            conn.close()
+
+        if len(host_chunks) > 1:
+            rows.sort(key=lambda row: row['ts'])
+        return rows
+
+    def iter_history(self, hosts: Optional[Iterable[str]] = None, since: Optional[float] = None,
+                     until: Optional[float] = None,
+                     chunk_size: int = 10000) -> Iterator[List[Tuple[float, str, int, int]]]:
+        """Stream probe history in chunks; see the module-level iter_history()."""
+        return iter_history(self.path, hosts, since, until, chunk_size)
+
+    def prune_history(self, older_than: float, batch_size: int = PRUNE_BATCH_ROWS) -> int:
+        """
+        Delete history rows older than the given timestamp.
+
+        Rows go in batches, each its own transaction, so cycle writes are
+        never held up for long. Old rows sit at the left edge of the ts
+        index, so each batch is cheap.
+        """
+        deleted = 0
+        while True:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "DELETE FROM probe_history WHERE rowid IN "
+                    "(SELECT rowid FROM probe_history WHERE ts < ? ORDER BY ts LIMIT ?)",
+                    (older_than, batch_size)
+                )
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return deleted
+
+    def prune_expired_history(self) -> int:
+        """Delete history older than history_days; returns the rows deleted."""
+        if not self.history_days:
+            return 0
+        return self.prune_history(time.time() - self.history_days * 86400)
+
+    def close(self):
+        """Checkpoint the WAL and close the writer connection."""
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                self._conn.close()
+
+
+def iter_history(path: str, hosts: Optional[Iterable[str]] = None, since: Optional[float] = None,
+                 until: Optional[float] = None,
+                 chunk_size: int = 10000) -> Iterator[List[Tuple[float, str, int, int]]]:
+    """
+    Stream probe history in timestamp order as lists of at most chunk_size rows.
+
+    Rows are (ts, host, reachable, response_time). Only one chunk is held
+    in memory at a time, so arbitrarily long ranges can be exported. Uses
+    its own read-only connection and never blocks the monitor's writes.
+    """
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    try:
+        names = dict(conn.execute("SELECT id, host FROM servers"))
+
+        clauses = []
+        params: List[object] = []
+        wanted_ids = None
+        if hosts is not None:
+            wanted = set(hosts)
+            wanted_ids = {server_id for server_id, host in names.items() if host in wanted}
+            if not wanted_ids:
+                return
+            if len(wanted_ids) <= MAX_SQL_HOST_FILTER:
+                clauses.append(f"server_id IN ({', '.join('?' * len(wanted_ids))})")
+                params.extend(wanted_ids)
+                wanted_ids = None
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+
+        # No join: host names are resolved from the small servers table,
+        # and the ts index delivers rows already in order
+        query = "SELECT ts, server_id, reachable, response_time FROM probe_history"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY ts"
+
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            # Rows of servers deleted by older versions have no name and are skipped
+            chunk = [(ts, names[server_id], reachable, response_time)
+                     for ts, server_id, reachable, response_time in rows
+                     if server_id in names and (wanted_ids is None or server_id in wanted_ids)]
+            if chunk:
+                yield chunk
+    finally:
+        conn.close()
+
+
+def open_state_store() -> Optional[SQLiteStateStore]:
+    """Open the store configured by SERVER_MONITOR_DB, or return None."""
+    path = os.getenv('SERVER_MONITOR_DB', '').strip()
+    if not path:
+        return None
+
+    try:
+        history_days = float(os.getenv('SERVER_MONITOR_HISTORY_DAYS', '').strip() or DEFAULT_HISTORY_DAYS)
+        return SQLiteStateStore(path, history_days)
+    except ValueError:
+        logger.error(f"Invalid SERVER_MONITOR_HISTORY_DAYS: {os.getenv('SERVER_MONITOR_HISTORY_DAYS')}")
+        return None
+    except sqlite3.Error as e:
+        logger.error(f"Failed to open state store {path}: {e}")
+        return None
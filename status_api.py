@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Server Monitor Status API
+Read-only JSON HTTP API for other tools to query monitoring status.
+
+Endpoints:
+    GET /servers          all servers with their current status
+    GET /servers/<host>   one server
+    GET /summary          fleet counts, RTT statistics and monitor settings
+
+After every probe cycle the monitor builds an immutable snapshot with the
+response bodies already encoded and swaps it in with a single reference
+assignment. Requests only read the current snapshot, so they never lock
+against the monitor thread. Every response carries an ETag; clients that
+send If-None-Match get 304 Not Modified until the data changes.
+
+Enable it by setting SERVER_MONITOR_API to a port or host:port:
+
+    export SERVER_MONITOR_API=127.0.0.1:9106
+    curl http://127.0.0.1:9106/summary
+
+Author: Infrastructure Team
+Version: 1.0.0
+"""
+
+import os
+import json
+import hashlib
+import threading
+import logging
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from fleet_stats import state_name
+from metrics_exporter import parse_address
+
+logger = logging.getLogger(__name__)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+class StatusSnapshot:
+    """Immutable, pre-encoded view of the monitor state after one cycle."""
+
+    __slots__ = ('generated_at', 'servers', 'servers_body', 'summary_body', '_hosts')
+
+    def __init__(self, generated_at: str, servers: Mapping[str, Dict],
+                 servers_body: bytes, summary_body: bytes):
+        self.generated_at = generated_at
+        self.servers = servers
+        self.servers_body = (servers_body, _etag(servers_body))
+        self.summary_body = (summary_body, _etag(summary_body))
+        self._hosts: Dict[str, Tuple[bytes, str]] = {}
+
+    def server_body(self, host: str) -> Optional[Tuple[bytes, str]]:
+        """Return the encoded body and ETag of one server, or None if unknown."""
+        cached = self._hosts.get(host)
+        if cached is None:
+            record = self.servers.get(host)
+            if record is None:
+                return None
+            body = json.dumps(record).encode('utf-8')
+            # Benign race: concurrent requests may encode the same body twice
+            cached = self._hosts[host] = (body, _etag(body))
+        return cached
+
+
+def build_snapshot(engine, cycles: int) -> StatusSnapshot:
+    """Capture the engine's current state as an immutable snapshot."""
+    generated_at = datetime.now().isoformat(timespec='seconds')
+
+    servers = {}
+    for host, data in list(engine.servers.items()):
+        last_check = data['last_check']
+        servers[host] = {
+            'host': host,
+            'status': state_name(data['status']),
+            'last_check': last_check.isoformat(timespec='seconds') if last_check else None,
+            'response_time_ms': data['response_time'],
+            'failures': data['failures'],
+            'group': engine.server_groups.get(host)
+        }
+
+    servers_body = json.dumps({
+        'generated_at': generated_at,
+        'servers': list(servers.values())
+    }).encode('utf-8')
+
+    fleet = engine.aggregates.snapshot()
+    summary_body = json.dumps({
+        'generated_at': generated_at,
+        'monitoring': engine.monitoring,
+        'cycles': cycles,
+        'check_interval': engine.check_interval,
+        'max_failures': engine.max_failures,
+        'servers': fleet['total'],
+        'states': fleet['states'],
+        'groups': fleet['groups'],
+        'monitor': engine.instrumentation_snapshot()
+    }).encode('utf-8')
+
+    return StatusSnapshot(generated_at, MappingProxyType(servers), servers_body, summary_body)
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    """Serves responses from the API's current snapshot."""
+
+    api: 'StatusAPI' = None
+
+    def do_GET(self):
+        snapshot = self.api.snapshot
+        path = urlsplit(self.path).path.rstrip('/')
+
+        if path == '/servers':
+            found = snapshot.servers_body
+        elif path == '/summary':
+            found = snapshot.summary_body
+        elif path.startswith('/servers/'):
+            found = snapshot.server_body(unquote(path[len('/servers/'):]))
+        else:
+            found = None
+
+        if found is None:
+            self._send(404, json.dumps({'error': 'not found', 'path': path}).encode('utf-8'))
+            return
+
+        body, etag = found
+        if etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self._send(200, body, etag)
+
+    def _send(self, status: int, body: bytes, etag: Optional[str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"API request from {self.address_string()}: {format % args}")
+
+
+class StatusAPI:
+    """HTTP server publishing a new snapshot after every cycle."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9106):
+        self.host = host
+        self.port = port
+        self.cycles = 0
+        self.snapshot = StatusSnapshot('', MappingProxyType({}), b'{"servers": []}', b'{}')
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, engine):
+        """Build a new snapshot and swap it in atomically."""
+        self.cycles += 1
+        self.snapshot = build_snapshot(engine, self.cycles)
+
+    def start(self):
+        """Start serving in a background thread."""
+        handler = type('StatusHandler', (_StatusHandler,), {'api': self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Status API listening on http://{self.host}:{self.port}/")
+
+    def stop(self):
+        """Stop the HTTP server."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def open_status_api(address: Optional[str] = None) -> Optional[StatusAPI]:
+    """Start the API configured by SERVER_MONITOR_API, or return None."""
+    address = (address or os.getenv('SERVER_MONITOR_API', '')).strip()
+    if not address:
+        return None
+
+    try:
+        host, port = parse_address(address)
+        api = StatusAPI(host, port)
+        api.start()
+        return api
+    except (ValueError, OSError) as e:
+        logger.error(f"Failed to start status API on {address}: {e}")
+        return None